@@ -6,31 +6,44 @@ This module provides genuine AI-powered video analysis using multiple models
 import os
 import cv2
 import numpy as np
-import librosa
-import torch
 import logging
-from typing import Dict, List, Any, Tuple, Optional
+import threading
+from typing import Callable, Dict, Iterable, List, Any, Tuple, Optional
 from dataclasses import dataclass
-import tempfile
+from contextlib import ExitStack
 import asyncio
 from concurrent.futures import ThreadPoolExecutor
 import json
 
-# AI Model imports
-try:
-    from transformers import pipeline, AutoTokenizer, AutoModelForSequenceClassification
-    import mediapipe as mp
-    from fer import FER
-    import nltk
-    from moviepy.editor import VideoFileClip
-    MODELS_AVAILABLE = True
-except ImportError as e:
-    logging.warning(f"Some AI models not available: {e}")
-    MODELS_AVAILABLE = False
+from app.core.lazy_imports import lazy_import, module_available
+from app.core.model_registry import model_registry
+from app.services.audio_cache import load_audio
+from app.services.audio_features import AudioFeaturePlane
+from app.services.frame_bus import FrameBus, FrameSubscriber
+
+# AI Model imports, deferred until first use
+librosa = lazy_import("librosa")
+mp = lazy_import("mediapipe")
+fer = lazy_import("fer")
+nltk = lazy_import("nltk")
+transformers = lazy_import("transformers")
+
+_missing_modules = [
+    name for name in ("transformers", "mediapipe", "fer", "nltk", "moviepy")
+    if not module_available(name)
+]
+MODELS_AVAILABLE = not _missing_modules
+if _missing_modules:
+    logging.warning(f"Some AI models not available: {', '.join(_missing_modules)}")
 
 # Setup logging
 logger = logging.getLogger(__name__)
 
+FER_MODEL_ID = "fer-mtcnn"
+SENTIMENT_MODEL_ID = "cardiffnlp/twitter-roberta-base-sentiment-latest"
+FACE_DETECTION_MODEL_ID = "mediapipe-face-detection"
+POSE_MODEL_ID = "mediapipe-pose"
+
 @dataclass
 class VideoAnalysisResult:
     """Comprehensive video analysis results"""
@@ -53,6 +66,264 @@ class AIRecommendation:
     reasoning: str
     implementation: Dict[str, Any]
 
+class ObjectSubscriber(FrameSubscriber):
+    """Real object detection using MediaPipe and OpenCV"""
+    
+    name = "objects"
+    sample_rate = 30  # Sample every 30 frames
+    frame_limit = 300  # Limit analysis
+    
+    def __init__(self, service: "RealAIService"):
+        self.service = service
+        self.objects_detected = {}
+    
+    def on_frame(self, frame_index: int, frame: np.ndarray, fps: float) -> None:
+        # Convert BGR to RGB
+        rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        
+        # Face detection
+        results = self.service.face_detection.process(rgb_frame)
+        if results.detections:
+            self.objects_detected['face'] = self.objects_detected.get('face', 0) + len(results.detections)
+        
+        # Pose detection (indicates person)
+        pose_results = self.service.pose.process(rgb_frame)
+        if pose_results.pose_landmarks:
+            self.objects_detected['person'] = self.objects_detected.get('person', 0) + 1
+        
+        # Basic color analysis for scene detection
+        hsv = cv2.cvtColor(frame, cv2.COLOR_BGR2HSV)
+        
+        # Detect dominant colors
+        hist = cv2.calcHist([hsv], [0], None, [180], [0, 180])
+        dominant_hue = np.argmax(hist)
+        
+        if 35 < dominant_hue < 85:  # Green range
+            self.objects_detected['nature/vegetation'] = self.objects_detected.get('nature/vegetation', 0) + 1
+        elif 100 < dominant_hue < 130:  # Blue range
+            self.objects_detected['sky/water'] = self.objects_detected.get('sky/water', 0) + 1
+    
+    def result(self) -> List[Dict[str, Any]]:
+        # Convert to required format
+        return [
+            {
+                'object': obj_name,
+                'confidence': min(0.95, 0.6 + (count / 100)),
+                'count': count,
+                'timestamp': f"0:{(i*10)%60:02d}"
+            }
+            for i, (obj_name, count) in enumerate(self.objects_detected.items())
+        ]
+
+
+class EmotionSubscriber(FrameSubscriber):
+    """Real emotion detection using FER"""
+    
+    name = "emotions"
+    sample_rate = 60  # Sample every 60 frames (2 seconds at 30fps)
+    frame_limit = 900  # Limit analysis
+    
+    def __init__(self, service: "RealAIService"):
+        self.service = service
+        self.emotions_timeline = []
+    
+    def on_frame(self, frame_index: int, frame: np.ndarray, fps: float) -> None:
+        # Detect emotions in frame
+        result = self.service.emotion_detector.detect_emotions(frame)
+        
+        if result:
+            for face_emotions in result:
+                emotions = face_emotions['emotions']
+                dominant_emotion = max(emotions, key=emotions.get)
+                confidence = emotions[dominant_emotion]
+                
+                timestamp = self.timestamp(frame_index, fps)
+                self.emotions_timeline.append({
+                    'emotion': dominant_emotion.capitalize(),
+                    'confidence': confidence,
+                    'timestamp': f"{int(timestamp//60)}:{int(timestamp%60):02d}",
+                    'all_emotions': emotions
+                })
+    
+    def result(self) -> List[Dict[str, Any]]:
+        return self.emotions_timeline
+
+
+class MotionSubscriber(FrameSubscriber):
+    """Real motion analysis using optical flow"""
+    
+    name = "motion"
+    sample_rate = 15
+    frame_limit = 450  # Limit analysis
+    
+    def __init__(self):
+        self.old_gray = None
+        self.motion_magnitudes = []
+    
+    def on_frame(self, frame_index: int, frame: np.ndarray, fps: float) -> None:
+        frame_gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        
+        # The first sampled frame only seeds the optical flow reference
+        if self.old_gray is not None:
+            # Calculate optical flow
+            flow = cv2.calcOpticalFlowPyrLK(
+                self.old_gray, frame_gray, None, None
+            )[0]
+            
+            if flow is not None:
+                # Calculate motion magnitude
+                magnitude = np.sqrt(flow[:, :, 0]**2 + flow[:, :, 1]**2)
+                self.motion_magnitudes.append(np.mean(magnitude))
+        
+        self.old_gray = frame_gray.copy()
+    
+    def result(self) -> Dict[str, Any]:
+        motion_magnitudes = self.motion_magnitudes
+        if motion_magnitudes:
+            return {
+                'average_motion': float(np.mean(motion_magnitudes)),
+                'motion_variance': float(np.var(motion_magnitudes)),
+                'max_motion': float(np.max(motion_magnitudes)),
+                'motion_type': 'high' if np.mean(motion_magnitudes) > 5 else 
+                             'medium' if np.mean(motion_magnitudes) > 2 else 'low',
+                'camera_stability': 'stable' if np.var(motion_magnitudes) < 2 else 'unstable'
+            }
+        else:
+            return {}
+
+
+class SceneSubscriber(FrameSubscriber):
+    """Real scene analysis using color histograms and transitions"""
+    
+    name = "scenes"
+    sample_rate = 45  # Scene change detection
+    frame_limit = 600
+    characteristics_rate = 60  # Scene characteristic classification
+    characteristics_limit = 300
+    
+    def __init__(self):
+        self.prev_hist = None
+        self.scene_changes = []
+        self.scene_types = {}
+    
+    def frame_indices(self, total_frames: int) -> Iterable[int]:
+        # Both passes of the original analysis are served from the same decode
+        change_frames = set(super().frame_indices(total_frames))
+        characteristic_frames = range(
+            0, min(self.characteristics_limit, total_frames), self.characteristics_rate
+        )
+        return change_frames.union(characteristic_frames)
+    
+    def on_frame(self, frame_index: int, frame: np.ndarray, fps: float) -> None:
+        if frame_index % self.sample_rate == 0 and frame_index < self.frame_limit:
+            self._detect_change(frame_index, frame, fps)
+        
+        if frame_index % self.characteristics_rate == 0 and frame_index < self.characteristics_limit:
+            self._classify_frame(frame)
+    
+    def _detect_change(self, frame_index: int, frame: np.ndarray, fps: float) -> None:
+        # Calculate color histogram
+        hist = cv2.calcHist([frame], [0, 1, 2], None, [50, 50, 50], [0, 256, 0, 256, 0, 256])
+        
+        if self.prev_hist is not None:
+            # Compare histograms to detect scene changes
+            correlation = cv2.compareHist(hist, self.prev_hist, cv2.HISTCMP_CORREL)
+            
+            if correlation < 0.8:  # Significant change
+                self.scene_changes.append(self.timestamp(frame_index, fps))
+        
+        self.prev_hist = hist
+    
+    def _classify_frame(self, frame: np.ndarray) -> None:
+        scene_types = self.scene_types
+        
+        # Analyze frame characteristics
+        hsv = cv2.cvtColor(frame, cv2.COLOR_BGR2HSV)
+        
+        # Calculate brightness
+        brightness = np.mean(cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY))
+        
+        # Analyze color distribution
+        h_hist = cv2.calcHist([hsv], [0], None, [180], [0, 180])
+        
+        # Classify scene type
+        if brightness > 200:
+            scene_types['bright/outdoor'] = scene_types.get('bright/outdoor', 0) + 1
+        elif brightness < 80:
+            scene_types['dark/indoor'] = scene_types.get('dark/indoor', 0) + 1
+        else:
+            scene_types['medium_light'] = scene_types.get('medium_light', 0) + 1
+        
+        # Check for nature (green dominance)
+        if np.argmax(h_hist[35:85]) + 35 > 0:
+            scene_types['nature'] = scene_types.get('nature', 0) + 1
+    
+    def result(self) -> List[Dict[str, Any]]:
+        return [
+            {
+                'scene': scene_type,
+                'confidence': min(0.95, 0.5 + (count / 20)),
+                'duration': f"0:{(i*15)%60:02d}",
+                'type': 'Primary' if count > 5 else 'Secondary'
+            }
+            for i, (scene_type, count) in enumerate(self.scene_types.items())
+        ]
+
+
+class TechnicalQualitySubscriber(FrameSubscriber):
+    """Analyze technical quality of the video"""
+    
+    name = "technical_quality"
+    sample_rate = 30
+    frame_limit = 300
+    
+    def __init__(self, service: "RealAIService"):
+        self.service = service
+        self.properties = {}
+        self.blur_scores = []
+        self.noise_levels = []
+    
+    def on_start(self, properties: Dict[str, Any]) -> None:
+        self.properties = properties
+    
+    def on_frame(self, frame_index: int, frame: np.ndarray, fps: float) -> None:
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        
+        # Calculate blur (Laplacian variance)
+        blur_score = cv2.Laplacian(gray, cv2.CV_64F).var()
+        self.blur_scores.append(blur_score)
+        
+        # Estimate noise level
+        noise_level = np.std(gray)
+        self.noise_levels.append(noise_level)
+    
+    def result(self) -> Dict[str, Any]:
+        # Video properties reported by the frame bus
+        width = self.properties.get('width', 0)
+        height = self.properties.get('height', 0)
+        fps = self.properties.get('fps', 0.0)
+        total_frames = self.properties.get('total_frames', 0)
+        
+        # Calculate quality metrics
+        avg_blur = np.mean(self.blur_scores) if self.blur_scores else 0
+        avg_noise = np.mean(self.noise_levels) if self.noise_levels else 0
+        
+        # Quality assessment
+        quality_score = min(100, max(0, (avg_blur / 100) * 50 + (1 - avg_noise / 255) * 50))
+        
+        return {
+            'resolution': f"{width}x{height}",
+            'fps': float(fps),
+            'total_frames': total_frames,
+            'duration_seconds': total_frames / fps if fps > 0 else 0,
+            'blur_score': float(avg_blur),
+            'noise_level': float(avg_noise),
+            'quality_score': float(quality_score),
+            'quality_rating': 'High' if quality_score > 70 else 'Medium' if quality_score > 40 else 'Low',
+            'recommendations': self.service._get_quality_recommendations(quality_score, avg_blur, avg_noise)
+        }
+
+
 class RealAIService:
     """Real AI service using multiple models for video analysis"""
     
@@ -62,42 +333,12 @@ class RealAIService:
         self.init_models()
     
     def init_models(self):
-        """Initialize AI models"""
+        """Check AI model availability; the models themselves load on first use"""
         if not MODELS_AVAILABLE:
             logger.warning("AI models not available, using fallback")
             return
         
         try:
-            # Emotion detection model
-            self.emotion_detector = FER(mtcnn=True)
-            
-            # Sentiment analysis model
-            self.sentiment_analyzer = pipeline(
-                "sentiment-analysis",
-                model="cardiffnlp/twitter-roberta-base-sentiment-latest",
-                tokenizer="cardiffnlp/twitter-roberta-base-sentiment-latest"
-            )
-            
-            # Object detection setup
-            self.mp_objectron = mp.solutions.objectron
-            self.mp_drawing = mp.solutions.drawing_utils
-            
-            # Face detection
-            self.mp_face_detection = mp.solutions.face_detection
-            self.face_detection = self.mp_face_detection.FaceDetection(
-                model_selection=0, min_detection_confidence=0.5
-            )
-            
-            # Pose detection for motion analysis
-            self.mp_pose = mp.solutions.pose
-            self.pose = self.mp_pose.Pose(
-                static_image_mode=False,
-                model_complexity=1,
-                smooth_landmarks=True,
-                min_detection_confidence=0.5,
-                min_tracking_confidence=0.5
-            )
-            
             # Download required NLTK data
             try:
                 nltk.data.find('tokenizers/punkt')
@@ -110,37 +351,106 @@ class RealAIService:
                 nltk.download('stopwords')
             
             self.models_loaded = True
-            logger.info("✅ AI models loaded successfully")
+            logger.info("✅ AI models available, loading on first use")
             
         except Exception as e:
             logger.error(f"Failed to load AI models: {e}")
             self.models_loaded = False
     
+    # Models are held by the process-wide registry so they are shared with the
+    # API routers and can be evicted when the memory budget is exceeded
+    
+    def _model_loaders(self) -> Dict[str, Callable[[], Any]]:
+        return {
+            # Emotion detection model
+            FER_MODEL_ID: lambda: fer.FER(mtcnn=True),
+            # Sentiment analysis model
+            SENTIMENT_MODEL_ID: lambda: transformers.pipeline(
+                "sentiment-analysis",
+                model=SENTIMENT_MODEL_ID,
+                tokenizer=SENTIMENT_MODEL_ID
+            ),
+            # Face detection
+            FACE_DETECTION_MODEL_ID: lambda: mp.solutions.face_detection.FaceDetection(
+                model_selection=0, min_detection_confidence=0.5
+            ),
+            # Pose detection for motion analysis
+            POSE_MODEL_ID: lambda: mp.solutions.pose.Pose(
+                static_image_mode=False,
+                model_complexity=1,
+                smooth_landmarks=True,
+                min_detection_confidence=0.5,
+                min_tracking_confidence=0.5
+            )
+        }
+    
+    def _model(self, model_id: str) -> Any:
+        return model_registry.get(model_id, self._model_loaders()[model_id])
+    
+    @property
+    def emotion_detector(self):
+        return self._model(FER_MODEL_ID)
+    
+    @property
+    def sentiment_analyzer(self):
+        return self._model(SENTIMENT_MODEL_ID)
+    
+    @property
+    def face_detection(self):
+        return self._model(FACE_DETECTION_MODEL_ID)
+    
+    @property
+    def pose(self):
+        return self._model(POSE_MODEL_ID)
+    
+    def _run_frame_bus(self, bus: FrameBus) -> Dict[str, Any]:
+        """Run the bus with the visual models pinned so they cannot be evicted mid-video"""
+        loaders = self._model_loaders()
+        with ExitStack() as stack:
+            for model_id in (FER_MODEL_ID, FACE_DETECTION_MODEL_ID, POSE_MODEL_ID):
+                stack.enter_context(model_registry.acquire(model_id, loaders[model_id]))
+            return bus.run()
+    
+    def _classify_sentiment(self, text: str) -> Dict[str, Any]:
+        """Run the sentiment pipeline with the model pinned; blocking, so call it on the executor"""
+        with model_registry.acquire(SENTIMENT_MODEL_ID, self._model_loaders()[SENTIMENT_MODEL_ID]) as analyzer:
+            return analyzer(text)[0]
+    
     async def analyze_video_comprehensive(self, video_path: str) -> VideoAnalysisResult:
         """Perform comprehensive AI analysis on video"""
         if not self.models_loaded:
             return self._fallback_analysis(video_path)
         
         try:
-            # Run analysis tasks concurrently
-            tasks = [
-                self._analyze_objects(video_path),
-                self._analyze_emotions(video_path),
-                self._analyze_scenes(video_path),
+            # Decode the video once for every visual analyzer, alongside audio extraction
+            bus = FrameBus(video_path)
+            bus.subscribe(ObjectSubscriber(self))
+            bus.subscribe(EmotionSubscriber(self))
+            bus.subscribe(SceneSubscriber())
+            bus.subscribe(MotionSubscriber())
+            bus.subscribe(TechnicalQualitySubscriber(self))
+            
+            loop = asyncio.get_event_loop()
+            visual_results, audio_features = await asyncio.gather(
+                loop.run_in_executor(self.executor, self._run_frame_bus, bus),
                 self._analyze_audio(video_path),
-                self._analyze_motion(video_path),
-                self._analyze_technical_quality(video_path)
-            ]
+                return_exceptions=True
+            )
             
-            results = await asyncio.gather(*tasks, return_exceptions=True)
+            if isinstance(visual_results, Exception):
+                raise visual_results
+            
+            def visual(name, default):
+                value = visual_results.get(name, default)
+                return default if isinstance(value, Exception) else value
             
             # Handle any exceptions in results
-            objects = results[0] if not isinstance(results[0], Exception) else []
-            emotions = results[1] if not isinstance(results[1], Exception) else []
-            scenes = results[2] if not isinstance(results[2], Exception) else []
-            audio_features = results[3] if not isinstance(results[3], Exception) else {}
-            motion_analysis = results[4] if not isinstance(results[4], Exception) else {}
-            technical_quality = results[5] if not isinstance(results[5], Exception) else {}
+            objects = visual('objects', [])
+            emotions = visual('emotions', [])
+            scenes = visual('scenes', [])
+            audio_features = audio_features if not isinstance(audio_features, Exception) else {}
+            motion_analysis = visual('motion', {})
+            technical_quality = visual('technical_quality', {})
             
             # Analyze sentiment from filename and detected content
             sentiment = await self._analyze_sentiment(video_path, scenes, emotions)
@@ -159,305 +469,45 @@ class RealAIService:
             logger.error(f"Comprehensive analysis failed: {e}")
             return self._fallback_analysis(video_path)
     
-    async def _analyze_objects(self, video_path: str) -> List[Dict[str, Any]]:
-        """Real object detection using MediaPipe and OpenCV"""
-        def detect_objects():
-            try:
-                cap = cv2.VideoCapture(video_path)
-                objects_detected = {}
-                frame_count = 0
-                sample_rate = 30  # Sample every 30 frames
-                
-                while cap.isOpened() and frame_count < 300:  # Limit analysis
-                    ret, frame = cap.read()
-                    if not ret:
-                        break
-                    
-                    if frame_count % sample_rate == 0:
-                        # Convert BGR to RGB
-                        rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                        
-                        # Face detection
-                        results = self.face_detection.process(rgb_frame)
-                        if results.detections:
-                            objects_detected['face'] = objects_detected.get('face', 0) + len(results.detections)
-                        
-                        # Pose detection (indicates person)
-                        pose_results = self.pose.process(rgb_frame)
-                        if pose_results.pose_landmarks:
-                            objects_detected['person'] = objects_detected.get('person', 0) + 1
-                        
-                        # Basic color analysis for scene detection
-                        hsv = cv2.cvtColor(frame, cv2.COLOR_BGR2HSV)
-                        
-                        # Detect dominant colors
-                        hist = cv2.calcHist([hsv], [0], None, [180], [0, 180])
-                        dominant_hue = np.argmax(hist)
-                        
-                        if 35 < dominant_hue < 85:  # Green range
-                            objects_detected['nature/vegetation'] = objects_detected.get('nature/vegetation', 0) + 1
-                        elif 100 < dominant_hue < 130:  # Blue range
-                            objects_detected['sky/water'] = objects_detected.get('sky/water', 0) + 1
-                    
-                    frame_count += 1
-                
-                cap.release()
-                
-                # Convert to required format
-                return [
-                    {
-                        'object': obj_name,
-                        'confidence': min(0.95, 0.6 + (count / 100)),
-                        'count': count,
-                        'timestamp': f"0:{(i*10)%60:02d}"
-                    }
-                    for i, (obj_name, count) in enumerate(objects_detected.items())
-                ]
-                
-            except Exception as e:
-                logger.error(f"Object detection failed: {e}")
-                return []
-        
-        return await asyncio.get_event_loop().run_in_executor(self.executor, detect_objects)
-    
-    async def _analyze_emotions(self, video_path: str) -> List[Dict[str, Any]]:
-        """Real emotion detection using FER"""
-        def detect_emotions():
-            try:
-                cap = cv2.VideoCapture(video_path)
-                emotions_timeline = []
-                frame_count = 0
-                sample_rate = 60  # Sample every 60 frames (2 seconds at 30fps)
-                
-                while cap.isOpened() and frame_count < 900:  # Limit analysis
-                    ret, frame = cap.read()
-                    if not ret:
-                        break
-                    
-                    if frame_count % sample_rate == 0:
-                        # Detect emotions in frame
-                        result = self.emotion_detector.detect_emotions(frame)
-                        
-                        if result:
-                            for face_emotions in result:
-                                emotions = face_emotions['emotions']
-                                dominant_emotion = max(emotions, key=emotions.get)
-                                confidence = emotions[dominant_emotion]
-                                
-                                timestamp = frame_count / 30.0  # Assuming 30fps
-                                emotions_timeline.append({
-                                    'emotion': dominant_emotion.capitalize(),
-                                    'confidence': confidence,
-                                    'timestamp': f"{int(timestamp//60)}:{int(timestamp%60):02d}",
-                                    'all_emotions': emotions
-                                })
-                    
-                    frame_count += 1
-                
-                cap.release()
-                return emotions_timeline
-                
-            except Exception as e:
-                logger.error(f"Emotion detection failed: {e}")
-                return []
-        
-        return await asyncio.get_event_loop().run_in_executor(self.executor, detect_emotions)
-    
     async def _analyze_audio(self, video_path: str) -> Dict[str, Any]:
         """Real audio analysis using librosa"""
         def analyze_audio():
             try:
-                # Extract audio from video
-                video = VideoFileClip(video_path)
-                with tempfile.NamedTemporaryFile(suffix='.wav', delete=False) as temp_audio:
-                    video.audio.write_audiofile(temp_audio.name, verbose=False, logger=None)
-                    
-                    # Load audio with librosa
-                    y, sr = librosa.load(temp_audio.name)
-                    
-                    # Extract features
-                    tempo, beats = librosa.beat.beat_track(y=y, sr=sr)
-                    spectral_centroids = librosa.feature.spectral_centroid(y=y, sr=sr)[0]
-                    spectral_rolloff = librosa.feature.spectral_rolloff(y=y, sr=sr)[0]
-                    mfccs = librosa.feature.mfcc(y=y, sr=sr, n_mfcc=13)
-                    zero_crossing_rate = librosa.feature.zero_crossing_rate(y)[0]
-                    
-                    # Analyze energy and dynamics
-                    rms_energy = librosa.feature.rms(y=y)[0]
-                    
-                    # Detect music characteristics
-                    onset_frames = librosa.onset.onset_detect(y=y, sr=sr)
-                    onset_times = librosa.frames_to_time(onset_frames, sr=sr)
-                    
-                    # Cleanup
-                    os.unlink(temp_audio.name)
-                    video.close()
-                    
-                    return {
-                        'tempo': float(tempo),
-                        'spectral_centroid_mean': float(np.mean(spectral_centroids)),
-                        'spectral_rolloff_mean': float(np.mean(spectral_rolloff)),
-                        'energy_mean': float(np.mean(rms_energy)),
-                        'energy_var': float(np.var(rms_energy)),
-                        'zero_crossing_rate_mean': float(np.mean(zero_crossing_rate)),
-                        'onset_density': len(onset_times) / len(y) * sr,
-                        'duration': float(len(y) / sr),
-                        'has_music': tempo > 60 and np.mean(spectral_centroids) > 1000,
-                        'is_speech_heavy': np.mean(zero_crossing_rate) > 0.1,
-                        'dynamic_range': float(np.max(rms_energy) - np.min(rms_energy))
-                    }
-                    
-            except Exception as e:
-                logger.error(f"Audio analysis failed: {e}")
-                return {}
-        
-        return await asyncio.get_event_loop().run_in_executor(self.executor, analyze_audio)
-    
-    async def _analyze_motion(self, video_path: str) -> Dict[str, Any]:
-        """Real motion analysis using optical flow"""
-        def analyze_motion():
-            try:
-                cap = cv2.VideoCapture(video_path)
-                
-                # Read first frame
-                ret, old_frame = cap.read()
-                if not ret:
-                    return {}
+                # Decode the video's audio track once through the shared PCM cache
+                y, sr = load_audio(video_path, 22050)
                 
-                old_gray = cv2.cvtColor(old_frame, cv2.COLOR_BGR2GRAY)
+                # Extract features from one shared STFT
+                plane = AudioFeaturePlane(y, sr)
+                tempo, beats = plane.beat_track()
+                spectral_centroids = plane.spectral_centroid()
+                spectral_rolloff = plane.spectral_rolloff()
+                zero_crossing_rate = plane.zero_crossing_rate()
                 
-                motion_magnitudes = []
-                frame_count = 0
-                sample_rate = 15
+                # Analyze energy and dynamics
+                rms_energy = plane.rms()
                 
-                while cap.isOpened() and frame_count < 450:  # Limit analysis
-                    ret, frame = cap.read()
-                    if not ret:
-                        break
-                    
-                    if frame_count % sample_rate == 0:
-                        frame_gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-                        
-                        # Calculate optical flow
-                        flow = cv2.calcOpticalFlowPyrLK(
-                            old_gray, frame_gray, None, None
-                        )[0]
-                        
-                        if flow is not None:
-                            # Calculate motion magnitude
-                            magnitude = np.sqrt(flow[:, :, 0]**2 + flow[:, :, 1]**2)
-                            motion_magnitudes.append(np.mean(magnitude))
-                        
-                        old_gray = frame_gray.copy()
-                    
-                    frame_count += 1
+                # Detect music characteristics
+                onset_times = plane.onset_times()
                 
-                cap.release()
+                return {
+                    'tempo': float(tempo),
+                    'spectral_centroid_mean': float(np.mean(spectral_centroids)),
+                    'spectral_rolloff_mean': float(np.mean(spectral_rolloff)),
+                    'energy_mean': float(np.mean(rms_energy)),
+                    'energy_var': float(np.var(rms_energy)),
+                    'zero_crossing_rate_mean': float(np.mean(zero_crossing_rate)),
+                    'onset_density': len(onset_times) / len(y) * sr,
+                    'duration': float(len(y) / sr),
+                    'has_music': tempo > 60 and np.mean(spectral_centroids) > 1000,
+                    'is_speech_heavy': np.mean(zero_crossing_rate) > 0.1,
+                    'dynamic_range': float(np.max(rms_energy) - np.min(rms_energy))
+                }
                 
-                if motion_magnitudes:
-                    return {
-                        'average_motion': float(np.mean(motion_magnitudes)),
-                        'motion_variance': float(np.var(motion_magnitudes)),
-                        'max_motion': float(np.max(motion_magnitudes)),
-                        'motion_type': 'high' if np.mean(motion_magnitudes) > 5 else 
-                                     'medium' if np.mean(motion_magnitudes) > 2 else 'low',
-                        'camera_stability': 'stable' if np.var(motion_magnitudes) < 2 else 'unstable'
-                    }
-                else:
-                    return {}
-                    
             except Exception as e:
-                logger.error(f"Motion analysis failed: {e}")
+                logger.error(f"Audio analysis failed: {e}")
                 return {}
         
-        return await asyncio.get_event_loop().run_in_executor(self.executor, analyze_motion)
-    
-    async def _analyze_scenes(self, video_path: str) -> List[Dict[str, Any]]:
-        """Real scene analysis using color histograms and transitions"""
-        def analyze_scenes():
-            try:
-                cap = cv2.VideoCapture(video_path)
-                scenes = []
-                prev_hist = None
-                frame_count = 0
-                sample_rate = 45
-                scene_changes = []
-                
-                while cap.isOpened() and frame_count < 600:
-                    ret, frame = cap.read()
-                    if not ret:
-                        break
-                    
-                    if frame_count % sample_rate == 0:
-                        # Calculate color histogram
-                        hist = cv2.calcHist([frame], [0, 1, 2], None, [50, 50, 50], [0, 256, 0, 256, 0, 256])
-                        
-                        if prev_hist is not None:
-                            # Compare histograms to detect scene changes
-                            correlation = cv2.compareHist(hist, prev_hist, cv2.HISTCMP_CORREL)
-                            
-                            if correlation < 0.8:  # Significant change
-                                timestamp = frame_count / 30.0
-                                scene_changes.append(timestamp)
-                        
-                        prev_hist = hist
-                    
-                    frame_count += 1
-                
-                cap.release()
-                
-                # Analyze scene characteristics
-                cap = cv2.VideoCapture(video_path)
-                scene_types = {}
-                frame_count = 0
-                
-                while cap.isOpened() and frame_count < 300:
-                    ret, frame = cap.read()
-                    if not ret:
-                        break
-                    
-                    if frame_count % 60 == 0:
-                        # Analyze frame characteristics
-                        hsv = cv2.cvtColor(frame, cv2.COLOR_BGR2HSV)
-                        
-                        # Calculate brightness
-                        brightness = np.mean(cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY))
-                        
-                        # Analyze color distribution
-                        h_hist = cv2.calcHist([hsv], [0], None, [180], [0, 180])
-                        s_hist = cv2.calcHist([hsv], [1], None, [256], [0, 256])
-                        
-                        # Classify scene type
-                        if brightness > 200:
-                            scene_types['bright/outdoor'] = scene_types.get('bright/outdoor', 0) + 1
-                        elif brightness < 80:
-                            scene_types['dark/indoor'] = scene_types.get('dark/indoor', 0) + 1
-                        else:
-                            scene_types['medium_light'] = scene_types.get('medium_light', 0) + 1
-                        
-                        # Check for nature (green dominance)
-                        if np.argmax(h_hist[35:85]) + 35 > 0:
-                            scene_types['nature'] = scene_types.get('nature', 0) + 1
-                    
-                    frame_count += 1
-                
-                cap.release()
-                
-                return [
-                    {
-                        'scene': scene_type,
-                        'confidence': min(0.95, 0.5 + (count / 20)),
-                        'duration': f"0:{(i*15)%60:02d}",
-                        'type': 'Primary' if count > 5 else 'Secondary'
-                    }
-                    for i, (scene_type, count) in enumerate(scene_types.items())
-                ]
-                
-            except Exception as e:
-                logger.error(f"Scene analysis failed: {e}")
-                return []
-        
-        return await asyncio.get_event_loop().run_in_executor(self.executor, analyze_scenes)
+        return await asyncio.get_event_loop().run_in_executor(self.executor, analyze_audio)
     
     async def _analyze_sentiment(self, video_path: str, scenes: List, emotions: List) -> Dict[str, Any]:
         """Analyze overall sentiment using multiple inputs"""
@@ -469,7 +519,10 @@ class RealAIService:
             filename_clean = filename.replace('_', ' ').replace('-', ' ').replace('.mp4', '')
             
             if filename_clean:
-                sentiment_result = self.sentiment_analyzer(filename_clean)[0]
+                # A first load (or reload after eviction) takes seconds; keep it off the event loop
+                sentiment_result = await asyncio.get_event_loop().run_in_executor(
+                    self.executor, self._classify_sentiment, filename_clean
+                )
                 filename_sentiment = sentiment_result['label']
                 filename_confidence = sentiment_result['score']
             else:
@@ -548,69 +601,6 @@ class RealAIService:
         }
         return recommendations.get(sentiment, recommendations['NEUTRAL'])
     
-    async def _analyze_technical_quality(self, video_path: str) -> Dict[str, Any]:
-        """Analyze technical quality of the video"""
-        def analyze_quality():
-            try:
-                cap = cv2.VideoCapture(video_path)
-                
-                # Get video properties
-                width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
-                height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
-                fps = cap.get(cv2.CAP_PROP_FPS)
-                total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
-                
-                # Analyze frame quality
-                blur_scores = []
-                noise_levels = []
-                frame_count = 0
-                sample_rate = 30
-                
-                while cap.isOpened() and frame_count < 300:
-                    ret, frame = cap.read()
-                    if not ret:
-                        break
-                    
-                    if frame_count % sample_rate == 0:
-                        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-                        
-                        # Calculate blur (Laplacian variance)
-                        blur_score = cv2.Laplacian(gray, cv2.CV_64F).var()
-                        blur_scores.append(blur_score)
-                        
-                        # Estimate noise level
-                        noise_level = np.std(gray)
-                        noise_levels.append(noise_level)
-                    
-                    frame_count += 1
-                
-                cap.release()
-                
-                # Calculate quality metrics
-                avg_blur = np.mean(blur_scores) if blur_scores else 0
-                avg_noise = np.mean(noise_levels) if noise_levels else 0
-                
-                # Quality assessment
-                quality_score = min(100, max(0, (avg_blur / 100) * 50 + (1 - avg_noise / 255) * 50))
-                
-                return {
-                    'resolution': f"{width}x{height}",
-                    'fps': float(fps),
-                    'total_frames': total_frames,
-                    'duration_seconds': total_frames / fps if fps > 0 else 0,
-                    'blur_score': float(avg_blur),
-                    'noise_level': float(avg_noise),
-                    'quality_score': float(quality_score),
-                    'quality_rating': 'High' if quality_score > 70 else 'Medium' if quality_score > 40 else 'Low',
-                    'recommendations': self._get_quality_recommendations(quality_score, avg_blur, avg_noise)
-                }
-                
-            except Exception as e:
-                logger.error(f"Quality analysis failed: {e}")
-                return {}
-        
-        return await asyncio.get_event_loop().run_in_executor(self.executor, analyze_quality)
-    
     def _get_quality_recommendations(self, quality_score: float, blur: float, noise: float) -> List[str]:
         """Generate quality improvement recommendations"""
         recommendations = []
@@ -672,12 +662,28 @@ class RealAIService:
             }
         )
 
-# Global AI service instance
-ai_service = RealAIService()
+# Global AI service instance, created on first use so importing this module stays cheap
+_ai_service: Optional[RealAIService] = None
+_ai_service_lock = threading.Lock()
+
+def get_ai_service() -> RealAIService:
+    """Return the shared AI service, creating it on first use"""
+    global _ai_service
+    if _ai_service is None:
+        with _ai_service_lock:
+            if _ai_service is None:
+                _ai_service = RealAIService()
+    return _ai_service
+
+def __getattr__(name: str):
+    # Keep `ai_services.ai_service` working for existing callers
+    if name == "ai_service":
+        return get_ai_service()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 async def get_ai_analysis(video_path: str) -> VideoAnalysisResult:
     """Get comprehensive AI analysis for a video"""
-    return await ai_service.analyze_video_comprehensive(video_path)
+    return await get_ai_service().analyze_video_comprehensive(video_path)
 
 async def generate_ai_recommendations(analysis: VideoAnalysisResult, video_duration: float) -> List[AIRecommendation]:
     """Generate AI-powered editing recommendations"""
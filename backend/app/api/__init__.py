@@ -1 +1,7 @@
 # API modules
+from ..core.config import settings
+from ..core.lazy_imports import start_warmup
+
+if settings.WARMUP_MODELS:
+    # Import heavy model stacks in the background so the server can bind its port immediately
+    start_warmup()
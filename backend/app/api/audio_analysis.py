@@ -1,78 +1,79 @@
 """
 Audio Analysis API using HuggingFace models and Librosa
 """
+import json
 import os
-import librosa
+import tempfile
 import numpy as np
-import whisper
 from datetime import datetime, timedelta
 from typing import List, Dict, Any, Optional
-import torch
 
 from fastapi import APIRouter, HTTPException
-from fastapi.responses import JSONResponse
-from transformers import pipeline, Wav2Vec2Processor, Wav2Vec2ForCTC
+from fastapi.responses import JSONResponse, StreamingResponse
 
 from ..core.config import settings
+from ..core.executors import thread_executor
+from ..core.lazy_imports import lazy_import
 from ..core.logging_config import get_logger
+from ..core.model_registry import model_registry
+from ..services.analysis_cache import analysis_cache, has_errors
+from ..services.audio_cache import load_audio
+from ..services.media_metadata import MediaProbeError, media_metadata
+from ..services.segmentation import threshold_segments
+from ..services.transcription import stitch, transcribe_serial, transcription_engine
+from ..services.audio_features import (
+    HOP_LENGTH,
+    N_FFT,
+    RunningStats,
+    compute_frame_energies,
+    iter_frame_blocks,
+    magnitude_percentile,
+    stream_features,
+    track_beats
+)
+
+# Heavy stacks are imported on first use
+librosa = lazy_import("librosa")
+torch = lazy_import("torch")
+transformers = lazy_import("transformers")
 
 router = APIRouter()
 logger = get_logger("audio_analysis")
 
-# Global model cache
-audio_models = {}
+WAV2VEC2_MODEL_ID = "facebook/wav2vec2-base-960h"
 
+# Bump when analysis output changes so cached results are not reused
+AUDIO_ANALYSIS_VERSION = f"3:whisper-base:{WAV2VEC2_MODEL_ID}"
 
-def load_whisper_model(model_size: str = "base"):
-    """Load Whisper model for speech recognition"""
-    if f"whisper_{model_size}" not in audio_models:
-        try:
-            logger.info(f"Loading Whisper {model_size} model...")
-            model = whisper.load_model(model_size)
-            audio_models[f"whisper_{model_size}"] = model
-            logger.info(f"Whisper {model_size} model loaded successfully")
-        except Exception as e:
-            logger.error(f"Error loading Whisper model: {str(e)}")
-            raise
-    return audio_models[f"whisper_{model_size}"]
+
+def _load_wav2vec2() -> Dict[str, Any]:
+    processor = transformers.Wav2Vec2Processor.from_pretrained(WAV2VEC2_MODEL_ID)
+    model = transformers.Wav2Vec2ForCTC.from_pretrained(WAV2VEC2_MODEL_ID)
+    return {"processor": processor, "model": model}
 
 
 def load_wav2vec2_model():
-    """Load Wav2Vec2 model for speech recognition"""
-    if "wav2vec2" not in audio_models:
-        try:
-            logger.info("Loading Wav2Vec2 model...")
-            processor = Wav2Vec2Processor.from_pretrained("facebook/wav2vec2-base-960h")
-            model = Wav2Vec2ForCTC.from_pretrained("facebook/wav2vec2-base-960h")
-            audio_models["wav2vec2"] = {"processor": processor, "model": model}
-            logger.info("Wav2Vec2 model loaded successfully")
-        except Exception as e:
-            logger.error(f"Error loading Wav2Vec2 model: {str(e)}")
-            # Fallback to Whisper
-            audio_models["wav2vec2"] = None
-    return audio_models["wav2vec2"]
+    """Load Wav2Vec2 model for speech recognition, shared through the model registry"""
+    try:
+        return model_registry.get(WAV2VEC2_MODEL_ID, _load_wav2vec2)
+    except Exception as e:
+        logger.error(f"Error loading Wav2Vec2 model: {str(e)}")
+        # Fallback to Whisper
+        return None
 
 
 def load_speaker_diarization_model():
     """Load speaker diarization model"""
-    if "speaker_diarization" not in audio_models:
-        try:
-            logger.info("Loading speaker diarization model...")
-            # Using pyannote.audio for speaker diarization
-            # Note: This requires additional setup and authentication
-            audio_models["speaker_diarization"] = None  # Placeholder
-            logger.info("Speaker diarization model loaded")
-        except Exception as e:
-            logger.error(f"Error loading speaker diarization model: {str(e)}")
-            audio_models["speaker_diarization"] = None
-    return audio_models["speaker_diarization"]
+    # Using pyannote.audio for speaker diarization
+    # Note: This requires additional setup and authentication
+    return None  # Placeholder
 
 
 def extract_audio_features(audio_path: str, sr: int = 22050) -> Dict:
     """Extract comprehensive audio features"""
     try:
         # Load audio file
-        y, sr = librosa.load(audio_path, sr=sr)
+        y, sr = load_audio(audio_path, sr)
         duration = len(y) / sr
         
         # Basic features
@@ -82,53 +83,57 @@ def extract_audio_features(audio_path: str, sr: int = 22050) -> Dict:
             "total_samples": len(y)
         }
         
+        # Descriptors are computed one block at a time and merged, so memory
+        # stays flat for multi-hour recordings
+        stats, onset_envelope = stream_features(y, sr, settings.AUDIO_STREAM_BLOCK_SECONDS, n_mfcc=13)
+        
         # Spectral features
-        spectral_centroids = librosa.feature.spectral_centroid(y=y, sr=sr)[0]
+        spectral_centroids = stats["spectral_centroid"]
         features["spectral_centroid"] = {
-            "mean": float(np.mean(spectral_centroids)),
-            "std": float(np.std(spectral_centroids)),
-            "min": float(np.min(spectral_centroids)),
-            "max": float(np.max(spectral_centroids))
+            "mean": float(spectral_centroids.mean),
+            "std": float(spectral_centroids.std),
+            "min": float(spectral_centroids.min),
+            "max": float(spectral_centroids.max)
         }
         
         # Spectral rolloff
-        spectral_rolloff = librosa.feature.spectral_rolloff(y=y, sr=sr)[0]
+        spectral_rolloff = stats["spectral_rolloff"]
         features["spectral_rolloff"] = {
-            "mean": float(np.mean(spectral_rolloff)),
-            "std": float(np.std(spectral_rolloff))
+            "mean": float(spectral_rolloff.mean),
+            "std": float(spectral_rolloff.std)
         }
         
         # Zero crossing rate
-        zcr = librosa.feature.zero_crossing_rate(y)[0]
+        zcr = stats["zero_crossing_rate"]
         features["zero_crossing_rate"] = {
-            "mean": float(np.mean(zcr)),
-            "std": float(np.std(zcr))
+            "mean": float(zcr.mean),
+            "std": float(zcr.std)
         }
         
         # MFCCs (Mel-frequency cepstral coefficients)
-        mfccs = librosa.feature.mfcc(y=y, sr=sr, n_mfcc=13)
+        mfccs = stats["mfccs"]
         features["mfccs"] = {
             f"mfcc_{i}": {
-                "mean": float(np.mean(mfccs[i])),
-                "std": float(np.std(mfccs[i]))
+                "mean": float(mfccs.mean[i]),
+                "std": float(mfccs.std[i])
             }
             for i in range(13)
         }
         
         # Chroma features
-        chroma = librosa.feature.chroma(y=y, sr=sr)
+        chroma = stats["chroma"]
         features["chroma"] = {
-            "mean": float(np.mean(chroma)),
-            "std": float(np.std(chroma))
+            "mean": float(chroma.mean),
+            "std": float(chroma.std)
         }
         
-        # Tempo and beat tracking
+        # Tempo and beat tracking over the whole onset envelope
         try:
-            tempo, beats = librosa.beat.beat_track(y=y, sr=sr)
-            features["tempo"] = float(tempo)
+            tempo, beats = track_beats(onset_envelope, sr)
+            features["tempo"] = tempo
             features["beats"] = {
                 "count": len(beats),
-                "intervals": [float(beat / sr) for beat in beats[:10]]  # First 10 beats
+                "intervals": [float(beat / sr) for beat in beats[:10]]  # First 10 beats, in seconds
             }
         except Exception as e:
             logger.warning(f"Error extracting tempo: {str(e)}")
@@ -136,18 +141,18 @@ def extract_audio_features(audio_path: str, sr: int = 22050) -> Dict:
             features["beats"] = {"count": 0, "intervals": []}
         
         # RMS Energy
-        rms = librosa.feature.rms(y=y)[0]
+        rms = stats["rms_energy"]
         features["rms_energy"] = {
-            "mean": float(np.mean(rms)),
-            "std": float(np.std(rms)),
-            "max": float(np.max(rms))
+            "mean": float(rms.mean),
+            "std": float(rms.std),
+            "max": float(rms.max)
         }
         
         # Spectral bandwidth
-        spectral_bandwidth = librosa.feature.spectral_bandwidth(y=y, sr=sr)[0]
+        spectral_bandwidth = stats["spectral_bandwidth"]
         features["spectral_bandwidth"] = {
-            "mean": float(np.mean(spectral_bandwidth)),
-            "std": float(np.std(spectral_bandwidth))
+            "mean": float(spectral_bandwidth.mean),
+            "std": float(spectral_bandwidth.std)
         }
         
         return features
@@ -158,30 +163,15 @@ def extract_audio_features(audio_path: str, sr: int = 22050) -> Dict:
 
 
 def transcribe_audio_whisper(audio_path: str, model_size: str = "base") -> Dict:
-    """Transcribe audio using Whisper"""
+    """
+    Transcribe audio using Whisper, chunk by chunk in the calling thread
+    
+    Used as the fallback inside other blocking work; request handlers await
+    transcription_engine, which runs the chunks in parallel.
+    """
     try:
-        model = load_whisper_model(model_size)
-        
         logger.info(f"Transcribing audio with Whisper {model_size}...")
-        result = model.transcribe(audio_path)
-        
-        # Process segments
-        segments = []
-        for segment in result.get("segments", []):
-            segments.append({
-                "start": segment["start"],
-                "end": segment["end"],
-                "text": segment["text"].strip(),
-                "confidence": segment.get("no_speech_prob", 0.0)
-            })
-        
-        return {
-            "text": result["text"],
-            "language": result.get("language", "unknown"),
-            "segments": segments,
-            "word_count": len(result["text"].split()),
-            "duration": segments[-1]["end"] if segments else 0
-        }
+        return transcribe_serial(audio_path, model_size)
         
     except Exception as e:
         logger.error(f"Error transcribing audio with Whisper: {str(e)}")
@@ -201,7 +191,7 @@ def transcribe_audio_wav2vec2(audio_path: str) -> Dict:
         model = model_data["model"]
         
         # Load and preprocess audio
-        audio, sr = librosa.load(audio_path, sr=16000)
+        audio, sr = load_audio(audio_path, 16000)
         
         # Process audio in chunks (Wav2Vec2 has input length limitations)
         chunk_duration = 30  # seconds
@@ -253,15 +243,15 @@ def analyze_speech_quality(audio_path: str) -> Dict:
     """Analyze speech quality metrics"""
     try:
         # Load audio
-        y, sr = librosa.load(audio_path, sr=22050)
+        y, sr = load_audio(audio_path, 22050)
         
         # Voice Activity Detection (simple energy-based)
         frame_length = int(0.025 * sr)  # 25ms frames
         hop_length = int(0.010 * sr)    # 10ms hop
         
-        # Calculate frame energy
-        frames = librosa.util.frame(y, frame_length=frame_length, hop_length=hop_length)
-        frame_energies = np.sum(frames ** 2, axis=0)
+        # Calculate frame energy, a block at a time
+        block_frames = max(settings.AUDIO_STREAM_BLOCK_SECONDS * sr // hop_length, 1)
+        frame_energies = compute_frame_energies(y, frame_length, hop_length, block_frames)
         
         # Threshold for voice activity (adaptive)
         energy_threshold = np.percentile(frame_energies, 30)
@@ -279,23 +269,24 @@ def analyze_speech_quality(audio_path: str) -> Dict:
         else:
             snr = float('inf')
         
-        # Pitch analysis
+        # Pitch analysis, merged across blocks
         try:
-            pitches, magnitudes = librosa.piptrack(y=y, sr=sr)
-            pitch_values = []
-            
-            for t in range(pitches.shape[1]):
-                index = magnitudes[:, t].argmax()
-                pitch = pitches[index, t]
-                if pitch > 0:
-                    pitch_values.append(pitch)
+            pitch_values = RunningStats()
+            pitch_block_frames = max(settings.AUDIO_STREAM_BLOCK_SECONDS * sr // HOP_LENGTH, 1)
+            for _, _, samples in iter_frame_blocks(y, N_FFT, HOP_LENGTH, pitch_block_frames):
+                pitches, magnitudes = librosa.piptrack(y=samples, sr=sr, center=False)
+                
+                # Pitch of the strongest bin in every frame
+                strongest = magnitudes.argmax(axis=0)
+                block_pitches = pitches[strongest, np.arange(pitches.shape[1])]
+                pitch_values.update(block_pitches[block_pitches > 0])
             
-            if pitch_values:
+            if pitch_values.count:
                 pitch_stats = {
-                    "mean": float(np.mean(pitch_values)),
-                    "std": float(np.std(pitch_values)),
-                    "min": float(np.min(pitch_values)),
-                    "max": float(np.max(pitch_values))
+                    "mean": float(pitch_values.mean),
+                    "std": float(pitch_values.std),
+                    "min": float(pitch_values.min),
+                    "max": float(pitch_values.max)
                 }
             else:
                 pitch_stats = {"mean": 0, "std": 0, "min": 0, "max": 0}
@@ -318,57 +309,49 @@ def analyze_speech_quality(audio_path: str) -> Dict:
         raise
 
 
-def detect_silence_and_pauses(audio_path: str, silence_threshold: float = 0.01) -> List[Dict]:
-    """Detect silence and pause segments in audio"""
+def detect_silence_and_pauses(
+    audio_path: str,
+    silence_threshold: float = 0.01,
+    release_threshold: Optional[float] = None,
+    min_duration: float = 0.1
+) -> List[Dict]:
+    """
+    Detect silence and pause segments in audio
+    
+    A silence starts where RMS drops below silence_threshold and, when
+    release_threshold is given, lasts until RMS rises above it. Segments not
+    longer than min_duration are ignored.
+    """
     try:
         # Load audio
-        y, sr = librosa.load(audio_path, sr=22050)
+        y, sr = load_audio(audio_path, 22050)
         
         # Calculate RMS energy
         frame_length = int(0.025 * sr)  # 25ms
         hop_length = int(0.010 * sr)    # 10ms
         
-        rms = librosa.feature.rms(y=y, frame_length=frame_length, hop_length=hop_length)[0]
-        
-        # Detect silence frames
-        silence_frames = rms < silence_threshold
+        # Centered frames, like librosa.feature.rms, computed a block at a time
+        block_frames = max(settings.AUDIO_STREAM_BLOCK_SECONDS * sr // hop_length, 1)
+        rms = np.sqrt(compute_frame_energies(y, frame_length, hop_length, block_frames, center=True) / frame_length)
         
         # Find silence segments
-        silence_segments = []
-        in_silence = False
-        silence_start = 0
-        
-        for i, is_silent in enumerate(silence_frames):
-            time = i * hop_length / sr
-            
-            if is_silent and not in_silence:
-                # Start of silence
-                in_silence = True
-                silence_start = time
-            elif not is_silent and in_silence:
-                # End of silence
-                in_silence = False
-                duration = time - silence_start
-                
-                if duration > 0.1:  # Only include silences longer than 100ms
-                    silence_segments.append({
-                        "start": silence_start,
-                        "end": time,
-                        "duration": duration,
-                        "type": "pause" if duration < 2.0 else "silence"
-                    })
-        
-        # Handle case where audio ends in silence
-        if in_silence:
-            final_time = len(y) / sr
-            duration = final_time - silence_start
-            if duration > 0.1:
-                silence_segments.append({
-                    "start": silence_start,
-                    "end": final_time,
-                    "duration": duration,
-                    "type": "pause" if duration < 2.0 else "silence"
-                })
+        segments = threshold_segments(
+            rms,
+            hop_length / sr,
+            silence_threshold,
+            exit=release_threshold,
+            min_duration=min_duration,
+            end_time=len(y) / sr  # Audio may end in silence
+        )
+        silence_segments = [
+            {
+                "start": float(start),
+                "end": float(end),
+                "duration": float(end - start),
+                "type": "pause" if end - start < 2.0 else "silence"
+            }
+            for start, end in segments
+        ]
         
         return silence_segments
         
@@ -377,6 +360,66 @@ def detect_silence_and_pauses(audio_path: str, silence_threshold: float = 0.01)
         return []
 
 
+def _native_sample_rate(audio_path: str) -> int:
+    """Sample rate of the file's first audio stream, or the canonical rate when unknown"""
+    try:
+        sample_rate = media_metadata.get(audio_path)["audio"].get("sample_rate")
+        return int(sample_rate) if sample_rate else settings.AUDIO_CANONICAL_RATE
+    except (MediaProbeError, OSError, ValueError) as e:
+        logger.warning(f"Could not read sample rate of {audio_path}: {str(e)}")
+        return settings.AUDIO_CANONICAL_RATE
+
+
+def enhance_audio_file(audio_path: str, output_path: str, noise_reduction: bool, normalize: bool) -> int:
+    """
+    Write a spectrally gated and/or peak-normalized copy of audio_path
+    
+    Works a block at a time: the noise floor comes from a histogram pass,
+    gated blocks are staged in a scratch file while the peak is tracked, and
+    the normalized result is streamed out. Returns the sample rate written.
+    """
+    import soundfile as sf
+    
+    y, sr = load_audio(audio_path, _native_sample_rate(audio_path))
+    block_frames = max(settings.AUDIO_STREAM_BLOCK_SECONDS * sr // HOP_LENGTH, 1)
+    block = block_frames * HOP_LENGTH
+    
+    # Estimate noise floor over the whole file
+    gate = magnitude_percentile(y, 10, block_frames) * 2 if noise_reduction else None
+    
+    os.makedirs(settings.TEMP_DIR, exist_ok=True)
+    with tempfile.TemporaryFile(dir=settings.TEMP_DIR) as scratch:
+        peak = 0.0
+        for start in range(0, len(y), block):
+            stop = min(start + block, len(y))
+            if gate is not None:
+                # Simple noise reduction using spectral gating; the N_FFT margin
+                # on each side makes block edges identical to gating the whole file
+                context_start = max(start - N_FFT, 0)
+                segment = np.asarray(y[context_start:min(stop + N_FFT, len(y))], dtype=np.float32)
+                stft = librosa.stft(segment, n_fft=N_FFT, hop_length=HOP_LENGTH)
+                stft[np.abs(stft) <= gate] = 0
+                enhanced = librosa.istft(stft, hop_length=HOP_LENGTH, length=len(segment))
+                enhanced = enhanced[start - context_start:stop - context_start].astype(np.float32)
+            else:
+                enhanced = np.asarray(y[start:stop], dtype=np.float32)
+            if len(enhanced):
+                peak = max(peak, float(np.max(np.abs(enhanced))))
+            scratch.write(enhanced.tobytes())
+        
+        # Normalize to [-1, 1] range
+        scale = 0.95 / peak if normalize and peak > 0 else 1.0
+        
+        scratch.seek(0)
+        with sf.SoundFile(output_path, mode="w", samplerate=sr, channels=1) as output:
+            while True:
+                chunk = np.frombuffer(scratch.read(block * 4), dtype=np.float32)
+                if not len(chunk):
+                    break
+                output.write(chunk * scale)
+    return sr
+
+
 @router.post("/analyze")
 async def analyze_audio_comprehensive(
     filename: str,
@@ -401,20 +444,35 @@ async def analyze_audio_comprehensive(
     if not os.path.exists(audio_path):
         raise HTTPException(status_code=404, detail="Audio file not found")
     
+    parameters = {
+        "transcribe": transcribe,
+        "extract_features": extract_features,
+        "quality_analysis": quality_analysis,
+        "silence_detection": silence_detection,
+        "model": model
+    }
+    
     try:
+        # Reuse a previous analysis of the same content with the same parameters
+        cached = analysis_cache.get(audio_path, "audio_analysis", parameters, AUDIO_ANALYSIS_VERSION)
+        if cached is not None:
+            cached["filename"] = filename
+            return JSONResponse(
+                status_code=200,
+                content={
+                    "message": "Audio analysis completed successfully",
+                    "data": cached,
+                    "cached": True
+                }
+            )
+        
         logger.info(f"Starting comprehensive audio analysis for: {filename}")
         start_time = datetime.now()
         
         results = {
             "filename": filename,
             "analysis_timestamp": start_time.isoformat(),
-            "parameters": {
-                "transcribe": transcribe,
-                "extract_features": extract_features,
-                "quality_analysis": quality_analysis,
-                "silence_detection": silence_detection,
-                "model": model
-            }
+            "parameters": parameters
         }
         
         # Transcription
@@ -422,11 +480,11 @@ async def analyze_audio_comprehensive(
             logger.info("Transcribing audio...")
             try:
                 if model == "whisper":
-                    transcription = transcribe_audio_whisper(audio_path)
+                    transcription = await transcription_engine.transcribe(audio_path)
                 elif model == "wav2vec2":
-                    transcription = transcribe_audio_wav2vec2(audio_path)
+                    transcription = await thread_executor.run(transcribe_audio_wav2vec2, audio_path)
                 else:
-                    transcription = transcribe_audio_whisper(audio_path)  # Default fallback
+                    transcription = await transcription_engine.transcribe(audio_path)  # Default fallback
                 
                 results["transcription"] = transcription
                 
@@ -438,7 +496,7 @@ async def analyze_audio_comprehensive(
         if extract_features:
             logger.info("Extracting audio features...")
             try:
-                features = extract_audio_features(audio_path)
+                features = await thread_executor.run(extract_audio_features, audio_path)
                 results["features"] = features
                 
             except Exception as e:
@@ -449,7 +507,7 @@ async def analyze_audio_comprehensive(
         if quality_analysis:
             logger.info("Analyzing speech quality...")
             try:
-                quality = analyze_speech_quality(audio_path)
+                quality = await thread_executor.run(analyze_speech_quality, audio_path)
                 results["quality"] = quality
                 
             except Exception as e:
@@ -460,7 +518,7 @@ async def analyze_audio_comprehensive(
         if silence_detection:
             logger.info("Detecting silence and pauses...")
             try:
-                silence_segments = detect_silence_and_pauses(audio_path)
+                silence_segments = await thread_executor.run(detect_silence_and_pauses, audio_path)
                 results["silence_analysis"] = {
                     "segments": silence_segments,
                     "total_silence_duration": sum(s["duration"] for s in silence_segments),
@@ -478,6 +536,8 @@ async def analyze_audio_comprehensive(
         results["processing_time"] = processing_time
         
         logger.info(f"Audio analysis completed in {processing_time:.2f}s")
+        if not has_errors(results):
+            analysis_cache.set(audio_path, "audio_analysis", results, parameters, AUDIO_ANALYSIS_VERSION)
         
         return JSONResponse(
             status_code=200,
@@ -515,9 +575,9 @@ async def transcribe_audio_endpoint(
         start_time = datetime.now()
         
         if model == "whisper":
-            transcription = transcribe_audio_whisper(audio_path, model_size)
+            transcription = await transcription_engine.transcribe(audio_path, model_size)
         elif model == "wav2vec2":
-            transcription = transcribe_audio_wav2vec2(audio_path)
+            transcription = await thread_executor.run(transcribe_audio_wav2vec2, audio_path)
         else:
             raise HTTPException(status_code=400, detail="Invalid model. Use 'whisper' or 'wav2vec2'")
         
@@ -543,6 +603,46 @@ async def transcribe_audio_endpoint(
         raise HTTPException(status_code=500, detail=f"Error transcribing audio: {str(e)}")
 
 
+@router.get("/transcribe/stream")
+async def stream_transcription(
+    filename: str,
+    model_size: str = "base",
+    language: Optional[str] = None
+):
+    """
+    Server-Sent Events stream of a Whisper transcription
+    
+    Emits a ``segments`` event per chunk as soon as it is transcribed (chunks
+    finish out of order; each carries its index and time range), then one
+    ``completed`` event with the stitched transcription, or ``failed``.
+    
+    - **filename**: Name of uploaded audio file
+    - **model_size**: Size of Whisper model ("tiny", "base", "small", "medium", "large")
+    - **language**: Spoken language code; detected per chunk when omitted
+    """
+    
+    audio_path = os.path.join(settings.UPLOAD_DIR, filename)
+    if not os.path.exists(audio_path):
+        raise HTTPException(status_code=404, detail="Audio file not found")
+    
+    async def sse():
+        events = []
+        try:
+            async for event in transcription_engine.stream(audio_path, model_size, language):
+                events.append(event)
+                yield f"event: segments\ndata: {json.dumps(event)}\n\n"
+            yield f"event: completed\ndata: {json.dumps(stitch(events))}\n\n"
+        except Exception as e:
+            logger.error(f"Error streaming transcription of {filename}: {str(e)}")
+            yield f"event: failed\ndata: {json.dumps({'detail': str(e)})}\n\n"
+    
+    return StreamingResponse(
+        sse(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
 @router.post("/quality")
 async def analyze_audio_quality(filename: str):
     """
@@ -558,7 +658,7 @@ async def analyze_audio_quality(filename: str):
     try:
         logger.info(f"Analyzing audio quality for: {filename}")
         
-        quality_metrics = analyze_speech_quality(audio_path)
+        quality_metrics = await thread_executor.run(analyze_speech_quality, audio_path)
         
         return JSONResponse(
             status_code=200,
@@ -600,48 +700,17 @@ async def enhance_audio(
     try:
         logger.info(f"Enhancing audio: {filename}")
         
-        # Load audio
-        y, sr = librosa.load(audio_path, sr=None)
-        
-        # Apply enhancements
-        enhanced_audio = y.copy()
-        
-        if noise_reduction:
-            # Simple noise reduction using spectral gating
-            stft = librosa.stft(enhanced_audio)
-            magnitude = np.abs(stft)
-            
-            # Estimate noise floor
-            noise_floor = np.percentile(magnitude, 10)
-            
-            # Apply spectral gating
-            mask = magnitude > (noise_floor * 2)
-            stft_clean = stft * mask
-            
-            enhanced_audio = librosa.istft(stft_clean)
-        
-        if normalize:
-            # Normalize to [-1, 1] range
-            max_val = np.max(np.abs(enhanced_audio))
-            if max_val > 0:
-                enhanced_audio = enhanced_audio / max_val * 0.95
-        
         # Save enhanced audio
         output_filename = f"enhanced_{filename}"
+        if output_format.lower() != "wav":
+            # For other formats, we'd need additional libraries like pydub
+            output_filename = output_filename.replace(f".{output_format}", ".wav")
         output_path = os.path.join(settings.PROCESSED_DIR, output_filename)
         
         # Ensure processed directory exists
         os.makedirs(settings.PROCESSED_DIR, exist_ok=True)
         
-        # Save based on format
-        if output_format.lower() == "wav":
-            import soundfile as sf
-            sf.write(output_path, enhanced_audio, sr)
-        else:
-            # For other formats, we'd need additional libraries like pydub
-            import soundfile as sf
-            sf.write(output_path.replace(f".{output_format}", ".wav"), enhanced_audio, sr)
-            output_filename = output_filename.replace(f".{output_format}", ".wav")
+        await thread_executor.run(enhance_audio_file, audio_path, output_path, noise_reduction, normalize)
         
         return JSONResponse(
             status_code=200,
@@ -5,57 +5,53 @@ import os
 import cv2
 import numpy as np
 from datetime import datetime
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Callable
 from pathlib import Path
 import base64
 from io import BytesIO
 
-from fastapi import APIRouter, HTTPException, BackgroundTasks
+from fastapi import APIRouter, HTTPException
 from fastapi.responses import JSONResponse
 from PIL import Image
-import torch
 
 from ..core.config import settings
 from ..core.logging_config import get_logger
+from ..core.model_registry import model_registry
+from ..services.job_queue import JobCancelled, enqueue, list_jobs
+from ..services.media_metadata import media_metadata
 
 router = APIRouter()
 logger = get_logger("background_removal")
 
-# Global model cache
-bg_removal_models = {}
+def _load_rembg_session(model_name: str):
+    from rembg import new_session
+
+    return new_session(model_name)
+
+
+def _load_mediapipe_selfie():
+    import mediapipe as mp
+
+    mp_selfie_segmentation = mp.solutions.selfie_segmentation
+    return mp_selfie_segmentation.SelfieSegmentation(model_selection=1)
 
 
 def load_rembg_model(model_name: str = "u2net"):
-    """Load background removal model using rembg"""
-    if f"rembg_{model_name}" not in bg_removal_models:
-        try:
-            logger.info(f"Loading background removal model: {model_name}")
-            from rembg import remove, new_session
-            
-            session = new_session(model_name)
-            bg_removal_models[f"rembg_{model_name}"] = session
-            logger.info(f"Background removal model {model_name} loaded successfully")
-        except Exception as e:
-            logger.error(f"Error loading rembg model {model_name}: {str(e)}")
-            raise
-    return bg_removal_models[f"rembg_{model_name}"]
+    """Load background removal model using rembg, shared through the model registry"""
+    try:
+        return model_registry.get(f"rembg-{model_name}", lambda: _load_rembg_session(model_name))
+    except Exception as e:
+        logger.error(f"Error loading rembg model {model_name}: {str(e)}")
+        raise
 
 
 def load_mediapipe_selfie_model():
-    """Load MediaPipe selfie segmentation model"""
-    if "mediapipe_selfie" not in bg_removal_models:
-        try:
-            logger.info("Loading MediaPipe selfie segmentation model...")
-            import mediapipe as mp
-            
-            mp_selfie_segmentation = mp.solutions.selfie_segmentation
-            model = mp_selfie_segmentation.SelfieSegmentation(model_selection=1)
-            bg_removal_models["mediapipe_selfie"] = model
-            logger.info("MediaPipe selfie segmentation model loaded successfully")
-        except Exception as e:
-            logger.error(f"Error loading MediaPipe model: {str(e)}")
-            bg_removal_models["mediapipe_selfie"] = None
-    return bg_removal_models["mediapipe_selfie"]
+    """Load MediaPipe selfie segmentation model, shared through the model registry"""
+    try:
+        return model_registry.get("mediapipe-selfie-segmentation", _load_mediapipe_selfie)
+    except Exception as e:
+        logger.error(f"Error loading MediaPipe model: {str(e)}")
+        return None
 
 
 def remove_background_rembg(image: np.ndarray, model_name: str = "u2net") -> np.ndarray:
@@ -195,8 +191,9 @@ def create_blur_background(original_image: np.ndarray, blur_strength: int = 50)
 
 
 def process_video_background_removal(video_path: str, output_path: str, model_name: str = "u2net", 
-                                   background_type: str = "transparent", background_image: Optional[str] = None) -> Dict:
-    """Process entire video for background removal"""
+                                   background_type: str = "transparent", background_image: Optional[str] = None,
+                                   progress_callback: Optional[Callable[[float], None]] = None) -> Dict:
+    """Process entire video for background removal, reporting percentage progress to progress_callback"""
     try:
         logger.info(f"Starting video background removal: {video_path}")
         
@@ -207,10 +204,11 @@ def process_video_background_removal(video_path: str, output_path: str, model_na
             raise ValueError(f"Could not open video: {video_path}")
         
         # Get video properties
-        fps = cap.get(cv2.CAP_PROP_FPS)
-        width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
-        height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
-        total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        video_meta = media_metadata.get(video_path)["video"]
+        fps = video_meta["fps"]
+        width = video_meta["width"]
+        height = video_meta["height"]
+        total_frames = video_meta["frame_count"]
         
         # Setup video writer
         fourcc = cv2.VideoWriter_fourcc(*'mp4v')
@@ -268,11 +266,17 @@ def process_video_background_removal(video_path: str, output_path: str, model_na
                 out.write(final_frame)
                 processed_frames += 1
                 
-                # Log progress
+                # Report per-frame progress (the job reporter rate-limits events); log every 30 frames
+                progress = (processed_frames / total_frames) * 100 if total_frames > 0 else 0
+                if progress_callback:
+                    progress_callback(min(progress, 99.0), frame=processed_frames, total_frames=total_frames)
                 if processed_frames % 30 == 0:
-                    progress = (processed_frames / total_frames) * 100
                     logger.info(f"Processing progress: {progress:.1f}% ({processed_frames}/{total_frames})")
                 
+            except JobCancelled:
+                cap.release()
+                out.release()
+                raise
             except Exception as e:
                 logger.warning(f"Error processing frame {processed_frames}: {str(e)}")
                 # Write original frame if processing fails
@@ -464,19 +468,22 @@ async def replace_background(
 
 @router.post("/video")
 async def remove_background_from_video(
-    background_tasks: BackgroundTasks,
     filename: str,
     background_type: str = "transparent",
     background_image: Optional[str] = None,
-    model: str = "u2net"
+    model: str = "u2net",
+    priority: int = 0
 ):
     """
-    Remove background from video (background task)
+    Remove background from video (queued job)
     
     - **filename**: Name of uploaded video file
     - **background_type**: Type of background ("transparent", "gradient", "solid", "blur", "image")
     - **background_image**: Filename of background image
     - **model**: Background removal model
+    - **priority**: Job priority; higher runs first
+    
+    Follow progress on ``GET /jobs/{job_id}/events`` (SSE) or ``/jobs/{job_id}/ws``.
     """
     
     video_path = os.path.join(settings.UPLOAD_DIR, filename)
@@ -491,34 +498,38 @@ async def remove_background_from_video(
         # Ensure processed directory exists
         os.makedirs(settings.PROCESSED_DIR, exist_ok=True)
         
-        # Start background processing
-        background_tasks.add_task(
-            process_video_background_removal,
-            video_path,
-            output_path,
-            model,
-            background_type,
-            background_image
+        # Queue for the worker pool
+        job = enqueue(
+            "background_removal.video",
+            {
+                "video_path": video_path,
+                "output_path": output_path,
+                "model_name": model,
+                "background_type": background_type,
+                "background_image": background_image
+            },
+            priority=priority
         )
         
         return JSONResponse(
             status_code=202,
             content={
-                "message": "Video background removal started (processing in background)",
+                "message": "Video background removal queued",
                 "data": {
+                    "job_id": job["job_id"],
                     "original_filename": filename,
                     "output_filename": output_filename,
                     "output_path": output_path,
                     "background_type": background_type,
                     "model_used": model,
-                    "status": "processing",
+                    "status": job["status"],
                     "timestamp": datetime.now().isoformat()
                 }
             }
         )
         
     except Exception as e:
-        logger.error(f"Error starting video background removal for {filename}: {str(e)}")
+        logger.error(f"Error queueing video background removal for {filename}: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error starting video processing: {str(e)}")
 
 
@@ -587,10 +598,26 @@ async def get_processing_status(filename: str):
     output_filename = f"no_bg_{Path(filename).stem}.mp4"
     output_path = os.path.join(settings.PROCESSED_DIR, output_filename)
     
+    # Latest job writing this output, if the video went through the queue
+    job = next(
+        (job for job in list_jobs(task="background_removal.video", limit=200)
+         if job["payload"].get("output_path") == output_path),
+        None
+    )
+    
+    if job is not None and job["status"] != "completed":
+        return {
+            "status": "processing" if job["status"] in ("queued", "running") else job["status"],
+            "job_id": job["job_id"],
+            "progress": job["progress"],
+            "error_message": job["error_message"]
+        }
+    
     if os.path.exists(output_path):
         file_stat = os.stat(output_path)
         return {
             "status": "completed",
+            "job_id": job["job_id"] if job else None,
             "output_filename": output_filename,
             "output_path": output_path,
             "file_size": file_stat.st_size,
@@ -3,7 +3,6 @@ Emotion Detection API using HuggingFace models
 """
 import os
 import cv2
-import torch
 import numpy as np
 from datetime import datetime
 from typing import List, Dict, Any, Optional
@@ -11,83 +10,64 @@ from pathlib import Path
 
 from fastapi import APIRouter, HTTPException
 from fastapi.responses import JSONResponse
-from transformers import (
-    pipeline, AutoTokenizer, AutoModelForSequenceClassification,
-    AutoProcessor, AutoModel
-)
-import librosa
 
 from ..core.config import settings
+from ..core.executors import thread_executor
 from ..core.logging_config import get_logger
+from ..core.model_registry import model_registry
+from ..services.analysis_cache import analysis_cache, has_errors
+from ..services.audio_cache import load_audio
+from ..services.audio_features import AudioFeaturePlane
+from ..services.frame_sampler import FrameSampler, evenly_spaced_indices
+from ..services.model_loaders import load_pipeline, pipeline_id
 
 router = APIRouter()
 logger = get_logger("emotion_detection")
 
-# Global model cache
-emotion_models = {}
+TEXT_EMOTION_MODEL_ID = "cardiffnlp/twitter-roberta-base-emotion"
+AUDIO_EMOTION_MODEL_ID = "superb/wav2vec2-base-superb-er"
+FACIAL_EMOTION_MODEL_ID = "trpakov/vit-face-expression"
+
+# Bump when analysis output changes so cached results are not reused
+EMOTION_ANALYSIS_VERSION = f"2:{AUDIO_EMOTION_MODEL_ID}:{FACIAL_EMOTION_MODEL_ID}"
+
+
+def _registry_pipeline(task: str, model_id: Optional[str] = None):
+    return model_registry.get(pipeline_id(task, model_id), lambda: load_pipeline(task, model_id))
 
 
 def load_text_emotion_model():
     """Load text emotion classification model"""
-    if "text_emotion" not in emotion_models:
-        try:
-            logger.info("Loading text emotion model...")
-            emotion_pipeline = pipeline(
-                "text-classification",
-                model="cardiffnlp/twitter-roberta-base-emotion",
-                device=0 if settings.DEVICE == "cuda" else -1
-            )
-            emotion_models["text_emotion"] = emotion_pipeline
-            logger.info("Text emotion model loaded successfully")
-        except Exception as e:
-            logger.error(f"Error loading text emotion model: {str(e)}")
-            # Fallback to a simpler model
-            emotion_pipeline = pipeline("sentiment-analysis")
-            emotion_models["text_emotion"] = emotion_pipeline
-    return emotion_models["text_emotion"]
+    try:
+        return _registry_pipeline("text-classification", TEXT_EMOTION_MODEL_ID)
+    except Exception as e:
+        logger.error(f"Error loading text emotion model: {str(e)}")
+        # Fallback to a simpler model
+        return _registry_pipeline("sentiment-analysis")
 
 
 def load_audio_emotion_model():
     """Load audio emotion classification model"""
-    if "audio_emotion" not in emotion_models:
-        try:
-            logger.info("Loading audio emotion model...")
-            # Using a general audio classification model
-            # In production, you'd use a specialized emotion detection model
-            emotion_pipeline = pipeline(
-                "audio-classification",
-                model="superb/wav2vec2-base-superb-er",
-                device=0 if settings.DEVICE == "cuda" else -1
-            )
-            emotion_models["audio_emotion"] = emotion_pipeline
-            logger.info("Audio emotion model loaded successfully")
-        except Exception as e:
-            logger.error(f"Error loading audio emotion model: {str(e)}")
-            # Create a placeholder
-            emotion_models["audio_emotion"] = None
-    return emotion_models["audio_emotion"]
+    try:
+        # Using a general audio classification model
+        # In production, you'd use a specialized emotion detection model
+        return _registry_pipeline("audio-classification", AUDIO_EMOTION_MODEL_ID)
+    except Exception as e:
+        logger.error(f"Error loading audio emotion model: {str(e)}")
+        # Create a placeholder
+        return None
 
 
 def load_facial_emotion_model():
     """Load facial emotion detection model"""
-    if "facial_emotion" not in emotion_models:
-        try:
-            logger.info("Loading facial emotion model...")
-            # Using a general image classification model
-            # In production, you'd use FER2013 or other emotion-specific models
-            emotion_pipeline = pipeline(
-                "image-classification",
-                model="trpakov/vit-face-expression",
-                device=0 if settings.DEVICE == "cuda" else -1
-            )
-            emotion_models["facial_emotion"] = emotion_pipeline
-            logger.info("Facial emotion model loaded successfully")
-        except Exception as e:
-            logger.error(f"Error loading facial emotion model: {str(e)}")
-            # Fallback to general image classification
-            emotion_pipeline = pipeline("image-classification")
-            emotion_models["facial_emotion"] = emotion_pipeline
-    return emotion_models["facial_emotion"]
+    try:
+        # Using a general image classification model
+        # In production, you'd use FER2013 or other emotion-specific models
+        return _registry_pipeline("image-classification", FACIAL_EMOTION_MODEL_ID)
+    except Exception as e:
+        logger.error(f"Error loading facial emotion model: {str(e)}")
+        # Fallback to general image classification
+        return _registry_pipeline("image-classification")
 
 
 def extract_audio_from_video(video_path: str, output_path: str = None) -> str:
@@ -127,7 +107,7 @@ def analyze_audio_emotion(audio_path: str, chunk_duration: int = 30) -> List[Dic
             return analyze_audio_emotion_fallback(audio_path, chunk_duration)
         
         # Load audio file
-        audio, sr = librosa.load(audio_path, sr=16000)
+        audio, sr = load_audio(audio_path, 16000)
         duration = len(audio) / sr
         
         # Split into chunks
@@ -164,14 +144,14 @@ def analyze_audio_emotion(audio_path: str, chunk_duration: int = 30) -> List[Dic
         
     except Exception as e:
         logger.error(f"Error analyzing audio emotion: {str(e)}")
-        return []
+        raise
 
 
 def analyze_audio_emotion_fallback(audio_path: str, chunk_duration: int = 30) -> List[Dict]:
     """Fallback audio emotion analysis using basic features"""
     try:
         # Load audio
-        audio, sr = librosa.load(audio_path, sr=16000)
+        audio, sr = load_audio(audio_path, 16000)
         duration = len(audio) / sr
         
         # Split into chunks
@@ -183,14 +163,15 @@ def analyze_audio_emotion_fallback(audio_path: str, chunk_duration: int = 30) ->
             if len(chunk) < sr:  # Skip chunks less than 1 second
                 continue
             
-            # Extract basic audio features
-            mfccs = librosa.feature.mfcc(y=chunk, sr=sr, n_mfcc=13)
-            chroma = librosa.feature.chroma(y=chunk, sr=sr)
-            spectral_centroid = librosa.feature.spectral_centroid(y=chunk, sr=sr)
+            # Extract basic audio features from one shared STFT
+            plane = AudioFeaturePlane(chunk, sr)
+            mfccs = plane.mfcc(n_mfcc=13)
+            chroma = plane.chroma()
+            spectral_centroid = plane.spectral_centroid()
             
             # Calculate energy and tempo
             energy = np.mean(chunk ** 2)
-            tempo, _ = librosa.beat.beat_track(y=chunk, sr=sr)
+            tempo, _ = plane.beat_track()
             
             # Simple heuristic emotion classification
             emotion_scores = []
@@ -225,7 +206,7 @@ def analyze_audio_emotion_fallback(audio_path: str, chunk_duration: int = 30) ->
         
     except Exception as e:
         logger.error(f"Error in fallback audio emotion analysis: {str(e)}")
-        return []
+        raise
 
 
 def detect_faces_and_emotions(frame: np.ndarray) -> List[Dict]:
@@ -318,6 +299,33 @@ def analyze_text_emotion(text: str) -> List[Dict]:
         return {"overall_emotions": [], "sentence_emotions": []}
 
 
+def analyze_visual_emotions(video_path: str, max_frames: int = 20) -> List[Dict]:
+    """Detect faces and emotions on evenly sampled frames"""
+    # Extract only the sampled frames from the video
+    with FrameSampler(video_path) as sampler:
+        indices = evenly_spaced_indices(sampler.total_frames, max_frames)
+        
+        visual_emotions = []
+        
+        for frame_index, frame in sampler.iter_frames(indices):
+            # Convert BGR to RGB
+            frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+            
+            # Detect faces and emotions
+            face_emotions = detect_faces_and_emotions(frame_rgb)
+            
+            timestamp = sampler.timestamp(frame_index)
+            
+            visual_emotions.append({
+                "frame_index": frame_index,
+                "timestamp": timestamp,
+                "faces": face_emotions,
+                "face_count": len(face_emotions)
+            })
+    
+    return visual_emotions
+
+
 @router.post("/video")
 async def analyze_video_emotions(
     filename: str,
@@ -338,35 +346,43 @@ async def analyze_video_emotions(
     if not os.path.exists(video_path):
         raise HTTPException(status_code=404, detail="Video file not found")
     
+    parameters = {
+        "analyze_audio": analyze_audio,
+        "analyze_visual": analyze_visual,
+        "max_frames": max_frames
+    }
+    
     try:
+        # Reuse a previous analysis of the same content with the same parameters
+        cached = analysis_cache.get(video_path, "video_emotions", parameters, EMOTION_ANALYSIS_VERSION)
+        if cached is not None:
+            cached["filename"] = filename
+            return JSONResponse(
+                status_code=200,
+                content={
+                    "message": "Emotion analysis completed successfully",
+                    "data": cached,
+                    "cached": True
+                }
+            )
+        
         logger.info(f"Starting emotion analysis for video: {filename}")
         start_time = datetime.now()
         
         results = {
             "filename": filename,
             "analysis_timestamp": start_time.isoformat(),
-            "parameters": {
-                "analyze_audio": analyze_audio,
-                "analyze_visual": analyze_visual,
-                "max_frames": max_frames
-            }
+            "parameters": parameters
         }
         
         # Audio emotion analysis
         if analyze_audio:
             logger.info("Analyzing audio emotions...")
             try:
-                # Extract audio from video
-                audio_path = extract_audio_from_video(video_path)
-                
-                # Analyze audio emotions
-                audio_emotions = analyze_audio_emotion(audio_path, chunk_duration=30)
+                # The decoded audio cache reads the video's audio track directly; no intermediate WAV
+                audio_emotions = await thread_executor.run(analyze_audio_emotion, video_path, chunk_duration=30)
                 results["audio_emotions"] = audio_emotions
                 
-                # Clean up temporary audio file
-                if os.path.exists(audio_path):
-                    os.remove(audio_path)
-                    
             except Exception as e:
                 logger.error(f"Error in audio emotion analysis: {str(e)}")
                 results["audio_emotions"] = []
@@ -376,41 +392,7 @@ async def analyze_video_emotions(
         if analyze_visual:
             logger.info("Analyzing visual emotions...")
             try:
-                # Extract frames from video
-                cap = cv2.VideoCapture(video_path)
-                total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
-                fps = cap.get(cv2.CAP_PROP_FPS)
-                
-                # Calculate frame extraction interval
-                interval = max(1, total_frames // max_frames)
-                
-                visual_emotions = []
-                frame_count = 0
-                
-                while cap.isOpened() and len(visual_emotions) < max_frames:
-                    ret, frame = cap.read()
-                    if not ret:
-                        break
-                    
-                    if frame_count % interval == 0:
-                        # Convert BGR to RGB
-                        frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                        
-                        # Detect faces and emotions
-                        face_emotions = detect_faces_and_emotions(frame_rgb)
-                        
-                        timestamp = frame_count / fps if fps > 0 else 0
-                        
-                        visual_emotions.append({
-                            "frame_index": frame_count,
-                            "timestamp": timestamp,
-                            "faces": face_emotions,
-                            "face_count": len(face_emotions)
-                        })
-                    
-                    frame_count += 1
-                
-                cap.release()
+                visual_emotions = await thread_executor.run(analyze_visual_emotions, video_path, max_frames)
                 results["visual_emotions"] = visual_emotions
                 
             except Exception as e:
@@ -428,6 +410,8 @@ async def analyze_video_emotions(
         results["summary"] = emotion_summary
         
         logger.info(f"Emotion analysis completed in {processing_time:.2f}s")
+        if not has_errors(results):
+            analysis_cache.set(video_path, "video_emotions", results, parameters, EMOTION_ANALYSIS_VERSION)
         
         return JSONResponse(
             status_code=200,
@@ -456,7 +440,7 @@ async def analyze_text_emotions(text: str):
     try:
         logger.info("Analyzing text emotions...")
         
-        results = analyze_text_emotion(text)
+        results = await thread_executor.run(analyze_text_emotion, text)
         
         return JSONResponse(
             status_code=200,
@@ -491,7 +475,7 @@ async def analyze_audio_emotions_endpoint(filename: str, chunk_duration: int = 3
     try:
         logger.info(f"Analyzing audio emotions for: {filename}")
         
-        emotions = analyze_audio_emotion(audio_path, chunk_duration)
+        emotions = await thread_executor.run(analyze_audio_emotion, audio_path, chunk_duration)
         
         return JSONResponse(
             status_code=200,
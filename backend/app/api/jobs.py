@@ -0,0 +1,187 @@
+"""
+Job Queue API for long-running renders and analyses
+"""
+import asyncio
+import json
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, Optional
+
+from fastapi import APIRouter, HTTPException, Query, WebSocket, WebSocketDisconnect
+from fastapi.responses import JSONResponse, StreamingResponse
+
+from ..core.logging_config import get_logger
+from ..services.job_events import job_event_broker, make_event
+from ..services.job_queue import FINISHED_STATUSES, JOB_STATUSES, cancel_job, get_job, job_manager, list_jobs
+
+router = APIRouter()
+logger = get_logger("jobs")
+
+# Without pushed events for this long, re-read the job row; covers workers owned by another server process
+EVENT_FALLBACK_SECONDS = 2.0
+# SSE comment sent this often so proxies keep idle streams open
+KEEPALIVE_SECONDS = 15.0
+
+
+def _snapshot_event(job: Dict[str, Any]) -> Dict[str, Any]:
+    details = {"result": job["result"]} if job["status"] == "completed" else {}
+    if job["error_message"]:
+        details["error_message"] = job["error_message"]
+    return make_event(job["job_id"], job["status"], job["progress"] or 0, **details)
+
+
+async def job_event_updates(job: Dict[str, Any]) -> AsyncIterator[Optional[Dict[str, Any]]]:
+    """
+    Current state of a job followed by its live events, ending at a finished status
+
+    Yields None when nothing happened for KEEPALIVE_SECONDS.
+    """
+    job_id = job["job_id"]
+    last = _snapshot_event(job)
+    yield last
+    if job["status"] in FINISHED_STATUSES:
+        return
+
+    queue = job_event_broker.subscribe(job_id)
+    try:
+        idle = 0.0
+        while True:
+            try:
+                event = await asyncio.wait_for(queue.get(), timeout=EVENT_FALLBACK_SECONDS)
+            except asyncio.TimeoutError:
+                current = get_job(job_id)
+                if current is None:
+                    return
+                event = _snapshot_event(current)
+                if (event["status"], event["progress"]) == (last["status"], last["progress"]):
+                    idle += EVENT_FALLBACK_SECONDS
+                    if idle >= KEEPALIVE_SECONDS:
+                        idle = 0.0
+                        yield None
+                    continue
+
+            idle = 0.0
+            last = event
+            yield event
+            if event["status"] in FINISHED_STATUSES:
+                return
+    finally:
+        job_event_broker.unsubscribe(job_id, queue)
+
+
+@router.on_event("startup")
+async def start_job_workers():
+    """Resume queued jobs left over from a previous run"""
+    job_manager.ensure_started()
+
+
+@router.on_event("shutdown")
+async def stop_job_workers():
+    job_manager.stop()
+
+
+@router.get("/")
+async def get_jobs(
+    status: Optional[str] = Query(None, description="Filter by job status"),
+    task: Optional[str] = Query(None, description="Filter by task name"),
+    limit: int = Query(50, ge=1, le=500)
+):
+    """List recent jobs, newest first"""
+
+    if status and status not in JOB_STATUSES:
+        raise HTTPException(status_code=400, detail=f"Status must be one of: {', '.join(JOB_STATUSES)}")
+
+    try:
+        jobs = list_jobs(status=status, task=task, limit=limit)
+        return JSONResponse(
+            status_code=200,
+            content={
+                "jobs": jobs,
+                "total": len(jobs),
+                "timestamp": datetime.now().isoformat()
+            }
+        )
+
+    except Exception as e:
+        logger.error(f"Error listing jobs: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error listing jobs: {str(e)}")
+
+
+@router.get("/stats")
+async def get_job_stats():
+    """Worker pool size and job counts by status"""
+
+    try:
+        return JSONResponse(status_code=200, content=job_manager.stats())
+
+    except Exception as e:
+        logger.error(f"Error getting job stats: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error getting job stats: {str(e)}")
+
+
+@router.get("/{job_id}")
+async def get_job_status(job_id: str):
+    """Status, progress percentage and result of a job"""
+
+    job = get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    return JSONResponse(status_code=200, content=job)
+
+
+@router.get("/{job_id}/events")
+async def stream_job_events(job_id: str):
+    """Server-Sent Events stream of job status and progress, closed when the job finishes"""
+
+    job = get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    async def sse():
+        async for event in job_event_updates(job):
+            if event is None:
+                yield ": keepalive\n\n"
+            else:
+                yield f"event: {event['status']}\ndata: {json.dumps(event, default=str)}\n\n"
+
+    return StreamingResponse(
+        sse(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@router.websocket("/{job_id}/ws")
+async def job_events_websocket(websocket: WebSocket, job_id: str):
+    """WebSocket stream of job status and progress, closed when the job finishes"""
+
+    await websocket.accept()
+    job = get_job(job_id)
+    if job is None:
+        await websocket.close(code=4404, reason="Job not found")
+        return
+
+    try:
+        async for event in job_event_updates(job):
+            if event is not None:
+                await websocket.send_text(json.dumps(event, default=str))
+        await websocket.close()
+    except WebSocketDisconnect:
+        logger.info(f"Event subscriber for job {job_id} disconnected")
+
+
+@router.post("/{job_id}/cancel")
+async def cancel_job_endpoint(job_id: str):
+    """Cancel a queued job, or ask a running job to stop at its next progress report"""
+
+    job = cancel_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    return JSONResponse(
+        status_code=200,
+        content={
+            "message": "Job cancelled" if job["status"] == "cancelled" else "Cancellation requested",
+            "job": job
+        }
+    )
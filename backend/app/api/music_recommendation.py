@@ -6,20 +6,36 @@ import json
 import numpy as np
 from datetime import datetime
 from typing import List, Dict, Any, Optional
-import librosa
 
 from fastapi import APIRouter, HTTPException
 from fastapi.responses import JSONResponse
-from transformers import pipeline
 
+from ..core.cache import create_cache
 from ..core.config import settings
+from ..core.executors import thread_executor
+from ..core.lazy_imports import lazy_import
 from ..core.logging_config import get_logger
+from ..core.model_registry import model_registry
+from ..services.analysis_cache import analysis_cache, payload_key
+from ..services.audio_cache import load_audio
+from ..services.audio_features import AudioFeaturePlane
+from ..services.model_loaders import load_pipeline, pipeline_id
+
+# Heavy stacks are imported on first use
+librosa = lazy_import("librosa")
 
 router = APIRouter()
 logger = get_logger("music_recommendation")
 
-# Global model cache
-music_models = {}
+MUSIC_CLASSIFIER_MODEL_ID = "MIT/ast-finetuned-audioset-10-10-0.4593"
+
+# Bump when recommendation output changes so cached responses are not reused
+RECOMMENDATION_VERSION = "1"
+
+# Recommendation responses, shared across workers when CACHE_BACKEND is redis
+recommendation_cache = create_cache(
+    "recommendations", settings.RECOMMENDATION_CACHE_MEMORY_MB, settings.RECOMMENDATION_CACHE_DISK_MB
+)
 
 # Predefined music database (in production, this would be a real database)
 MUSIC_DATABASE = {
@@ -52,23 +68,18 @@ MUSIC_DATABASE = {
 
 
 def load_music_classification_model():
-    """Load music genre classification model"""
-    if "music_classifier" not in music_models:
-        try:
-            logger.info("Loading music classification model...")
-            # Using a general audio classification model
-            # In production, you'd use a music-specific model
-            classifier = pipeline(
-                "audio-classification",
-                model="MIT/ast-finetuned-audioset-10-10-0.4593",
-                device=0 if settings.DEVICE == "cuda" else -1
-            )
-            music_models["music_classifier"] = classifier
-            logger.info("Music classification model loaded successfully")
-        except Exception as e:
-            logger.error(f"Error loading music classification model: {str(e)}")
-            music_models["music_classifier"] = None
-    return music_models["music_classifier"]
+    """Load music genre classification model, shared through the model registry"""
+    try:
+        # Using a general audio classification model
+        # In production, you'd use a music-specific model
+        task = "audio-classification"
+        return model_registry.get(
+            pipeline_id(task, MUSIC_CLASSIFIER_MODEL_ID),
+            lambda: load_pipeline(task, MUSIC_CLASSIFIER_MODEL_ID)
+        )
+    except Exception as e:
+        logger.error(f"Error loading music classification model: {str(e)}")
+        return None
 
 
 def analyze_video_mood(video_analysis: Dict) -> Dict:
@@ -297,23 +308,26 @@ def analyze_existing_audio_for_music(audio_path: str) -> Dict:
     """Analyze existing audio to recommend complementary music"""
     try:
         # Load audio
-        y, sr = librosa.load(audio_path, sr=22050)
+        y, sr = load_audio(audio_path, 22050)
+        
+        # One STFT shared by every descriptor
+        plane = AudioFeaturePlane(y, sr)
         
         # Extract musical features
-        tempo, _ = librosa.beat.beat_track(y=y, sr=sr)
+        tempo, _ = plane.beat_track()
         
         # Spectral features
-        spectral_centroid = np.mean(librosa.feature.spectral_centroid(y=y, sr=sr))
-        spectral_rolloff = np.mean(librosa.feature.spectral_rolloff(y=y, sr=sr))
+        spectral_centroid = np.mean(plane.spectral_centroid())
+        spectral_rolloff = np.mean(plane.spectral_rolloff())
         
         # Energy
-        rms = np.mean(librosa.feature.rms(y=y))
+        rms = np.mean(plane.rms())
         
         # Chroma (harmonic content)
-        chroma = np.mean(librosa.feature.chroma(y=y, sr=sr), axis=1)
+        chroma = np.mean(plane.chroma(), axis=1)
         
         # MFCC features
-        mfcc = np.mean(librosa.feature.mfcc(y=y, sr=sr, n_mfcc=13), axis=1)
+        mfcc = np.mean(plane.mfcc(n_mfcc=13), axis=1)
         
         # Derive mood from features
         mood_scores = {
@@ -357,6 +371,24 @@ async def recommend_music(
     """
     
     try:
+        cache_key = payload_key(f"recommend:{RECOMMENDATION_VERSION}", {
+            "video_analysis": video_analysis,
+            "audio_analysis": audio_analysis,
+            "emotion_analysis": emotion_analysis,
+            "duration_preference": duration_preference,
+            "genre_preference": genre_preference
+        })
+        data = recommendation_cache.get(cache_key)
+        if data is not None:
+            return JSONResponse(
+                status_code=200,
+                content={
+                    "message": "Music recommendations generated successfully",
+                    "data": {**data, "timestamp": datetime.now().isoformat()},
+                    "cached": True
+                }
+            )
+        
         logger.info("Generating music recommendations...")
         
         # Initialize mood scores
@@ -396,23 +428,25 @@ async def recommend_music(
         if genre_preference and genre_preference in MUSIC_DATABASE:
             recommendations = [r for r in recommendations if r["category"] == genre_preference]
         
+        data = {
+            "mood_analysis": {
+                "combined_mood": combined_mood,
+                "individual_analyses": {name: mood for name, mood in mood_analyses}
+            },
+            "recommendations": recommendations,
+            "parameters": {
+                "duration_preference": duration_preference,
+                "genre_preference": genre_preference,
+                "analysis_sources": len(mood_analyses)
+            }
+        }
+        recommendation_cache.set(cache_key, data)
+        
         return JSONResponse(
             status_code=200,
             content={
                 "message": "Music recommendations generated successfully",
-                "data": {
-                    "mood_analysis": {
-                        "combined_mood": combined_mood,
-                        "individual_analyses": {name: mood for name, mood in mood_analyses}
-                    },
-                    "recommendations": recommendations,
-                    "parameters": {
-                        "duration_preference": duration_preference,
-                        "genre_preference": genre_preference,
-                        "analysis_sources": len(mood_analyses)
-                    },
-                    "timestamp": datetime.now().isoformat()
-                }
+                "data": {**data, "timestamp": datetime.now().isoformat()}
             }
         )
         
@@ -434,10 +468,12 @@ async def analyze_audio_for_music_recommendation(filename: str):
         raise HTTPException(status_code=404, detail="Audio file not found")
     
     try:
-        logger.info(f"Analyzing audio for music recommendation: {filename}")
-        
-        # Analyze audio
-        audio_features = analyze_existing_audio_for_music(audio_path)
+        # Audio features depend only on file content, so reuse them across requests and workers
+        audio_features = analysis_cache.get(audio_path, "music_audio_features", version=RECOMMENDATION_VERSION)
+        if audio_features is None:
+            logger.info(f"Analyzing audio for music recommendation: {filename}")
+            audio_features = await thread_executor.run(analyze_existing_audio_for_music, audio_path)
+            analysis_cache.set(audio_path, "music_audio_features", audio_features, version=RECOMMENDATION_VERSION)
         
         # Get recommendations based on audio mood
         recommendations = recommend_music_by_mood(audio_features["mood_scores"])
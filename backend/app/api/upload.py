@@ -2,23 +2,39 @@
 File Upload API endpoints for VideoCraft AI Video Editor
 """
 import os
+import hashlib
 import shutil
 import uuid
 from datetime import datetime
-from typing import List, Optional
+from typing import Dict, List, Optional
 from pathlib import Path
 
-from fastapi import APIRouter, File, UploadFile, HTTPException, Form, Depends
-from fastapi.responses import JSONResponse
+from fastapi import APIRouter, File, UploadFile, HTTPException, Form, Depends, Header, Request
+from fastapi.responses import JSONResponse, Response
+from pydantic import BaseModel
 import aiofiles
 
 from ..core.config import settings
+from ..core.executors import thread_executor
 from ..core.logging_config import get_logger
+from ..services.blob_store import blob_store
+from ..services.media_delivery import media_response
+from ..services.upload_probe import UploadProbe, thumbnail_path_for
+from ..services.upload_sessions import UploadSessionError, parse_content_range, upload_sessions
 
 router = APIRouter()
 logger = get_logger("upload")
 
 
+class UploadSessionCreate(BaseModel):
+    """Request model for starting a resumable upload"""
+    filename: str
+    size: int
+    checksum: Optional[str] = None  # Hex SHA-256 of the whole file, verified on completion
+    title: Optional[str] = None
+    description: Optional[str] = None
+
+
 def validate_file_extension(filename: str, allowed_extensions: List[str]) -> bool:
     """Validate if file has allowed extension"""
     file_ext = Path(filename).suffix.lower()
@@ -33,20 +49,60 @@ def generate_unique_filename(original_filename: str) -> str:
     return f"{timestamp}_{unique_id}{file_ext}"
 
 
-async def save_upload_file(upload_file: UploadFile, destination: str) -> str:
-    """Save uploaded file to destination with optimized chunking for large files"""
+async def save_upload_file(
+    upload_file: UploadFile,
+    destination: str,
+    probe: bool = False,
+    thumbnail: bool = True
+) -> Dict:
+    """
+    Save uploaded file to destination with optimized chunking for large files
+    
+    The SHA-256 is computed while streaming and the bytes are stored in the
+    content-addressed blob store, so a duplicate upload becomes another alias
+    of the existing blob. Returns the blob store entry (file_path, sha256,
+    size, deduplicated, references).
+    
+    With probe=True the same chunks are also fed to ffprobe and, unless
+    thumbnail=False, a thumbnail ffmpeg, and the entry gains media_info (None
+    if probing failed).
+    """
+    temp_path = blob_store.temp_file()
+    media_probe = UploadProbe(thumbnail_path_for(destination) if thumbnail else None) if probe else None
     try:
-        async with aiofiles.open(destination, 'wb') as f:
+        if media_probe:
+            await media_probe.start()
+        sha256 = hashlib.sha256()
+        async with aiofiles.open(temp_path, 'wb') as f:
             # Use larger chunk size for better performance with large files
             chunk_size = 1024 * 1024  # 1MB chunks for better performance
             while chunk := await upload_file.read(chunk_size):
+                sha256.update(chunk)
                 await f.write(chunk)
-        return destination
+                if media_probe:
+                    await media_probe.feed(chunk)
+        stored = blob_store.commit(temp_path, sha256.hexdigest(), os.path.basename(destination))
+        if media_probe:
+            stored["media_info"] = await _finish_probe(media_probe, stored["file_path"])
+        return stored
     except Exception as e:
         logger.error(f"Error saving file {upload_file.filename}: {str(e)}")
+        if media_probe:
+            await media_probe.abort()
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
         raise HTTPException(status_code=500, detail="Error saving file")
 
 
+async def _finish_probe(media_probe: UploadProbe, file_path: str) -> Optional[Dict]:
+    """Media info is best effort; a probe failure never fails the upload"""
+    try:
+        return await media_probe.finish(file_path)
+    except Exception as e:
+        logger.warning(f"Could not probe {file_path}: {str(e)}")
+        return None
+
+
 @router.post("/video")
 async def upload_video(
     file: UploadFile = File(...),
@@ -88,7 +144,7 @@ async def upload_video(
         os.makedirs(settings.UPLOAD_DIR, exist_ok=True)
         
         # Save file
-        await save_upload_file(file, file_path)
+        stored = await save_upload_file(file, file_path, probe=True)
         
         # Get file info
         file_info = {
@@ -96,7 +152,10 @@ async def upload_video(
             "original_filename": file.filename,
             "filename": unique_filename,
             "file_path": file_path,
-            "file_size": os.path.getsize(file_path),
+            "file_size": stored["size"],
+            "sha256": stored["sha256"],
+            "deduplicated": stored["deduplicated"],
+            "media_info": stored["media_info"],
             "content_type": file.content_type,
             "upload_time": datetime.now().isoformat(),
             "title": title or file.filename,
@@ -154,7 +213,7 @@ async def upload_audio(
         os.makedirs(settings.UPLOAD_DIR, exist_ok=True)
         
         # Save file
-        await save_upload_file(file, file_path)
+        stored = await save_upload_file(file, file_path, probe=True, thumbnail=False)
         
         # Get file info
         file_info = {
@@ -162,7 +221,10 @@ async def upload_audio(
             "original_filename": file.filename,
             "filename": unique_filename,
             "file_path": file_path,
-            "file_size": os.path.getsize(file_path),
+            "file_size": stored["size"],
+            "sha256": stored["sha256"],
+            "deduplicated": stored["deduplicated"],
+            "media_info": stored["media_info"],
             "content_type": file.content_type,
             "upload_time": datetime.now().isoformat(),
             "title": title or file.filename,
@@ -228,7 +290,7 @@ async def upload_multiple_files(
             file_path = os.path.join(settings.UPLOAD_DIR, unique_filename)
             
             # Save file
-            await save_upload_file(file, file_path)
+            stored = await save_upload_file(file, file_path, probe=file_type == "video")
             
             # File info
             file_info = {
@@ -236,7 +298,10 @@ async def upload_multiple_files(
                 "original_filename": file.filename,
                 "filename": unique_filename,
                 "file_path": file_path,
-                "file_size": os.path.getsize(file_path),
+                "file_size": stored["size"],
+                "sha256": stored["sha256"],
+                "deduplicated": stored["deduplicated"],
+                "media_info": stored.get("media_info"),
                 "content_type": file.content_type,
                 "file_type": file_type,
                 "upload_time": datetime.now().isoformat(),
@@ -287,6 +352,28 @@ async def get_upload_status(filename: str):
     }
 
 
+@router.api_route("/media/{filename}", methods=["GET", "HEAD"])
+async def stream_uploaded_file(filename: str, request: Request):
+    """
+    Stream an uploaded file to the editor player
+    
+    Upload names are unique and their bytes never change, so responses are
+    cacheable forever; byte ranges let the player seek without downloading
+    the whole file.
+    """
+    file_path = os.path.join(settings.UPLOAD_DIR, filename)
+    
+    if Path(filename).name != filename or not os.path.isfile(file_path):
+        raise HTTPException(status_code=404, detail="File not found")
+    
+    try:
+        return await media_response(request, file_path, immutable=True)
+    
+    except Exception as e:
+        logger.error(f"Error streaming {filename}: {str(e)}")
+        raise HTTPException(status_code=500, detail="Error streaming file")
+
+
 @router.delete("/delete/{filename}")
 async def delete_uploaded_file(filename: str):
     """Delete uploaded file"""
@@ -297,7 +384,8 @@ async def delete_uploaded_file(filename: str):
         raise HTTPException(status_code=404, detail="File not found")
     
     try:
-        os.remove(file_path)
+        # Drops this alias; the stored bytes go once no other upload shares them
+        blob_store.release(file_path)
         logger.info(f"File deleted successfully: {filename}")
         
         return {
@@ -348,3 +436,173 @@ async def list_uploaded_files():
     except Exception as e:
         logger.error(f"Error listing files: {str(e)}")
         raise HTTPException(status_code=500, detail="Error listing files")
+
+
+def _file_type_for(filename: str) -> str:
+    file_ext = Path(filename).suffix.lower()
+    if file_ext in settings.ALLOWED_VIDEO_EXTENSIONS:
+        return "video"
+    if file_ext in settings.ALLOWED_AUDIO_EXTENSIONS:
+        return "audio"
+    raise HTTPException(
+        status_code=400,
+        detail=f"Invalid file type. Allowed: {', '.join(settings.ALLOWED_VIDEO_EXTENSIONS + settings.ALLOWED_AUDIO_EXTENSIONS)}"
+    )
+
+
+def _session_headers(status: dict) -> dict:
+    # tus-compatible headers so generic resumable clients can read the offset
+    return {
+        "Upload-Offset": str(status["offset"]),
+        "Upload-Length": str(status["size"]),
+        "Cache-Control": "no-store"
+    }
+
+
+@router.post("/sessions")
+async def create_upload_session(request: UploadSessionCreate):
+    """
+    Start a resumable upload
+    
+    Then PUT byte ranges to ``/sessions/{session_id}`` with a
+    ``Content-Range: bytes start-end/total`` header, in any order and in
+    parallel, and POST ``/sessions/{session_id}/complete`` when done.
+    """
+    file_type = _file_type_for(request.filename)
+    
+    try:
+        status = upload_sessions.create(
+            request.filename,
+            request.size,
+            file_type,
+            checksum=request.checksum,
+            metadata={"title": request.title, "description": request.description}
+        )
+        return JSONResponse(
+            status_code=201,
+            content={"message": "Upload session created", "data": status},
+            headers={**_session_headers(status), "Location": f"sessions/{status['session_id']}"}
+        )
+    
+    except UploadSessionError as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error creating upload session for {request.filename}: {str(e)}")
+        raise HTTPException(status_code=500, detail="Error creating upload session")
+
+
+@router.put("/sessions/{session_id}")
+async def upload_session_part(
+    session_id: str,
+    request: Request,
+    content_range: Optional[str] = Header(None)
+):
+    """Write one byte range of a resumable upload"""
+    try:
+        start, end, total = parse_content_range(content_range)
+        status = await upload_sessions.write_part(session_id, start, end, total, request.stream())
+        return JSONResponse(status_code=200, content=status, headers=_session_headers(status))
+    
+    except UploadSessionError as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error writing part of upload session {session_id}: {str(e)}")
+        raise HTTPException(status_code=500, detail="Error writing upload part")
+
+
+@router.head("/sessions/{session_id}")
+async def head_upload_session(session_id: str):
+    """Current offset of a resumable upload, as tus-style headers"""
+    try:
+        status = upload_sessions.status(session_id)
+        return Response(status_code=200, headers=_session_headers(status))
+    
+    except UploadSessionError as e:
+        return Response(status_code=e.status_code)
+
+
+@router.get("/sessions/{session_id}")
+async def get_upload_session(session_id: str):
+    """Received and missing byte ranges of a resumable upload"""
+    try:
+        status = upload_sessions.status(session_id)
+        return JSONResponse(status_code=200, content=status, headers=_session_headers(status))
+    
+    except UploadSessionError as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e))
+
+
+@router.post("/sessions/{session_id}/complete")
+async def complete_upload_session(session_id: str, checksum: Optional[str] = None):
+    """
+    Verify and publish a finished resumable upload
+    
+    - **checksum**: Optional hex SHA-256; overrides the one given at creation
+    """
+    try:
+        status = upload_sessions.status(session_id)
+        unique_filename = generate_unique_filename(status["filename"])
+        file_path = os.path.join(settings.UPLOAD_DIR, unique_filename)
+        
+        # Hashing a multi-GB file must not block the event loop
+        session = await thread_executor.run(upload_sessions.finalize, session_id, unique_filename, checksum)
+        
+        # Parts arrived out of order, so there was no stream to tee; probe the assembled file
+        media_info = None
+        if session["file_type"] == "video":
+            media_info = await _finish_probe(UploadProbe(thumbnail_path_for(file_path)), file_path)
+        
+        file_info = {
+            "id": str(uuid.uuid4()),
+            "original_filename": session["filename"],
+            "filename": unique_filename,
+            "file_path": file_path,
+            "file_size": os.path.getsize(file_path),
+            "sha256": session["sha256"],
+            "deduplicated": session["deduplicated"],
+            "media_info": media_info,
+            "file_type": session["file_type"],
+            "upload_time": datetime.now().isoformat(),
+            "title": session["metadata"].get("title") or session["filename"],
+            "description": session["metadata"].get("description"),
+            "status": "uploaded",
+            "processed": False
+        }
+        
+        logger.info(f"Resumable upload completed: {session['filename']} -> {unique_filename}")
+        
+        return JSONResponse(
+            status_code=201,
+            content={
+                "message": f"{session['file_type'].capitalize()} uploaded successfully",
+                "data": file_info
+            }
+        )
+    
+    except UploadSessionError as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error completing upload session {session_id}: {str(e)}")
+        raise HTTPException(status_code=500, detail="Error completing upload")
+
+
+@router.delete("/sessions/{session_id}")
+async def abort_upload_session(session_id: str):
+    """Abandon a resumable upload and free its space"""
+    try:
+        upload_sessions.abort(session_id)
+        return {"message": "Upload session aborted", "session_id": session_id}
+    
+    except UploadSessionError as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e))
+
+
+@router.get("/storage")
+async def get_storage_stats():
+    """Deduplicated upload storage: blobs stored, bytes on disk and bytes saved by sharing"""
+    try:
+        return blob_store.stats()
+    
+    except Exception as e:
+        logger.error(f"Error reading storage stats: {str(e)}")
+        raise HTTPException(status_code=500, detail="Error reading storage stats")
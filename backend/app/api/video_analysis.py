@@ -3,10 +3,9 @@ Video Analysis API endpoints using real AI models
 """
 import os
 import cv2
-import torch
 import numpy as np
 from datetime import datetime
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 from pathlib import Path
 
 from fastapi import APIRouter, HTTPException, BackgroundTasks, Depends
@@ -15,16 +14,39 @@ from sqlalchemy.orm import Session
 from pydantic import BaseModel
 
 from ..core.config import settings
+from ..core.executors import thread_executor
+from ..core.lazy_imports import lazy_import
 from ..core.logging_config import get_logger
+from ..core.model_registry import model_registry
 from ..services.ai_analysis import RealAIAnalysisService
+from ..services.analysis_cache import analysis_cache, has_errors
+from ..services.frame_sampler import FrameSampler, evenly_spaced_indices, interval_indices
+from ..services.model_loaders import (
+    DETR_MODEL_ID, RESNET_MODEL_ID, VIT_MODEL_ID, load_detr, load_resnet, load_vit
+)
 from ..database import get_db
 from ..models.database import AnalysisReport, Project
 
+# Heavy stacks are imported on first use
+torch = lazy_import("torch")
+
 router = APIRouter()
 logger = get_logger("video_analysis")
 
-# Initialize real AI analysis service
-ai_service = RealAIAnalysisService()
+# Bump when analysis output changes so cached results are not reused
+VIDEO_ANALYSIS_VERSION = f"2:{DETR_MODEL_ID}:{RESNET_MODEL_ID}"
+SUGGESTIONS_VERSION = "1"
+
+# Real AI analysis service, created on first request
+_ai_service: Optional[RealAIAnalysisService] = None
+
+
+def get_ai_service() -> RealAIAnalysisService:
+    """Return the shared analysis service, creating it on first use"""
+    global _ai_service
+    if _ai_service is None:
+        _ai_service = RealAIAnalysisService()
+    return _ai_service
 
 
 class AnalysisRequest(BaseModel):
@@ -43,83 +65,73 @@ class AnalysisResponse(BaseModel):
 
 
 def load_object_detection_model():
-    """Load object detection model (DETR)"""
-    if "object_detection" not in model_cache:
-        try:
-            logger.info("Loading object detection model...")
-            processor = AutoProcessor.from_pretrained("facebook/detr-resnet-50")
-            model = AutoModelForObjectDetection.from_pretrained("facebook/detr-resnet-50")
-            model_cache["object_detection"] = {"processor": processor, "model": model}
-            logger.info("Object detection model loaded successfully")
-        except Exception as e:
-            logger.error(f"Error loading object detection model: {str(e)}")
-            raise
-    return model_cache["object_detection"]
+    """Load object detection model (DETR), shared through the model registry"""
+    try:
+        return model_registry.get(DETR_MODEL_ID, load_detr)
+    except Exception as e:
+        logger.error(f"Error loading object detection model: {str(e)}")
+        raise
 
 
 def load_scene_classification_model():
-    """Load scene classification model"""
-    if "scene_classification" not in model_cache:
-        try:
-            logger.info("Loading scene classification model...")
-            classifier = pipeline(
-                "image-classification",
-                model="microsoft/resnet-50",
-                device=0 if settings.DEVICE == "cuda" else -1
-            )
-            model_cache["scene_classification"] = classifier
-            logger.info("Scene classification model loaded successfully")
-        except Exception as e:
-            logger.error(f"Error loading scene classification model: {str(e)}")
-            # Fallback to a simpler model
-            classifier = pipeline("image-classification", model="google/vit-base-patch16-224")
-            model_cache["scene_classification"] = classifier
-    return model_cache["scene_classification"]
+    """Load scene classification model, shared through the model registry"""
+    try:
+        return model_registry.get(RESNET_MODEL_ID, load_resnet)
+    except Exception as e:
+        logger.error(f"Error loading scene classification model: {str(e)}")
+        # Fallback to a simpler model
+        return model_registry.get(VIT_MODEL_ID, load_vit)
 
 
 def extract_frames(video_path: str, max_frames: int = 30, fps: Optional[float] = None) -> List[np.ndarray]:
     """Extract frames from video for analysis"""
+    frames, _ = extract_timed_frames(video_path, max_frames, fps)
+    return frames
+
+
+def extract_timed_frames(
+    video_path: str,
+    max_frames: int = 30,
+    fps: Optional[float] = None
+) -> Tuple[List[np.ndarray], List[float]]:
+    """Extract frames for analysis together with their presentation times in seconds"""
     try:
-        cap = cv2.VideoCapture(video_path)
-        
-        if not cap.isOpened():
-            raise ValueError(f"Could not open video file: {video_path}")
-        
-        total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
-        video_fps = cap.get(cv2.CAP_PROP_FPS)
-        duration = total_frames / video_fps if video_fps > 0 else 0
-        
-        # Calculate frame extraction interval
-        if fps:
-            interval = max(1, int(video_fps / fps))
-        else:
-            interval = max(1, total_frames // max_frames)
-        
-        frames = []
-        frame_count = 0
-        
-        while cap.isOpened() and len(frames) < max_frames:
-            ret, frame = cap.read()
-            if not ret:
-                break
+        with FrameSampler(video_path) as sampler:
+            total_frames = sampler.total_frames
+            video_fps = sampler.fps
+            duration = total_frames / video_fps if video_fps > 0 else 0
             
-            if frame_count % interval == 0:
-                # Convert BGR to RGB
-                frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                frames.append(frame_rgb)
+            # Calculate frame extraction interval
+            if fps:
+                indices = interval_indices(total_frames, max(1, int(video_fps / fps)), max_frames)
+            else:
+                indices = evenly_spaced_indices(total_frames, max_frames)
             
-            frame_count += 1
-        
-        cap.release()
+            frames = []
+            timestamps = []
+            for frame_index, frame in sampler.iter_frames(indices):
+                # Convert BGR to RGB
+                frames.append(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
+                timestamps.append(sampler.timestamp(frame_index))
         
         logger.info(f"Extracted {len(frames)} frames from video (duration: {duration:.2f}s)")
-        return frames
+        return frames, timestamps
         
     except Exception as e:
         logger.error(f"Error extracting frames from {video_path}: {str(e)}")
         raise
 
 
+def read_frame_rgb(video_path: str, frame_index: int) -> Tuple[Optional[np.ndarray], float]:
+    """One decoded frame in RGB, or None past the end, with its presentation time"""
+    with FrameSampler(video_path, seek_threshold=0) as sampler:
+        frame = sampler.read_frame(frame_index)
+        frame_timestamp = sampler.timestamp(frame_index)
+    if frame is None:
+        return None, frame_timestamp
+    return cv2.cvtColor(frame, cv2.COLOR_BGR2RGB), frame_timestamp
+
+
 def analyze_objects_in_frame(frame: np.ndarray, threshold: float = 0.7) -> List[Dict]:
     """Analyze objects in a single frame using DETR"""
     try:
@@ -128,7 +140,7 @@ def analyze_objects_in_frame(frame: np.ndarray, threshold: float = 0.7) -> List[
         model = model_data["model"]
         
         # Prepare image
-        inputs = processor(images=frame, return_tensors="pt")
+        inputs = processor(images=frame, return_tensors="pt").to(settings.DEVICE)
         
         # Run inference
         with torch.no_grad():
@@ -150,36 +162,42 @@ def analyze_objects_in_frame(frame: np.ndarray, threshold: float = 0.7) -> List[
         
     except Exception as e:
         logger.error(f"Error analyzing objects in frame: {str(e)}")
-        return []
+        raise
 
 
 def analyze_scene_in_frame(frame: np.ndarray, top_k: int = 5) -> List[Dict]:
     """Analyze scene/context in a frame"""
     try:
-        classifier = load_scene_classification_model()
-        
-        # Convert numpy array to PIL Image
-        from PIL import Image
-        image = Image.fromarray(frame)
+        model_data = load_scene_classification_model()
+        processor = model_data["processor"]
+        model = model_data["model"]
         
         # Run classification
-        results = classifier(image, top_k=top_k)
+        inputs = processor(images=frame, return_tensors="pt").to(settings.DEVICE)
+        with torch.no_grad():
+            logits = model(**inputs).logits
+        
+        scores, labels = logits.softmax(dim=-1)[0].topk(min(top_k, logits.shape[-1]))
         
         return [
             {
-                "label": result["label"],
-                "confidence": result["score"]
+                "label": model.config.id2label[label.item()],
+                "confidence": score.item()
             }
-            for result in results
+            for score, label in zip(scores, labels)
         ]
         
     except Exception as e:
         logger.error(f"Error analyzing scene in frame: {str(e)}")
-        return []
+        raise
 
 
-def detect_scene_changes(frames: List[np.ndarray], threshold: float = 0.3) -> List[Dict]:
-    """Detect scene changes between frames"""
+def detect_scene_changes(
+    frames: List[np.ndarray],
+    threshold: float = 0.3,
+    timestamps: Optional[List[float]] = None
+) -> List[Dict]:
+    """Detect scene changes between frames; timestamps are the frames' presentation times"""
     try:
         scene_changes = []
         
@@ -195,7 +213,7 @@ def detect_scene_changes(frames: List[np.ndarray], threshold: float = 0.3) -> Li
                 scene_changes.append({
                     "frame_index": i,
                     "change_score": 1 - correlation,
-                    "timestamp": i / 30.0,  # Assuming 30 fps for timestamp calculation
+                    "timestamp": timestamps[i] if timestamps else None,
                     "type": "scene_change"
                 })
         
@@ -209,28 +227,20 @@ def detect_scene_changes(frames: List[np.ndarray], threshold: float = 0.3) -> Li
 def analyze_video_quality(video_path: str) -> Dict:
     """Analyze video quality metrics"""
     try:
-        cap = cv2.VideoCapture(video_path)
-        
-        if not cap.isOpened():
-            raise ValueError(f"Could not open video file: {video_path}")
-        
-        # Get video properties
-        width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
-        height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
-        fps = cap.get(cv2.CAP_PROP_FPS)
-        total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
-        duration = total_frames / fps if fps > 0 else 0
-        
-        # Sample frames for quality analysis
-        frame_samples = []
-        sample_count = min(10, total_frames)
-        
-        for i in range(sample_count):
-            frame_pos = i * (total_frames // sample_count)
-            cap.set(cv2.CAP_PROP_POS_FRAMES, frame_pos)
-            ret, frame = cap.read()
+        with FrameSampler(video_path) as sampler:
+            # Get video properties
+            width = sampler.width
+            height = sampler.height
+            fps = sampler.fps
+            total_frames = sampler.total_frames
+            duration = total_frames / fps if fps > 0 else 0
+            
+            # Sample frames for quality analysis
+            frame_samples = []
+            sample_count = min(10, total_frames)
+            indices = [i * (total_frames // sample_count) for i in range(sample_count)] if sample_count > 0 else []
             
-            if ret:
+            for _, frame in sampler.iter_frames(indices):
                 # Calculate frame quality metrics
                 gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
                 
@@ -249,8 +259,6 @@ def analyze_video_quality(video_path: str) -> Dict:
                     "contrast": contrast
                 })
         
-        cap.release()
-        
         # Calculate overall quality metrics
         avg_sharpness = np.mean([f["sharpness"] for f in frame_samples])
         avg_brightness = np.mean([f["brightness"] for f in frame_samples])
@@ -278,6 +286,62 @@ def analyze_video_quality(video_path: str) -> Dict:
         raise
 
 
+def summarize_objects(frames: List[np.ndarray]) -> Dict:
+    """Run object detection on every frame and count labels across the video"""
+    objects_per_frame = []
+    all_objects = {}
+    
+    for i, frame in enumerate(frames):
+        objects = analyze_objects_in_frame(frame)
+        objects_per_frame.append({
+            "frame_index": i,
+            "objects": objects
+        })
+        
+        # Count objects
+        for obj in objects:
+            label = obj["label"]
+            if label not in all_objects:
+                all_objects[label] = 0
+            all_objects[label] += 1
+    
+    return {
+        "objects_per_frame": objects_per_frame,
+        "object_summary": all_objects,
+        "total_objects_detected": sum(len(frame["objects"]) for frame in objects_per_frame)
+    }
+
+
+def summarize_scenes(frames: List[np.ndarray]) -> Dict:
+    """Classify every frame and aggregate scene types with average confidence"""
+    scenes_per_frame = []
+    all_scenes = {}
+    
+    for i, frame in enumerate(frames):
+        scenes = analyze_scene_in_frame(frame)
+        scenes_per_frame.append({
+            "frame_index": i,
+            "scenes": scenes
+        })
+        
+        # Count scene types
+        for scene in scenes:
+            label = scene["label"]
+            if label not in all_scenes:
+                all_scenes[label] = {"count": 0, "avg_confidence": 0}
+            all_scenes[label]["count"] += 1
+            all_scenes[label]["avg_confidence"] += scene["confidence"]
+    
+    # Calculate average confidence
+    for scene_type in all_scenes:
+        all_scenes[scene_type]["avg_confidence"] /= all_scenes[scene_type]["count"]
+    
+    return {
+        "scenes_per_frame": scenes_per_frame,
+        "scene_summary": all_scenes
+    }
+
+
 @router.post("/video")
 async def analyze_video(
     filename: str,
@@ -303,91 +367,68 @@ async def analyze_video(
     if not os.path.exists(video_path):
         raise HTTPException(status_code=404, detail="Video file not found")
     
+    parameters = {
+        "max_frames": max_frames,
+        "object_detection": object_detection,
+        "scene_classification": scene_classification,
+        "scene_change_detection": scene_change_detection,
+        "quality_analysis": quality_analysis
+    }
+    
     try:
+        # Reuse a previous analysis of the same content with the same parameters
+        cached = analysis_cache.get(video_path, "video_analysis", parameters, VIDEO_ANALYSIS_VERSION)
+        if cached is not None:
+            cached["filename"] = filename
+            return JSONResponse(
+                status_code=200,
+                content={
+                    "message": "Video analysis completed successfully",
+                    "data": cached,
+                    "cached": True
+                }
+            )
+        
         logger.info(f"Starting video analysis for: {filename}")
         start_time = datetime.now()
         
         analysis_results = {
             "filename": filename,
             "analysis_timestamp": start_time.isoformat(),
-            "parameters": {
-                "max_frames": max_frames,
-                "object_detection": object_detection,
-                "scene_classification": scene_classification,
-                "scene_change_detection": scene_change_detection,
-                "quality_analysis": quality_analysis
-            }
+            "parameters": parameters
         }
         
         # Extract frames
-        frames = extract_frames(video_path, max_frames)
+        frames, timestamps = await thread_executor.run(extract_timed_frames, video_path, max_frames)
         analysis_results["frames_analyzed"] = len(frames)
         
         # Video quality analysis
         if quality_analysis:
             logger.info("Analyzing video quality...")
-            analysis_results["quality"] = analyze_video_quality(video_path)
+            analysis_results["quality"] = await thread_executor.run(analyze_video_quality, video_path)
         
         # Object detection
         if object_detection and frames:
             logger.info("Running object detection...")
-            objects_per_frame = []
-            all_objects = {}
-            
-            for i, frame in enumerate(frames):
-                objects = analyze_objects_in_frame(frame)
-                objects_per_frame.append({
-                    "frame_index": i,
-                    "objects": objects
-                })
-                
-                # Count objects
-                for obj in objects:
-                    label = obj["label"]
-                    if label not in all_objects:
-                        all_objects[label] = 0
-                    all_objects[label] += 1
-            
-            analysis_results["object_detection"] = {
-                "objects_per_frame": objects_per_frame,
-                "object_summary": all_objects,
-                "total_objects_detected": sum(len(frame["objects"]) for frame in objects_per_frame)
-            }
+            try:
+                analysis_results["object_detection"] = await thread_executor.run(summarize_objects, frames)
+            except Exception as e:
+                logger.error(f"Error in object detection: {str(e)}")
+                analysis_results["object_detection_error"] = str(e)
         
         # Scene classification
         if scene_classification and frames:
             logger.info("Running scene classification...")
-            scenes_per_frame = []
-            all_scenes = {}
-            
-            for i, frame in enumerate(frames):
-                scenes = analyze_scene_in_frame(frame)
-                scenes_per_frame.append({
-                    "frame_index": i,
-                    "scenes": scenes
-                })
-                
-                # Count scene types
-                for scene in scenes:
-                    label = scene["label"]
-                    if label not in all_scenes:
-                        all_scenes[label] = {"count": 0, "avg_confidence": 0}
-                    all_scenes[label]["count"] += 1
-                    all_scenes[label]["avg_confidence"] += scene["confidence"]
-            
-            # Calculate average confidence
-            for scene_type in all_scenes:
-                all_scenes[scene_type]["avg_confidence"] /= all_scenes[scene_type]["count"]
-            
-            analysis_results["scene_classification"] = {
-                "scenes_per_frame": scenes_per_frame,
-                "scene_summary": all_scenes
-            }
+            try:
+                analysis_results["scene_classification"] = await thread_executor.run(summarize_scenes, frames)
+            except Exception as e:
+                logger.error(f"Error in scene classification: {str(e)}")
+                analysis_results["scene_error"] = str(e)
         
         # Scene change detection
         if scene_change_detection and frames:
             logger.info("Detecting scene changes...")
-            scene_changes = detect_scene_changes(frames)
+            scene_changes = await thread_executor.run(detect_scene_changes, frames, 0.3, timestamps)
             analysis_results["scene_changes"] = {
                 "changes": scene_changes,
                 "total_changes": len(scene_changes),
@@ -400,6 +441,9 @@ async def analyze_video(
         analysis_results["processing_time"] = processing_time
         
         logger.info(f"Video analysis completed in {processing_time:.2f}s")
+        # Failed steps are retried on the next request instead of being cached as empty
+        if not has_errors(analysis_results):
+            analysis_cache.set(video_path, "video_analysis", analysis_results, parameters, VIDEO_ANALYSIS_VERSION)
         
         return JSONResponse(
             status_code=200,
@@ -436,30 +480,26 @@ async def analyze_single_frame(
     
     try:
         # Extract specific frame
-        cap = cv2.VideoCapture(video_path)
-        cap.set(cv2.CAP_PROP_POS_FRAMES, frame_index)
-        ret, frame = cap.read()
-        cap.release()
+        frame_rgb, frame_timestamp = await thread_executor.run(read_frame_rgb, video_path, frame_index)
         
-        if not ret:
+        if frame_rgb is None:
             raise HTTPException(status_code=400, detail="Could not extract frame")
         
-        frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        
         analysis_results = {
             "filename": filename,
             "frame_index": frame_index,
+            "timestamp": frame_timestamp,
             "analysis_timestamp": datetime.now().isoformat()
         }
         
         # Object detection
         if object_detection:
-            objects = analyze_objects_in_frame(frame_rgb)
+            objects = await thread_executor.run(analyze_objects_in_frame, frame_rgb)
             analysis_results["objects"] = objects
         
         # Scene classification
         if scene_classification:
-            scenes = analyze_scene_in_frame(frame_rgb)
+            scenes = await thread_executor.run(analyze_scene_in_frame, frame_rgb)
             analysis_results["scenes"] = scenes
         
         return JSONResponse(
@@ -470,6 +510,8 @@ async def analyze_single_frame(
             }
         )
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error analyzing frame {frame_index} from {filename}: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error analyzing frame: {str(e)}")
@@ -486,10 +528,13 @@ async def get_edit_suggestions(filename: str):
         raise HTTPException(status_code=404, detail="Video file not found")
     
     try:
-        # This would typically use cached analysis results
-        # For now, we'll run a quick analysis
-        frames = extract_frames(video_path, max_frames=15)
-        scene_changes = detect_scene_changes(frames)
+        cached = analysis_cache.get(video_path, "edit_suggestions", version=SUGGESTIONS_VERSION)
+        if cached is not None:
+            cached["filename"] = filename
+            return cached
+        
+        frames, timestamps = await thread_executor.run(extract_timed_frames, video_path, 15)
+        scene_changes = await thread_executor.run(detect_scene_changes, frames, 0.3, timestamps)
         
         suggestions = []
         
@@ -503,7 +548,7 @@ async def get_edit_suggestions(filename: str):
             })
         
         # Quality-based suggestions
-        quality_info = analyze_video_quality(video_path)
+        quality_info = await thread_executor.run(analyze_video_quality, video_path)
         quality_score = quality_info["quality_metrics"]["quality_score"]
         
         if quality_score < 50:
@@ -524,7 +569,7 @@ async def get_edit_suggestions(filename: str):
                 "confidence": 0.6
             })
         
-        return {
+        response = {
             "filename": filename,
             "suggestions": suggestions,
             "analysis_summary": {
@@ -533,6 +578,9 @@ async def get_edit_suggestions(filename: str):
                 "scene_changes": len(scene_changes)
             }
         }
+        analysis_cache.set(video_path, "edit_suggestions", response, version=SUGGESTIONS_VERSION)
+        
+        return response
         
     except Exception as e:
         logger.error(f"Error generating suggestions for {filename}: {str(e)}")
@@ -559,11 +607,21 @@ async def analyze_video_real(
         if not os.path.exists(video_path):
             raise HTTPException(status_code=404, detail="Video file not found")
         
-        # Perform real AI analysis
-        analysis_result = await ai_service.analyze_video(
-            video_path=video_path,
-            analysis_types=request.analysis_types
+        # Perform real AI analysis, reusing a cached result for unchanged content
+        service = get_ai_service()
+        cache_params = {"analysis_types": sorted(request.analysis_types or [])}
+        analysis_result = analysis_cache.get(
+            video_path, "ai_analysis", cache_params, service.ANALYSIS_VERSION
         )
+        if analysis_result is None:
+            analysis_result = await thread_executor.run(
+                service.analyze_video, video_path, request.analysis_types
+            )
+            # Mock fallbacks would otherwise be served as real analysis until the file changes
+            if analysis_result['success'] and not analysis_result['analysis'].get('fallback'):
+                analysis_cache.set(
+                    video_path, "ai_analysis", analysis_result, cache_params, service.ANALYSIS_VERSION
+                )
         
         if not analysis_result['success']:
             # If real analysis fails, return error with fallback
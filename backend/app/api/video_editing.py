@@ -9,22 +9,31 @@ from typing import List, Dict, Any, Optional, Tuple
 from pathlib import Path
 import json
 
-from fastapi import APIRouter, HTTPException, BackgroundTasks, File, UploadFile, Form
-from fastapi.responses import JSONResponse, FileResponse
-import moviepy.editor as mp
-from moviepy.video.fx import resize, crop
+from fastapi import APIRouter, HTTPException, BackgroundTasks, File, UploadFile, Form, Request
+from fastapi.responses import JSONResponse
 from pydantic import BaseModel
 
 from ..core.config import settings
+from ..core.executors import executor_stats, process_executor, thread_executor
+from ..core.lazy_imports import lazy_import
 from ..core.logging_config import get_logger
+from ..services import ffmpeg_engine
+from ..services.job_queue import enqueue
+from ..services.media_delivery import media_response
 from ..services.video_processor import VideoProcessor
 
+# Only text overlays still render through moviepy
+mp = lazy_import("moviepy.editor")
+
 router = APIRouter()
 logger = get_logger("video_editing")
 
 # Initialize video processor
 video_processor = VideoProcessor()
 
+# moviepy encodes through a single ffmpeg process; let libx264 use every core
+ENCODER_THREADS = os.cpu_count() or 1
+
 
 class VideoProcessingRequest(BaseModel):
     """Request model for video processing"""
@@ -41,6 +50,7 @@ class VideoProcessingResponse(BaseModel):
     video_info: Optional[Dict] = None
     processing_time: Optional[str] = None
     applied_operations: Optional[Dict] = None
+    render_mode: Optional[str] = None
     error: Optional[str] = None
 
 
@@ -67,39 +77,7 @@ def trim_video(input_path: str, output_path: str, start_time: float, end_time: f
     """Trim video to specified time range"""
     try:
         logger.info(f"Trimming video from {start_time}s to {end_time}s")
-        
-        clip = mp.VideoFileClip(input_path)
-        
-        # Validate time range
-        if end_time > clip.duration:
-            end_time = clip.duration
-        if start_time < 0:
-            start_time = 0
-        if start_time >= end_time:
-            raise ValueError("Start time must be less than end time")
-        
-        # Trim clip
-        trimmed_clip = clip.subclip(start_time, end_time)
-        
-        # Write output
-        trimmed_clip.write_videofile(
-            output_path,
-            codec='libx264',
-            audio_codec='aac',
-            verbose=False,
-            logger=None
-        )
-        
-        # Clean up
-        trimmed_clip.close()
-        clip.close()
-        
-        return {
-            "original_duration": clip.duration,
-            "new_duration": end_time - start_time,
-            "start_time": start_time,
-            "end_time": end_time
-        }
+        return ffmpeg_engine.trim(input_path, output_path, start_time, end_time)
         
     except Exception as e:
         logger.error(f"Error trimming video: {str(e)}")
@@ -107,49 +85,10 @@ def trim_video(input_path: str, output_path: str, start_time: float, end_time: f
 
 
 def merge_videos(input_paths: List[str], output_path: str, transition_duration: float = 0.5) -> Dict:
-    """Merge multiple videos with optional transitions"""
+    """Merge multiple videos with optional cross-fade transitions"""
     try:
         logger.info(f"Merging {len(input_paths)} videos")
-        
-        clips = []
-        total_duration = 0
-        
-        for i, path in enumerate(input_paths):
-            clip = mp.VideoFileClip(path)
-            
-            # Add fade transition (except for first clip)
-            if i > 0 and transition_duration > 0:
-                clip = clip.fadein(transition_duration)
-            
-            # Add fade out (except for last clip)
-            if i < len(input_paths) - 1 and transition_duration > 0:
-                clip = clip.fadeout(transition_duration)
-            
-            clips.append(clip)
-            total_duration += clip.duration
-        
-        # Concatenate clips
-        final_clip = mp.concatenate_videoclips(clips)
-        
-        # Write output
-        final_clip.write_videofile(
-            output_path,
-            codec='libx264',
-            audio_codec='aac',
-            verbose=False,
-            logger=None
-        )
-        
-        # Clean up
-        final_clip.close()
-        for clip in clips:
-            clip.close()
-        
-        return {
-            "merged_clips": len(input_paths),
-            "total_duration": total_duration,
-            "transition_duration": transition_duration
-        }
+        return ffmpeg_engine.merge(input_paths, output_path, transition_duration)
         
     except Exception as e:
         logger.error(f"Error merging videos: {str(e)}")
@@ -160,39 +99,7 @@ def resize_video(input_path: str, output_path: str, width: int, height: int, met
     """Resize video to specified dimensions"""
     try:
         logger.info(f"Resizing video to {width}x{height} using {method}")
-        
-        clip = mp.VideoFileClip(input_path)
-        original_size = (clip.w, clip.h)
-        
-        if method == "crop":
-            # Crop to maintain aspect ratio
-            resized_clip = crop(clip, width=width, height=height, 
-                              x_center=clip.w/2, y_center=clip.h/2)
-        elif method == "stretch":
-            # Stretch to exact dimensions
-            resized_clip = resize(clip, newsize=(width, height))
-        else:
-            # Scale maintaining aspect ratio
-            resized_clip = resize(clip, height=height) if clip.h > clip.w else resize(clip, width=width)
-        
-        # Write output
-        resized_clip.write_videofile(
-            output_path,
-            codec='libx264',
-            audio_codec='aac',
-            verbose=False,
-            logger=None
-        )
-        
-        # Clean up
-        resized_clip.close()
-        clip.close()
-        
-        return {
-            "original_size": original_size,
-            "new_size": (resized_clip.w, resized_clip.h),
-            "method": method
-        }
+        return ffmpeg_engine.resize(input_path, output_path, width, height, method)
         
     except Exception as e:
         logger.error(f"Error resizing video: {str(e)}")
@@ -231,6 +138,7 @@ def add_text_overlay(input_path: str, output_path: str, text: str, position: Tup
             output_path,
             codec='libx264',
             audio_codec='aac',
+            threads=ENCODER_THREADS,
             verbose=False,
             logger=None
         )
@@ -257,62 +165,7 @@ def apply_video_filters(input_path: str, output_path: str, filters: Dict) -> Dic
     """Apply various video filters"""
     try:
         logger.info(f"Applying video filters: {list(filters.keys())}")
-        
-        clip = mp.VideoFileClip(input_path)
-        processed_clip = clip
-        
-        applied_filters = []
-        
-        # Brightness adjustment
-        if "brightness" in filters:
-            brightness = filters["brightness"]  # -1.0 to 1.0
-            processed_clip = processed_clip.fx(mp.vfx.colorx, brightness + 1.0)
-            applied_filters.append(f"brightness: {brightness}")
-        
-        # Speed adjustment
-        if "speed" in filters:
-            speed = filters["speed"]  # 0.5 = half speed, 2.0 = double speed
-            processed_clip = processed_clip.fx(mp.vfx.speedx, speed)
-            applied_filters.append(f"speed: {speed}x")
-        
-        # Fade in/out
-        if "fade_in" in filters:
-            fade_in_duration = filters["fade_in"]
-            processed_clip = processed_clip.fadein(fade_in_duration)
-            applied_filters.append(f"fade_in: {fade_in_duration}s")
-        
-        if "fade_out" in filters:
-            fade_out_duration = filters["fade_out"]
-            processed_clip = processed_clip.fadeout(fade_out_duration)
-            applied_filters.append(f"fade_out: {fade_out_duration}s")
-        
-        # Mirror effect
-        if filters.get("mirror_x", False):
-            processed_clip = processed_clip.fx(mp.vfx.mirror_x)
-            applied_filters.append("mirror_x")
-        
-        if filters.get("mirror_y", False):
-            processed_clip = processed_clip.fx(mp.vfx.mirror_y)
-            applied_filters.append("mirror_y")
-        
-        # Write output
-        processed_clip.write_videofile(
-            output_path,
-            codec='libx264',
-            audio_codec='aac',
-            verbose=False,
-            logger=None
-        )
-        
-        # Clean up
-        processed_clip.close()
-        clip.close()
-        
-        return {
-            "applied_filters": applied_filters,
-            "original_duration": clip.duration,
-            "new_duration": processed_clip.duration
-        }
+        return ffmpeg_engine.apply_filters(input_path, output_path, filters)
         
     except Exception as e:
         logger.error(f"Error applying video filters: {str(e)}")
@@ -323,27 +176,7 @@ def extract_audio_from_video(input_path: str, output_path: str) -> Dict:
     """Extract audio from video file"""
     try:
         logger.info("Extracting audio from video")
-        
-        clip = mp.VideoFileClip(input_path)
-        
-        if clip.audio is None:
-            raise ValueError("Video has no audio track")
-        
-        # Extract audio
-        audio = clip.audio
-        audio.write_audiofile(output_path, verbose=False, logger=None)
-        
-        # Get audio properties
-        duration = audio.duration
-        
-        # Clean up
-        audio.close()
-        clip.close()
-        
-        return {
-            "duration": duration,
-            "output_path": output_path
-        }
+        return ffmpeg_engine.extract_audio(input_path, output_path)
         
     except Exception as e:
         logger.error(f"Error extracting audio: {str(e)}")
@@ -355,49 +188,7 @@ def add_background_music(input_path: str, output_path: str, music_path: str,
     """Add background music to video"""
     try:
         logger.info("Adding background music to video")
-        
-        # Load video and music
-        video_clip = mp.VideoFileClip(input_path)
-        music_clip = mp.AudioFileClip(music_path)
-        
-        # Adjust music volume
-        music_clip = music_clip.volumex(volume)
-        
-        # Loop music if needed and video is longer
-        if loop and music_clip.duration < video_clip.duration:
-            music_clip = music_clip.loop(duration=video_clip.duration)
-        elif music_clip.duration > video_clip.duration:
-            music_clip = music_clip.subclip(0, video_clip.duration)
-        
-        # Combine with existing audio if present
-        if video_clip.audio is not None:
-            final_audio = mp.CompositeAudioClip([video_clip.audio, music_clip])
-        else:
-            final_audio = music_clip
-        
-        # Set the audio to the video
-        final_clip = video_clip.set_audio(final_audio)
-        
-        # Write output
-        final_clip.write_videofile(
-            output_path,
-            codec='libx264',
-            audio_codec='aac',
-            verbose=False,
-            logger=None
-        )
-        
-        # Clean up
-        final_clip.close()
-        music_clip.close()
-        video_clip.close()
-        
-        return {
-            "music_duration": music_clip.duration,
-            "video_duration": video_clip.duration,
-            "volume": volume,
-            "looped": loop
-        }
+        return ffmpeg_engine.add_background_music(input_path, output_path, music_path, volume, loop)
         
     except Exception as e:
         logger.error(f"Error adding background music: {str(e)}")
@@ -408,64 +199,7 @@ def create_video_collage(input_paths: List[str], output_path: str, grid_size: Tu
     """Create a video collage with multiple videos in a grid"""
     try:
         logger.info(f"Creating video collage with {len(input_paths)} videos in {grid_size[0]}x{grid_size[1]} grid")
-        
-        if len(input_paths) > grid_size[0] * grid_size[1]:
-            raise ValueError("Too many videos for specified grid size")
-        
-        # Load all video clips
-        clips = [mp.VideoFileClip(path) for path in input_paths]
-        
-        # Find minimum duration
-        min_duration = min(clip.duration for clip in clips)
-        
-        # Resize clips to fit grid
-        grid_width = 1920 // grid_size[1]
-        grid_height = 1080 // grid_size[0]
-        
-        resized_clips = []
-        for clip in clips:
-            resized_clip = resize(clip.subclip(0, min_duration), newsize=(grid_width, grid_height))
-            resized_clips.append(resized_clip)
-        
-        # Arrange clips in grid
-        rows = []
-        for i in range(grid_size[0]):
-            row_clips = []
-            for j in range(grid_size[1]):
-                idx = i * grid_size[1] + j
-                if idx < len(resized_clips):
-                    row_clips.append(resized_clips[idx])
-                else:
-                    # Create black clip for empty slots
-                    black_clip = mp.ColorClip(size=(grid_width, grid_height), color=(0, 0, 0), duration=min_duration)
-                    row_clips.append(black_clip)
-            
-            row = mp.clips_array([row_clips])
-            rows.append(row)
-        
-        # Combine rows
-        final_clip = mp.clips_array(rows)
-        
-        # Write output
-        final_clip.write_videofile(
-            output_path,
-            codec='libx264',
-            audio_codec='aac',
-            verbose=False,
-            logger=None
-        )
-        
-        # Clean up
-        final_clip.close()
-        for clip in clips + resized_clips:
-            clip.close()
-        
-        return {
-            "input_videos": len(input_paths),
-            "grid_size": grid_size,
-            "duration": min_duration,
-            "output_resolution": (1920, 1080)
-        }
+        return ffmpeg_engine.collage(input_paths, output_path, grid_size)
         
     except Exception as e:
         logger.error(f"Error creating video collage: {str(e)}")
@@ -493,7 +227,7 @@ async def trim_video_endpoint(
         logger.info(f"Trimming video: {filename}")
         start_time_processing = datetime.now()
         
-        result = trim_video(input_path, output_path, start_time, end_time)
+        result = await thread_executor.run(trim_video, input_path, output_path, start_time, end_time)
         
         processing_time = (datetime.now() - start_time_processing).total_seconds()
         
@@ -540,7 +274,7 @@ async def merge_videos_endpoint(
         logger.info(f"Merging {len(filenames)} videos")
         start_time = datetime.now()
         
-        result = merge_videos(input_paths, output_path, transition_duration)
+        result = await thread_executor.run(merge_videos, input_paths, output_path, transition_duration)
         
         processing_time = (datetime.now() - start_time).total_seconds()
         
@@ -593,7 +327,7 @@ async def resize_video_endpoint(
         logger.info(f"Resizing video: {filename}")
         start_time = datetime.now()
         
-        result = resize_video(input_path, output_path, width, height, method)
+        result = await thread_executor.run(resize_video, input_path, output_path, width, height, method)
         
         processing_time = (datetime.now() - start_time).total_seconds()
         
@@ -649,7 +383,8 @@ async def add_text_overlay_endpoint(
         logger.info(f"Adding text overlay to video: {filename}")
         start_time = datetime.now()
         
-        result = add_text_overlay(
+        result = await process_executor.run(
+            add_text_overlay,
             input_path, output_path, text, (x_position, y_position),
             duration, font_size, color
         )
@@ -736,7 +471,7 @@ async def apply_filters_endpoint(
         logger.info(f"Applying filters to video: {filename}")
         start_time = datetime.now()
         
-        result = apply_video_filters(input_path, output_path, filters)
+        result = await thread_executor.run(apply_video_filters, input_path, output_path, filters)
         
         processing_time = (datetime.now() - start_time).total_seconds()
         
@@ -779,7 +514,7 @@ async def extract_audio_endpoint(filename: str):
         logger.info(f"Extracting audio from video: {filename}")
         start_time = datetime.now()
         
-        result = extract_audio_from_video(input_path, output_path)
+        result = await thread_executor.run(extract_audio_from_video, input_path, output_path)
         
         processing_time = (datetime.now() - start_time).total_seconds()
         
@@ -834,7 +569,7 @@ async def add_background_music_endpoint(
         logger.info(f"Adding background music to video: {filename}")
         start_time = datetime.now()
         
-        result = add_background_music(input_path, output_path, music_path, volume, loop)
+        result = await thread_executor.run(add_background_music, input_path, output_path, music_path, volume, loop)
         
         processing_time = (datetime.now() - start_time).total_seconds()
         
@@ -890,7 +625,7 @@ async def create_video_collage_endpoint(
         logger.info(f"Creating video collage with {len(filenames)} videos")
         start_time = datetime.now()
         
-        result = create_video_collage(input_paths, output_path, (grid_rows, grid_cols))
+        result = await thread_executor.run(create_video_collage, input_paths, output_path, (grid_rows, grid_cols))
         
         processing_time = (datetime.now() - start_time).total_seconds()
         
@@ -944,21 +679,59 @@ async def process_video_real(request: VideoProcessingRequest):
         )
 
 
-@router.get("/download/{filename}")
-async def download_processed_video(filename: str):
-    """Download processed video file"""
+@router.post("/process/jobs")
+async def queue_video_processing(request: VideoProcessingRequest, priority: int = 0):
+    """
+    Queue the same processing as /process on the job workers
+    
+    Follow ffmpeg progress on ``GET /jobs/{job_id}/events`` (SSE) or ``/jobs/{job_id}/ws``.
+    """
+    input_path = validate_video_file(request.video_filename)
+    
+    try:
+        job = enqueue(
+            "video.process",
+            {
+                "input_path": input_path,
+                "editing_data": request.editing_data,
+                "output_filename": request.output_filename
+            },
+            priority=priority
+        )
+        
+        return JSONResponse(
+            status_code=202,
+            content={
+                "message": "Video processing queued",
+                "job_id": job["job_id"],
+                "status": job["status"],
+                "timestamp": datetime.now().isoformat()
+            }
+        )
+        
+    except Exception as e:
+        logger.error(f"Error queueing video processing: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error queueing video processing: {str(e)}")
+
+
+@router.api_route("/download/{filename}", methods=["GET", "HEAD"])
+async def download_processed_video(filename: str, request: Request):
+    """
+    Download or stream a processed video
+    
+    Supports byte ranges for scrubbing, ETag revalidation, and permanent
+    caching when requested as ``?v=<sha256>`` of the current content.
+    """
     try:
         file_path = Path("processed") / filename
         
-        if not file_path.exists():
+        if Path(filename).name != filename or not file_path.is_file():
             raise HTTPException(status_code=404, detail="File not found")
         
-        return FileResponse(
-            path=str(file_path),
-            filename=filename,
-            media_type="video/mp4"
-        )
+        return await media_response(request, str(file_path), download_name=filename)
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Download failed: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -987,3 +760,15 @@ async def extract_video_thumbnail(filename: str, timestamp: float = 1.0):
     except Exception as e:
         logger.error(f"Thumbnail extraction failed: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/executor-stats")
+async def get_executor_stats():
+    """Worker pool concurrency and queue depth for blocking render/analysis jobs"""
+    return JSONResponse(
+        status_code=200,
+        content={
+            "executors": executor_stats(),
+            "timestamp": datetime.now().isoformat()
+        }
+    )
@@ -0,0 +1,442 @@
+"""
+Result caches for VideoCraft AI Video Editor
+In-memory, on-disk and Redis tiers with size-based least-recently-used eviction
+"""
+import fnmatch
+import os
+import pickle
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+from .config import settings
+from .logging_config import get_logger
+
+logger = get_logger("cache")
+
+
+class MemoryCache:
+    """In-process LRU cache bounded by the pickled size of its values"""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, Tuple[Any, int]]" = OrderedDict()
+        self._size_bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def set(self, key: str, value: Any, size_bytes: Optional[int] = None):
+        if size_bytes is None:
+            size_bytes = len(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+        if size_bytes > self.max_bytes:
+            # Would evict everything else and still not fit
+            return
+
+        with self._lock:
+            self._remove(key)
+            self._entries[key] = (value, size_bytes)
+            self._size_bytes += size_bytes
+            while self._size_bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+
+    def delete(self, key: str):
+        with self._lock:
+            self._remove(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._size_bytes = 0
+
+    def _remove(self, key: str):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._size_bytes -= entry[1]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "size_mb": self._size_bytes / (1024 * 1024),
+                "max_mb": self.max_bytes / (1024 * 1024),
+                "hits": self.hits,
+                "misses": self.misses
+            }
+
+
+class DiskCache:
+    """
+    Pickle-per-entry cache in a directory, bounded by total file size
+
+    Entries are written atomically (temp file + rename) and their mtime is
+    refreshed on every read, so eviction removes the least recently used files.
+    """
+
+    def __init__(self, directory: str, max_bytes: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(directory, exist_ok=True)
+        self._size_bytes = sum(size for _, size, _ in self._scan())
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], f"{key}.pkl")
+
+    def _scan(self):
+        """Yield (path, size, mtime) for every entry on disk"""
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                if not name.endswith(".pkl"):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                yield path, stat.st_size, stat.st_mtime
+
+    def get(self, key: str) -> Optional[Any]:
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                value = pickle.load(f)
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        except Exception as e:
+            logger.warning(f"Discarding unreadable cache entry {path}: {e}")
+            self.delete(key)
+            self.misses += 1
+            return None
+
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        self.hits += 1
+        return value
+
+    def set(self, key: str, value: Any, data: Optional[bytes] = None):
+        if data is None:
+            data = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        if len(data) > self.max_bytes:
+            return
+
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            with self._lock:
+                previous = os.path.getsize(path) if os.path.exists(path) else 0
+                os.replace(tmp_path, path)
+                self._size_bytes += len(data) - previous
+                if self._size_bytes > self.max_bytes:
+                    self._evict(keep=path)
+        except Exception as e:
+            logger.error(f"Failed to write cache entry {path}: {e}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def delete(self, key: str):
+        path = self._path(key)
+        with self._lock:
+            try:
+                size = os.path.getsize(path)
+                os.remove(path)
+                self._size_bytes -= size
+            except OSError:
+                pass
+
+    def clear(self):
+        with self._lock:
+            for path, _, _ in list(self._scan()):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+            self._size_bytes = 0
+
+    def _evict(self, keep: Optional[str] = None):
+        """Remove least recently used files until the cache fits its budget"""
+        entries = sorted(self._scan(), key=lambda entry: entry[2])
+        self._size_bytes = sum(size for _, size, _ in entries)
+        for path, size, _ in entries:
+            if self._size_bytes <= self.max_bytes:
+                break
+            if path == keep:
+                continue
+            try:
+                os.remove(path)
+                self._size_bytes -= size
+            except OSError:
+                pass
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "directory": self.directory,
+            "size_mb": self._size_bytes / (1024 * 1024),
+            "max_mb": self.max_bytes / (1024 * 1024),
+            "hits": self.hits,
+            "misses": self.misses
+        }
+
+
+class InMemoryRedis:
+    """
+    Minimal in-process stand-in for a Redis client
+
+    Implements the subset of redis-py used by RedisCache (get, set with
+    expiry, delete, scan_iter, ping, flushdb) with bytes values, so the
+    Redis tier can run without a server. Selected with a ``memory://``
+    REDIS_URL.
+    """
+
+    def __init__(self):
+        self._data: Dict[str, Tuple[bytes, Optional[float]]] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _name(name: Any) -> str:
+        return name.decode() if isinstance(name, bytes) else str(name)
+
+    def _live(self, name: str) -> Optional[bytes]:
+        entry = self._data.get(name)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if expires_at is not None and expires_at <= time.monotonic():
+            del self._data[name]
+            return None
+        return value
+
+    def ping(self) -> bool:
+        return True
+
+    def get(self, name: Any) -> Optional[bytes]:
+        with self._lock:
+            return self._live(self._name(name))
+
+    def set(self, name: Any, value: Any, ex: Optional[int] = None, nx: bool = False) -> Optional[bool]:
+        name = self._name(name)
+        if isinstance(value, str):
+            value = value.encode()
+        with self._lock:
+            if nx and self._live(name) is not None:
+                return None
+            expires_at = time.monotonic() + ex if ex else None
+            self._data[name] = (bytes(value), expires_at)
+            return True
+
+    def delete(self, *names: Any) -> int:
+        removed = 0
+        with self._lock:
+            for name in names:
+                if self._live(self._name(name)) is not None:
+                    del self._data[self._name(name)]
+                    removed += 1
+        return removed
+
+    def exists(self, *names: Any) -> int:
+        with self._lock:
+            return sum(1 for name in names if self._live(self._name(name)) is not None)
+
+    def scan_iter(self, match: Optional[str] = None, count: Optional[int] = None) -> Iterator[bytes]:
+        with self._lock:
+            names = [name for name in list(self._data) if self._live(name) is not None]
+        for name in names:
+            if match is None or fnmatch.fnmatchcase(name, match):
+                yield name.encode()
+
+    def flushdb(self) -> bool:
+        with self._lock:
+            self._data.clear()
+        return True
+
+
+class RedisCache:
+    """
+    Cache tier in Redis, shared by every worker and replica pointing at the same server
+
+    Entries expire after ttl_seconds; size-based eviction is left to the
+    server's maxmemory policy. Redis errors are logged and treated as misses
+    so an outage degrades to recomputation instead of failed requests.
+    """
+
+    def __init__(self, client: Any, namespace: str, ttl_seconds: Optional[int] = None):
+        self.client = client
+        self.prefix = f"videocraft:{namespace}:"
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+
+    def get(self, key: str) -> Optional[Any]:
+        try:
+            data = self.client.get(self.prefix + key)
+        except Exception as e:
+            self.errors += 1
+            logger.warning(f"Redis cache read failed: {e}")
+            return None
+
+        if data is None:
+            self.misses += 1
+            return None
+        try:
+            value = pickle.loads(data)
+        except Exception as e:
+            logger.warning(f"Discarding unreadable Redis cache entry {key}: {e}")
+            self.delete(key)
+            self.misses += 1
+            return None
+        self.hits += 1
+        return value
+
+    def set(self, key: str, value: Any, data: Optional[bytes] = None):
+        if data is None:
+            data = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        try:
+            self.client.set(self.prefix + key, data, ex=self.ttl_seconds)
+        except Exception as e:
+            self.errors += 1
+            logger.warning(f"Redis cache write failed: {e}")
+
+    def delete(self, key: str):
+        try:
+            self.client.delete(self.prefix + key)
+        except Exception as e:
+            self.errors += 1
+            logger.warning(f"Redis cache delete failed: {e}")
+
+    def clear(self):
+        try:
+            names = list(self.client.scan_iter(match=self.prefix + "*"))
+            if names:
+                self.client.delete(*names)
+        except Exception as e:
+            self.errors += 1
+            logger.warning(f"Redis cache clear failed: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "prefix": self.prefix,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "errors": self.errors
+        }
+
+
+class TieredCache:
+    """Memory tier in front of a shared disk or Redis tier; shared hits are promoted to memory"""
+
+    def __init__(self, memory: MemoryCache, backing: Optional[Any] = None):
+        self.memory = memory
+        self.backing = backing
+
+    def get(self, key: str) -> Optional[Any]:
+        value = self.memory.get(key)
+        if value is not None or self.backing is None:
+            return value
+
+        value = self.backing.get(key)
+        if value is not None:
+            self.memory.set(key, value)
+        return value
+
+    def set(self, key: str, value: Any):
+        data = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        self.memory.set(key, value, size_bytes=len(data))
+        if self.backing is not None:
+            self.backing.set(key, value, data=data)
+
+    def delete(self, key: str):
+        self.memory.delete(key)
+        if self.backing is not None:
+            self.backing.delete(key)
+
+    def clear(self):
+        self.memory.clear()
+        if self.backing is not None:
+            self.backing.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "memory": self.memory.stats(),
+            "backing": self.backing.stats() if self.backing is not None else None
+        }
+
+
+_redis_clients: Dict[str, Any] = {}
+_redis_clients_lock = threading.Lock()
+
+
+def get_redis_client(url: Optional[str] = None) -> Optional[Any]:
+    """
+    Shared Redis client for url (default settings.REDIS_URL), or None if unreachable
+
+    ``memory://`` URLs return a process-wide InMemoryRedis.
+    """
+    url = url or settings.REDIS_URL
+    with _redis_clients_lock:
+        if url in _redis_clients:
+            return _redis_clients[url]
+
+        client = None
+        if url.startswith("memory://"):
+            client = InMemoryRedis()
+        else:
+            try:
+                import redis
+
+                client = redis.Redis.from_url(url, socket_timeout=settings.REDIS_SOCKET_TIMEOUT)
+                client.ping()
+                logger.info(f"Connected to Redis cache at {url}")
+            except Exception as e:
+                logger.warning(f"Redis cache unavailable at {url}, using local cache: {e}")
+                client = None
+
+        _redis_clients[url] = client
+        return client
+
+
+def create_cache(namespace: str, memory_mb: int, disk_mb: int) -> TieredCache:
+    """
+    Build the cache for a namespace according to settings.CACHE_BACKEND
+
+    Every backend keeps a per-process memory tier in front; ``disk`` adds a
+    local on-disk tier under CACHE_DIR/namespace, ``redis`` adds a tier shared
+    through REDIS_URL (falling back to disk when Redis is unreachable) and
+    ``memory`` uses the memory tier alone.
+    """
+    memory = MemoryCache(memory_mb * 1024 * 1024)
+    backend = settings.CACHE_BACKEND.lower()
+
+    if backend == "memory":
+        return TieredCache(memory)
+
+    if backend == "redis":
+        client = get_redis_client()
+        if client is not None:
+            return TieredCache(memory, RedisCache(client, namespace, settings.CACHE_TTL_SECONDS))
+    elif backend != "disk":
+        logger.warning(f"Unknown CACHE_BACKEND {settings.CACHE_BACKEND!r}, using disk")
+
+    return TieredCache(memory, DiskCache(os.path.join(settings.CACHE_DIR, namespace), disk_mb * 1024 * 1024))
@@ -40,24 +40,53 @@ class Settings:
         ".mp3", ".wav", ".aac", ".flac", ".ogg", 
         ".m4a", ".wma", ".aiff", ".au"
     ]
+    UPLOAD_PART_MAX_SIZE: int = int(os.getenv("UPLOAD_PART_MAX_SIZE", str(64 * 1024 * 1024)))  # Per request; stays under proxy body caps
+    UPLOAD_SESSION_TTL_HOURS: int = int(os.getenv("UPLOAD_SESSION_TTL_HOURS", "24"))  # Unfinished resumable uploads are dropped after this
+    UPLOAD_PART_LEASE_SECONDS: int = int(os.getenv("UPLOAD_PART_LEASE_SECONDS", "300"))  # In-flight part reservations idle this long are reclaimed
     
     # Storage Paths
     UPLOAD_DIR: str = "uploads"
     PROCESSED_DIR: str = "processed"
     TEMP_DIR: str = "temp"
     STATIC_DIR: str = "static"
+    UPLOAD_SESSION_DIR: str = os.getenv("UPLOAD_SESSION_DIR", "temp/upload_sessions")
+    BLOB_DIR: str = os.getenv("BLOB_DIR", "uploads/.blobs")  # Content-addressed upload bytes; keep on the UPLOAD_DIR filesystem for hard links
+    CACHE_DIR: str = os.getenv("CACHE_DIR", "cache")
+    
+    # Cache Settings
+    CACHE_BACKEND: str = os.getenv("CACHE_BACKEND", "disk")  # memory, disk, redis
+    CACHE_TTL_SECONDS: int = int(os.getenv("CACHE_TTL_SECONDS", str(7 * 24 * 3600)))  # Redis entry lifetime
+    ANALYSIS_CACHE_MEMORY_MB: int = int(os.getenv("ANALYSIS_CACHE_MEMORY_MB", "256"))
+    ANALYSIS_CACHE_DISK_MB: int = int(os.getenv("ANALYSIS_CACHE_DISK_MB", "2048"))
+    METADATA_CACHE_MEMORY_MB: int = int(os.getenv("METADATA_CACHE_MEMORY_MB", "16"))
+    METADATA_CACHE_DISK_MB: int = int(os.getenv("METADATA_CACHE_DISK_MB", "64"))
+    MEDIA_INDEX_CACHE_MEMORY_MB: int = int(os.getenv("MEDIA_INDEX_CACHE_MEMORY_MB", "32"))
+    MEDIA_INDEX_CACHE_DISK_MB: int = int(os.getenv("MEDIA_INDEX_CACHE_DISK_MB", "512"))
+    RECOMMENDATION_CACHE_MEMORY_MB: int = int(os.getenv("RECOMMENDATION_CACHE_MEMORY_MB", "16"))
+    RECOMMENDATION_CACHE_DISK_MB: int = int(os.getenv("RECOMMENDATION_CACHE_DISK_MB", "64"))
     
     # AI Model Settings
     HUGGINGFACE_CACHE_DIR: str = os.getenv("HF_CACHE_DIR", "./models_cache")
     DEVICE: str = "cuda" if os.getenv("USE_GPU", "False").lower() == "true" else "cpu"
+    MODEL_MEMORY_BUDGET_MB: int = int(os.getenv("MODEL_MEMORY_BUDGET_MB", "6144"))  # LRU eviction above this
+    WARMUP_MODELS: bool = os.getenv("WARMUP_MODELS", "False").lower() == "true"  # Import heavy stacks in the background at startup
+    WARMUP_MODULES: List[str] = [
+        name.strip() for name in os.getenv("WARMUP_MODULES", "torch,transformers,librosa").split(",") if name.strip()
+    ]
     
     # Video Processing Settings
     DEFAULT_VIDEO_QUALITY: str = "high"  # low, medium, high, ultra
     MAX_VIDEO_DURATION: int = 3600  # 1 hour in seconds
+    SMART_CUT_ENABLED: bool = os.getenv("SMART_CUT_ENABLED", "True").lower() == "true"  # Copy untouched GOPs on trim/cut-only exports
+    FRAME_SEEK_THRESHOLD: int = int(os.getenv("FRAME_SEEK_THRESHOLD", "120"))  # Seek instead of grab() beyond this gap
     
     # Audio Processing Settings
     AUDIO_SAMPLE_RATE: int = 16000
-    AUDIO_CHUNK_DURATION: int = 30  # seconds
+    AUDIO_CHUNK_DURATION: int = 30  # seconds; target length of transcription chunks, cut at pauses
+    AUDIO_CANONICAL_RATE: int = int(os.getenv("AUDIO_CANONICAL_RATE", "22050"))  # Rate of the shared decode; lower rates are resampled from it
+    AUDIO_CACHE_DIR: str = os.getenv("AUDIO_CACHE_DIR", "cache/audio")
+    AUDIO_CACHE_DISK_MB: int = int(os.getenv("AUDIO_CACHE_DISK_MB", "4096"))
+    AUDIO_STREAM_BLOCK_SECONDS: int = int(os.getenv("AUDIO_STREAM_BLOCK_SECONDS", "60"))  # Analysis block length; bounds memory for long recordings
     
     # Background Removal Settings
     BACKGROUND_MODEL: str = "u2net"  # u2net, silueta, isnet-general-use
@@ -79,7 +108,8 @@ class Settings:
     DATABASE_URL: str = os.getenv("DATABASE_URL", "sqlite:///./videocraft.db")
     
     # Redis Settings (for caching)
-    REDIS_URL: str = os.getenv("REDIS_URL", "redis://localhost:6379")
+    REDIS_URL: str = os.getenv("REDIS_URL", "redis://localhost:6379")  # memory:// for an in-process fake
+    REDIS_SOCKET_TIMEOUT: float = float(os.getenv("REDIS_SOCKET_TIMEOUT", "0.5"))
     
     # Security Settings
     SECRET_KEY: str = os.getenv("SECRET_KEY", "your-secret-key-change-in-production")
@@ -92,6 +122,19 @@ class Settings:
     # Performance Settings
     MAX_WORKERS: int = int(os.getenv("MAX_WORKERS", "4"))
     BATCH_SIZE: int = int(os.getenv("BATCH_SIZE", "8"))
+    THREAD_POOL_WORKERS: int = int(os.getenv("THREAD_POOL_WORKERS", str(MAX_WORKERS)))  # Concurrent blocking jobs off the event loop
+    PROCESS_POOL_WORKERS: int = int(os.getenv("PROCESS_POOL_WORKERS", "2"))  # Concurrent pure-Python renders (moviepy)
+    TRANSCRIPTION_WORKERS: int = int(os.getenv("TRANSCRIPTION_WORKERS", "2"))  # Whisper worker processes, each with its own model copy
+    PARALLEL_ENCODE_ENABLED: bool = os.getenv("PARALLEL_ENCODE_ENABLED", "True").lower() == "true"
+    PARALLEL_ENCODE_MIN_DURATION: int = int(os.getenv("PARALLEL_ENCODE_MIN_DURATION", "300"))  # seconds of kept footage
+    PARALLEL_ENCODE_CHUNK_SECONDS: int = int(os.getenv("PARALLEL_ENCODE_CHUNK_SECONDS", "60"))
+    
+    # Job Queue Settings
+    JOB_WORKERS: int = int(os.getenv("JOB_WORKERS", "2"))  # Worker processes executing queued jobs
+    JOB_POLL_INTERVAL: float = float(os.getenv("JOB_POLL_INTERVAL", "1.0"))  # seconds between queue polls when idle
+    JOB_MAX_ATTEMPTS: int = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+    JOB_RETRY_BACKOFF: float = float(os.getenv("JOB_RETRY_BACKOFF", "5.0"))  # seconds, doubled per attempt
+    JOB_STALE_SECONDS: int = int(os.getenv("JOB_STALE_SECONDS", "300"))  # Requeue running jobs without a heartbeat
     
     # Logging Settings
     LOG_LEVEL: str = os.getenv("LOG_LEVEL", "INFO")
@@ -0,0 +1,128 @@
+"""
+Bounded executors for blocking work
+Keeps CPU-bound rendering and inference off the asyncio event loop so one long
+job cannot stall every other request
+"""
+import asyncio
+import functools
+import multiprocessing
+import threading
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+from .config import settings
+from .logging_config import get_logger
+
+logger = get_logger("executors")
+
+
+class BoundedExecutor:
+    """
+    Fixed-size worker pool with queue-depth accounting
+
+    ``kind="thread"`` suits work that releases the GIL (ffmpeg subprocesses,
+    numpy, OpenCV, torch, librosa); ``kind="process"`` suits pure-Python work
+    such as moviepy compositing. Process-pool callables and their arguments
+    must be picklable, i.e. module-level functions.
+    """
+
+    def __init__(self, name: str, kind: str, max_workers: int):
+        if kind not in ("thread", "process"):
+            raise ValueError(f"Unknown executor kind: {kind}")
+        self.name = name
+        self.kind = kind
+        self.max_workers = max(1, max_workers)
+        self._executor: Optional[Executor] = None
+        self._lock = threading.Lock()
+        # Created on first use so it binds to the serving event loop
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._queued = 0
+        self._running = 0
+        self._completed = 0
+        self._failed = 0
+        self._max_queue_depth = 0
+        self._total_wait = 0.0
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    if self.kind == "thread":
+                        self._executor = ThreadPoolExecutor(
+                            max_workers=self.max_workers,
+                            thread_name_prefix=self.name
+                        )
+                    else:
+                        # spawn avoids forking a parent that holds torch/uvicorn threads
+                        self._executor = ProcessPoolExecutor(
+                            max_workers=self.max_workers,
+                            mp_context=multiprocessing.get_context("spawn")
+                        )
+                    logger.info(f"Started {self.kind} pool '{self.name}' with {self.max_workers} workers")
+        return self._executor
+
+    async def run(self, fn: Callable, *args, **kwargs) -> Any:
+        """Run fn(*args, **kwargs) on the pool and await its result"""
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_workers)
+
+        submitted_at = time.monotonic()
+        self._queued += 1
+        self._max_queue_depth = max(self._max_queue_depth, self._queued)
+        if self._queued > 1 and self._semaphore.locked():
+            logger.info(f"Executor '{self.name}' busy: {self._queued} tasks waiting for {self.max_workers} workers")
+
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self._queued -= 1
+
+        self._running += 1
+        self._total_wait += time.monotonic() - submitted_at
+        try:
+            loop = asyncio.get_running_loop()
+            result = await loop.run_in_executor(self._get_executor(), functools.partial(fn, *args, **kwargs))
+        except Exception:
+            self._failed += 1
+            raise
+        finally:
+            self._running -= 1
+            self._semaphore.release()
+
+        self._completed += 1
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        started = self._completed + self._failed + self._running
+        return {
+            "kind": self.kind,
+            "max_workers": self.max_workers,
+            "running": self._running,
+            "queue_depth": self._queued,
+            "max_queue_depth": self._max_queue_depth,
+            "completed": self._completed,
+            "failed": self._failed,
+            "avg_wait_seconds": self._total_wait / started if started else 0.0
+        }
+
+    def shutdown(self, wait: bool = True):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait)
+
+
+# GIL-releasing work: ffmpeg subprocesses, OpenCV, numpy, torch and librosa inference
+thread_executor = BoundedExecutor("media-thread", "thread", settings.THREAD_POOL_WORKERS)
+
+# Pure-Python work that would otherwise hold the GIL, such as moviepy compositing
+process_executor = BoundedExecutor("media-process", "process", settings.PROCESS_POOL_WORKERS)
+
+
+def executor_stats() -> Dict[str, Dict[str, Any]]:
+    """Concurrency and queue-depth metrics for every pool"""
+    return {
+        thread_executor.name: thread_executor.stats(),
+        process_executor.name: process_executor.stats()
+    }
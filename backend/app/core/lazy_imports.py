@@ -0,0 +1,96 @@
+"""
+Lazy imports for heavy optional dependencies
+Keeps torch, transformers, whisper, librosa, mediapipe and friends out of the
+import path until an endpoint actually touches them, with optional warm-up
+"""
+import importlib
+import importlib.util
+import threading
+import time
+from types import ModuleType
+from typing import Any, Iterable, List
+
+from .config import settings
+from .logging_config import get_logger
+
+logger = get_logger("lazy_imports")
+
+
+class LazyModule(ModuleType):
+    """
+    Module proxy that imports the real module on first attribute access
+
+    ``torch = LazyModule("torch")`` at module level costs nothing; the first
+    ``torch.tensor(...)`` performs the import. Import errors surface at that
+    point, exactly where a top-level import would have failed.
+    """
+
+    def __init__(self, name: str):
+        super().__init__(name)
+        self._lazy_name = name
+        self._lazy_module = None
+        self._lazy_lock = threading.Lock()
+
+    def _load(self) -> ModuleType:
+        if self._lazy_module is None:
+            with self._lazy_lock:
+                if self._lazy_module is None:
+                    start = time.time()
+                    module = importlib.import_module(self._lazy_name)
+                    logger.info(f"Imported {self._lazy_name} in {time.time() - start:.2f}s")
+                    self._lazy_module = module
+        return self._lazy_module
+
+    @property
+    def is_loaded(self) -> bool:
+        return self._lazy_module is not None
+
+    def __getattr__(self, attr: str) -> Any:
+        # Only reached for attributes not set in __init__
+        return getattr(self._load(), attr)
+
+    def __dir__(self) -> List[str]:
+        return dir(self._load())
+
+    def __repr__(self) -> str:
+        state = "loaded" if self.is_loaded else "not loaded"
+        return f"<LazyModule {self._lazy_name!r} ({state})>"
+
+
+def lazy_import(name: str) -> LazyModule:
+    """Return a LazyModule proxy for name"""
+    return LazyModule(name)
+
+
+def module_available(name: str) -> bool:
+    """Check that a module is installed without importing it"""
+    try:
+        return importlib.util.find_spec(name) is not None
+    except (ImportError, ValueError):
+        return False
+
+
+def _warm_up(module_names: Iterable[str]):
+    for name in module_names:
+        try:
+            importlib.import_module(name)
+        except Exception as e:
+            logger.warning(f"Warm-up import of {name} failed: {e}")
+    logger.info("Model stack warm-up finished")
+
+
+def start_warmup(module_names: Iterable[str] = None) -> threading.Thread:
+    """
+    Import heavy modules on a background thread so the first request does not pay for them
+
+    Args:
+        module_names: Modules to import; defaults to settings.WARMUP_MODULES
+
+    Returns:
+        The started daemon thread
+    """
+    names = list(module_names if module_names is not None else settings.WARMUP_MODULES)
+    logger.info(f"Warming up {', '.join(names)} in the background")
+    thread = threading.Thread(target=_warm_up, args=(names,), name="model-warmup", daemon=True)
+    thread.start()
+    return thread
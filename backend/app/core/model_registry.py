@@ -0,0 +1,240 @@
+"""
+Process-wide AI model registry for VideoCraft AI Video Editor
+Loads models on first use, shares them by model id and evicts least-recently-used
+models when resident memory exceeds the configured budget
+"""
+import gc
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterator, Optional
+
+from .config import settings
+from .logging_config import get_logger
+
+logger = get_logger("model_registry")
+
+
+@dataclass
+class ModelEntry:
+    """A resident model and its bookkeeping"""
+    model_id: str
+    model: Any
+    size_bytes: int
+    loaded_at: float = field(default_factory=time.time)
+    last_used: float = field(default_factory=time.time)
+    ref_count: int = 0
+
+
+def _process_rss_bytes() -> int:
+    """Resident set size of this process, or 0 where /proc is unavailable"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError, IndexError):
+        return 0
+
+
+def estimate_model_bytes(model: Any, _seen: Optional[set] = None) -> Optional[int]:
+    """
+    Estimate the memory held by a model object
+
+    Understands torch modules, HuggingFace pipelines (via ``.model``) and dicts
+    of those, such as ``{"processor": ..., "model": ...}``. Returns None when
+    nothing measurable is found.
+    """
+    seen = _seen if _seen is not None else set()
+    if model is None or id(model) in seen:
+        return None
+    seen.add(id(model))
+
+    if isinstance(model, dict):
+        sizes = [estimate_model_bytes(value, seen) for value in model.values()]
+        sizes = [size for size in sizes if size is not None]
+        return sum(sizes) if sizes else None
+
+    if hasattr(model, "parameters") and hasattr(model, "buffers"):
+        try:
+            total = sum(p.numel() * p.element_size() for p in model.parameters())
+            total += sum(b.numel() * b.element_size() for b in model.buffers())
+            return total
+        except Exception:
+            return None
+
+    inner = getattr(model, "model", None)
+    if inner is not None and inner is not model:
+        return estimate_model_bytes(inner, seen)
+
+    return None
+
+
+class ModelRegistry:
+    """
+    Shared model cache keyed by model id
+
+    Callers pass a loader alongside the id; the loader runs only on the first
+    request for that id, and concurrent requests for the same id wait for that
+    single load. Models in use can be pinned with ``acquire()`` so eviction
+    never drops a model out from under a running analysis.
+    """
+
+    def __init__(self, memory_budget_bytes: int):
+        self.memory_budget_bytes = memory_budget_bytes
+        self._entries: "OrderedDict[str, ModelEntry]" = OrderedDict()
+        self._known_sizes: Dict[str, int] = {}
+        self._load_locks: Dict[str, threading.Lock] = {}
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def resident_bytes(self) -> int:
+        with self._lock:
+            return sum(entry.size_bytes for entry in self._entries.values())
+
+    def is_loaded(self, model_id: str) -> bool:
+        with self._lock:
+            return model_id in self._entries
+
+    def get(self, model_id: str, loader: Callable[[], Any]) -> Any:
+        """Return the model for model_id, loading it with loader on first use"""
+        with self._lock:
+            entry = self._touch(model_id)
+            if entry is not None:
+                self.hits += 1
+                return entry.model
+            load_lock = self._load_locks.setdefault(model_id, threading.Lock())
+
+        with load_lock:
+            # Another thread may have finished loading while we waited
+            with self._lock:
+                entry = self._touch(model_id)
+                if entry is not None:
+                    self.hits += 1
+                    return entry.model
+                self.misses += 1
+
+                # Make room up front when we already know how big this model is
+                known_size = self._known_sizes.get(model_id)
+                if known_size:
+                    self._evict_until_fits(known_size)
+
+            logger.info(f"Loading model {model_id}")
+            rss_before = _process_rss_bytes()
+            model = loader()
+            size_bytes = estimate_model_bytes(model)
+            if size_bytes is None:
+                size_bytes = max(0, _process_rss_bytes() - rss_before)
+
+            with self._lock:
+                self._entries[model_id] = ModelEntry(model_id=model_id, model=model, size_bytes=size_bytes)
+                self._known_sizes[model_id] = size_bytes
+                logger.info(
+                    f"Model {model_id} resident ({size_bytes / (1024 * 1024):.0f} MB, "
+                    f"{self.resident_bytes / (1024 * 1024):.0f} MB total)"
+                )
+                self._evict_until_fits(0, keep=model_id)
+
+            return model
+
+    @contextmanager
+    def acquire(self, model_id: str, loader: Callable[[], Any]) -> Iterator[Any]:
+        """Pin a model for the duration of a block so it cannot be evicted"""
+        while True:
+            model = self.get(model_id, loader)
+            with self._lock:
+                entry = self._entries.get(model_id)
+                # Retry if the model was evicted between loading and pinning
+                if entry is not None and entry.model is model:
+                    entry.ref_count += 1
+                    break
+        try:
+            yield model
+        finally:
+            with self._lock:
+                entry = self._entries.get(model_id)
+                if entry is not None and entry.ref_count > 0:
+                    entry.ref_count -= 1
+                    entry.last_used = time.time()
+
+    def evict(self, model_id: str) -> bool:
+        """Drop a model if it is resident and not pinned"""
+        with self._lock:
+            entry = self._entries.get(model_id)
+            if entry is None or entry.ref_count > 0:
+                return False
+            del self._entries[model_id]
+            self.evictions += 1
+
+        logger.info(f"Evicted model {model_id} ({entry.size_bytes / (1024 * 1024):.0f} MB)")
+        del entry
+        self._release_memory()
+        return True
+
+    def clear(self):
+        """Evict every unpinned model"""
+        with self._lock:
+            model_ids = list(self._entries)
+        for model_id in model_ids:
+            self.evict(model_id)
+
+    def stats(self) -> Dict[str, Any]:
+        """Registry state for health and metrics endpoints"""
+        with self._lock:
+            return {
+                "memory_budget_mb": self.memory_budget_bytes / (1024 * 1024),
+                "resident_mb": self.resident_bytes / (1024 * 1024),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "models": [
+                    {
+                        "model_id": entry.model_id,
+                        "size_mb": entry.size_bytes / (1024 * 1024),
+                        "ref_count": entry.ref_count,
+                        "idle_seconds": time.time() - entry.last_used
+                    }
+                    for entry in self._entries.values()
+                ]
+            }
+
+    def _touch(self, model_id: str) -> Optional[ModelEntry]:
+        entry = self._entries.get(model_id)
+        if entry is not None:
+            entry.last_used = time.time()
+            self._entries.move_to_end(model_id)
+        return entry
+
+    def _evict_until_fits(self, incoming_bytes: int, keep: Optional[str] = None):
+        """Evict least-recently-used unpinned models until incoming_bytes fits the budget"""
+        while self.resident_bytes + incoming_bytes > self.memory_budget_bytes:
+            victim = next(
+                (
+                    model_id for model_id, entry in self._entries.items()
+                    if entry.ref_count == 0 and model_id != keep
+                ),
+                None
+            )
+            if victim is None:
+                logger.warning(
+                    f"Model memory budget exceeded ({self.resident_bytes / (1024 * 1024):.0f} MB resident) "
+                    "but every other model is in use"
+                )
+                return
+            self.evict(victim)
+
+    @staticmethod
+    def _release_memory():
+        gc.collect()
+        torch = sys.modules.get("torch")
+        if torch is not None and torch.cuda.is_available():
+            torch.cuda.empty_cache()
+
+
+# Create global model registry instance
+model_registry = ModelRegistry(settings.MODEL_MEMORY_BUDGET_MB * 1024 * 1024)
@@ -172,3 +172,33 @@ class UserSession(Base):
     
     # Relationships
     user = relationship("User")
+
+
+class Job(Base):
+    """Queued render/analysis job executed by the worker pool"""
+    __tablename__ = "jobs"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    job_id = Column(String(36), unique=True, index=True, default=lambda: str(uuid.uuid4()))
+    
+    # Work definition
+    task = Column(String(100), nullable=False, index=True)  # Registered task name
+    payload = Column(JSON, nullable=False)  # Keyword arguments for the task
+    priority = Column(Integer, default=0, index=True)  # Higher runs first
+    
+    # Execution state
+    status = Column(String(20), default="queued", index=True)  # queued, running, completed, failed, cancelled
+    progress = Column(Integer, default=0)  # Percentage (0-100)
+    result = Column(JSON)
+    error_message = Column(Text)
+    attempts = Column(Integer, default=0)
+    max_attempts = Column(Integer, default=1)
+    cancel_requested = Column(Boolean, default=False)
+    worker_id = Column(String(100))
+    
+    # Timestamps
+    created_at = Column(DateTime, default=datetime.utcnow)
+    run_after = Column(DateTime, default=datetime.utcnow, index=True)  # Retry backoff
+    started_at = Column(DateTime)
+    heartbeat_at = Column(DateTime)  # Refreshed on progress; stale running jobs are requeued
+    completed_at = Column(DateTime)
@@ -4,11 +4,16 @@ Replaces mock analysis with actual AI processing
 """
 import cv2
 import numpy as np
-from typing import Dict, List, Any, Optional
+from typing import Dict, Iterator, List, Any, Optional
 from datetime import datetime
-import asyncio
 
+from ..core.config import settings
+from ..core.lazy_imports import module_available
 from ..core.logging_config import get_logger
+from ..core.model_registry import model_registry
+from .frame_sampler import sample_frames
+from .media_metadata import media_metadata
+from .model_loaders import DETR_MODEL_ID, RESNET_MODEL_ID, load_detr, load_resnet
 
 logger = get_logger("ai_analysis")
 
@@ -16,51 +21,32 @@ logger = get_logger("ai_analysis")
 class RealAIAnalysisService:
     """Real AI analysis using pre-trained models"""
     
+    # Bump when analysis output changes so cached results are not reused
+    ANALYSIS_VERSION = f"2:{DETR_MODEL_ID}:{RESNET_MODEL_ID}"
+    
     def __init__(self):
-        self.models = {}
         self.models_available = False
         self._initialize_models()
     
     def _initialize_models(self):
-        """Initialize AI models for analysis"""
+        """Check that AI models can be loaded; the models themselves load on first use"""
         try:
-            logger.info("Attempting to initialize AI models...")
-            
-            # Try to import and initialize models
-            try:
-                from transformers import pipeline
-                
-                # Object detection model
-                self.models['object_detection'] = pipeline(
-                    "object-detection",
-                    model="facebook/detr-resnet-50",
-                    return_tensors="pt"
-                )
-                
-                # Image classification for scene detection
-                self.models['scene_classification'] = pipeline(
-                    "image-classification",
-                    model="microsoft/resnet-50"
-                )
-                
-                self.models_available = True
-                logger.info("AI models initialized successfully")
-                
-            except ImportError as e:
-                logger.warning(f"HuggingFace transformers not available: {e}")
-                self.models_available = False
-            except Exception as e:
-                logger.warning(f"AI models could not be loaded: {e}")
-                self.models_available = False
+            self.models_available = module_available("transformers")
+            if self.models_available:
+                logger.info("HuggingFace transformers available, models will load on first use")
+            else:
+                logger.warning("HuggingFace transformers not available")
             
         except Exception as e:
             logger.error(f"Failed to initialize AI models: {str(e)}")
             self.models_available = False
     
-    async def analyze_video(self, video_path: str, analysis_types: Optional[List[str]] = None) -> Dict[str, Any]:
+    def analyze_video(self, video_path: str, analysis_types: Optional[List[str]] = None) -> Dict[str, Any]:
         """
         Perform comprehensive AI analysis on video
         
+        Blocking (frame decoding and model inference); run it off the event loop.
+        
         Args:
             video_path: Path to video file
             analysis_types: List of analysis types to perform
@@ -76,7 +62,7 @@ class RealAIAnalysisService:
             start_time = datetime.now()
             
             # Extract frames for analysis
-            frames = await self._extract_frames(video_path, max_frames=30)
+            frames = self._extract_frames(video_path, max_frames=30)
             
             if not frames:
                 raise Exception("No frames could be extracted from video")
@@ -91,21 +77,25 @@ class RealAIAnalysisService:
             
             # Perform different types of analysis
             if 'objects' in analysis_types:
-                analysis_results['object_detection'] = await self._analyze_objects(frames)
+                analysis_results['object_detection'] = self._analyze_objects(frames)
             
             if 'scenes' in analysis_types:
-                analysis_results['scene_analysis'] = await self._analyze_scenes(frames)
+                analysis_results['scene_analysis'] = self._analyze_scenes(frames)
             
             if 'emotions' in analysis_types:
-                analysis_results['emotion_analysis'] = await self._analyze_emotions(frames)
+                analysis_results['emotion_analysis'] = self._analyze_emotions(frames)
             
             if 'motion' in analysis_types:
-                analysis_results['motion_analysis'] = await self._analyze_motion(frames)
+                analysis_results['motion_analysis'] = self._analyze_motion(frames)
             
             # Calculate processing time
             processing_time = (datetime.now() - start_time).total_seconds()
             analysis_results['processing_time_seconds'] = processing_time
             
+            # Mock data stood in for a model that is missing or failed to load
+            if any(isinstance(value, dict) and value.get('fallback') for value in analysis_results.values()):
+                analysis_results['fallback'] = True
+            
             # Generate summary insights
             analysis_results['insights'] = self._generate_insights(analysis_results)
             
@@ -124,32 +114,13 @@ class RealAIAnalysisService:
                 'fallback_analysis': self._generate_fallback_analysis(video_path)
             }
     
-    async def _extract_frames(self, video_path: str, max_frames: int = 30) -> List[np.ndarray]:
+    def _extract_frames(self, video_path: str, max_frames: int = 30) -> List[np.ndarray]:
         """Extract frames from video for analysis"""
         frames = []
         
         try:
-            cap = cv2.VideoCapture(video_path)
-            total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
-            fps = cap.get(cv2.CAP_PROP_FPS)
-            
-            # Calculate frame interval to get approximately max_frames
-            frame_interval = max(1, total_frames // max_frames)
-            
-            frame_count = 0
-            while cap.isOpened() and len(frames) < max_frames:
-                ret, frame = cap.read()
-                if not ret:
-                    break
-                
-                if frame_count % frame_interval == 0:
-                    # Convert BGR to RGB for model processing
-                    frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                    frames.append(frame_rgb)
-                
-                frame_count += 1
-            
-            cap.release()
+            # Seek/grab only the sampled frames; returned frames are RGB for model processing
+            frames = sample_frames(video_path, max_frames=max_frames)
             logger.info(f"Extracted {len(frames)} frames from video")
             
         except Exception as e:
@@ -157,19 +128,22 @@ class RealAIAnalysisService:
         
         return frames
     
-    async def _analyze_objects(self, frames: List[np.ndarray]) -> Dict[str, Any]:
+    def _analyze_objects(self, frames: List[np.ndarray]) -> Dict[str, Any]:
         """Analyze objects in video frames"""
-        if not self.models_available or 'object_detection' not in self.models:
+        if not self.models_available:
             return self._mock_object_detection()
         
         try:
             all_detections = []
             object_counts = {}
             
-            for i, frame in enumerate(frames):
-                # Run object detection
-                results = self.models['object_detection'](frame)
-                
+            # Run object detection one batch at a time
+            frame_results = []
+            with model_registry.acquire(DETR_MODEL_ID, load_detr) as detector:
+                for batch in self._batches(frames):
+                    frame_results.extend(self._detect_objects_batch(detector, batch))
+            
+            for i, results in enumerate(frame_results):
                 frame_detections = []
                 for detection in results:
                     if detection['score'] > 0.7:  # High confidence only
@@ -207,21 +181,22 @@ class RealAIAnalysisService:
             logger.error(f"Object analysis failed: {str(e)}")
             return self._mock_object_detection()
     
-    async def _analyze_scenes(self, frames: List[np.ndarray]) -> Dict[str, Any]:
+    def _analyze_scenes(self, frames: List[np.ndarray]) -> Dict[str, Any]:
         """Analyze scene types in video frames"""
-        if not self.models_available or 'scene_classification' not in self.models:
+        if not self.models_available:
             return self._mock_scene_analysis()
         
         try:
             scene_predictions = []
             scene_counts = {}
             
-            for i, frame in enumerate(frames):
-                # Run scene classification
-                results = self.models['scene_classification'](frame)
-                
-                # Get top prediction
-                top_scene = results[0]
+            # Run scene classification one batch at a time
+            top_predictions = []
+            with model_registry.acquire(RESNET_MODEL_ID, load_resnet) as classifier:
+                for batch in self._batches(frames):
+                    top_predictions.extend(self._classify_scenes_batch(classifier, batch))
+            
+            for i, top_scene in enumerate(top_predictions):
                 scene_label = top_scene['label']
                 confidence = top_scene['score']
                 
@@ -254,7 +229,57 @@ class RealAIAnalysisService:
             logger.error(f"Scene analysis failed: {str(e)}")
             return self._mock_scene_analysis()
     
-    async def _analyze_emotions(self, frames: List[np.ndarray]) -> Dict[str, Any]:
+    def _batches(self, frames: List[np.ndarray]) -> Iterator[List[np.ndarray]]:
+        """Split frames into batches of settings.BATCH_SIZE"""
+        batch_size = max(1, settings.BATCH_SIZE)
+        for start in range(0, len(frames), batch_size):
+            yield frames[start:start + batch_size]
+    
+    def _detect_objects_batch(self, detector: Dict[str, Any], frames: List[np.ndarray]) -> List[List[Dict[str, Any]]]:
+        """Run DETR over a batch of frames in a single forward pass"""
+        import torch
+        
+        processor = detector['processor']
+        model = detector['model']
+        
+        inputs = processor(images=frames, return_tensors="pt").to(settings.DEVICE)
+        with torch.inference_mode():
+            outputs = model(**inputs)
+        
+        target_sizes = torch.tensor([frame.shape[:2] for frame in frames])
+        batch_results = processor.post_process_object_detection(outputs, target_sizes=target_sizes, threshold=0.5)
+        
+        # Same per-detection structure (and 0.5 floor) the object-detection pipeline returns
+        return [
+            [
+                {
+                    'label': model.config.id2label[label.item()],
+                    'score': score.item(),
+                    'box': dict(zip(('xmin', 'ymin', 'xmax', 'ymax'), (int(v) for v in box.tolist())))
+                }
+                for score, label, box in zip(result['scores'], result['labels'], result['boxes'])
+            ]
+            for result in batch_results
+        ]
+    
+    def _classify_scenes_batch(self, classifier: Dict[str, Any], frames: List[np.ndarray]) -> List[Dict[str, Any]]:
+        """Run ResNet over a batch of frames and return the top prediction per frame"""
+        import torch
+        
+        processor = classifier['processor']
+        model = classifier['model']
+        
+        inputs = processor(images=frames, return_tensors="pt").to(settings.DEVICE)
+        with torch.inference_mode():
+            logits = model(**inputs).logits
+        
+        scores, labels = logits.softmax(dim=-1).max(dim=-1)
+        return [
+            {'label': model.config.id2label[label.item()], 'score': score.item()}
+            for score, label in zip(scores, labels)
+        ]
+    
+    def _analyze_emotions(self, frames: List[np.ndarray]) -> Dict[str, Any]:
         """Analyze emotions detected in video frames"""
         # Note: This is a simplified emotion analysis
         # Real implementation would use face detection + emotion recognition
@@ -283,7 +308,7 @@ class RealAIAnalysisService:
             logger.error(f"Emotion analysis failed: {str(e)}")
             return self._mock_emotion_analysis()
     
-    async def _analyze_motion(self, frames: List[np.ndarray]) -> Dict[str, Any]:
+    def _analyze_motion(self, frames: List[np.ndarray]) -> Dict[str, Any]:
         """Analyze motion patterns in video"""
         try:
             if len(frames) < 2:
@@ -391,6 +416,7 @@ class RealAIAnalysisService:
         most_common = max(detected_objects.items(), key=lambda x: x[1])
         
         return {
+            'fallback': True,
             'detected_objects': detected_objects,
             'total_unique_objects': len(detected_objects),
             'most_common_object': most_common[0],
@@ -413,6 +439,7 @@ class RealAIAnalysisService:
         dominant_scene = max(scene_types.items(), key=lambda x: x[1])
         
         return {
+            'fallback': True,
             'scene_types': scene_types,
             'dominant_scene': dominant_scene[0],
             'scene_confidence': round(random.uniform(0.7, 0.95), 2),
@@ -435,6 +462,7 @@ class RealAIAnalysisService:
         dominant_emotion = max(emotions.items(), key=lambda x: x[1])
         
         return {
+            'fallback': True,
             'emotion_scores': emotions,
             'dominant_emotion': dominant_emotion[0],
             'emotion_confidence': dominant_emotion[1],
@@ -452,6 +480,7 @@ class RealAIAnalysisService:
         intensity = random.uniform(5.0, 25.0)
         
         return {
+            'fallback': True,
             'motion_intensity': round(intensity, 1),
             'motion_type': motion_type,
             'camera_movement': random.choice(camera_movements)
@@ -465,14 +494,12 @@ class RealAIAnalysisService:
         
         # Get real video properties
         try:
-            cap = cv2.VideoCapture(video_path)
-            if cap.isOpened():
-                width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
-                height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
-                fps = cap.get(cv2.CAP_PROP_FPS)
-                total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
-                duration = total_frames / fps if fps > 0 else 0
-                cap.release()
+            metadata = media_metadata.get(video_path)
+            if metadata["video"]["codec"] is not None:
+                width = metadata["video"]["width"] or 0
+                height = metadata["video"]["height"] or 0
+                fps = metadata["video"]["fps"]
+                duration = metadata["duration"]
                 
                 # Use video properties to influence analysis
                 is_hd = width >= 1280 and height >= 720
@@ -0,0 +1,121 @@
+"""
+Analysis result cache
+Reuses analyzer output for unchanged files, keyed by file content rather than filename
+"""
+import hashlib
+import json
+import os
+from typing import Any, Dict, Optional
+
+from ..core.cache import TieredCache, create_cache
+from ..core.config import settings
+from ..core.logging_config import get_logger
+from .blob_store import blob_store
+
+logger = get_logger("analysis_cache")
+
+HASH_CHUNK_SIZE = 1024 * 1024  # 1MB
+
+# file_stat_key -> sha256, so unchanged files are hashed once across every worker
+content_hash_cache = create_cache("content_hash", settings.METADATA_CACHE_MEMORY_MB, settings.METADATA_CACHE_DISK_MB)
+
+
+def file_content_hash(path: str) -> str:
+    """
+    SHA-256 of a file's contents, remembered by path, size and modification time
+
+    Renders hash their output as they finish, so serving one never reads
+    the whole file before its first byte.
+    """
+    # Uploads stored by digest already know their hash
+    digest = blob_store.digest_for(path)
+    if digest is not None:
+        return digest
+
+    cache_key = file_stat_key(path, "sha256")
+    digest = content_hash_cache.get(cache_key)
+    if digest is not None:
+        return digest
+
+    sha256 = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+            sha256.update(chunk)
+    digest = sha256.hexdigest()
+
+    content_hash_cache.set(cache_key, digest)
+    return digest
+
+
+def file_stat_key(path: str, namespace: str = "") -> str:
+    """Cheap cache key from path, size and modification time, for results that are quick to recompute"""
+    stat = os.stat(path)
+    payload = f"{namespace}:{os.path.abspath(path)}:{stat.st_size}:{stat.st_mtime_ns}"
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def payload_key(namespace: str, payload: Any) -> str:
+    """Cache key for a JSON-serializable request payload"""
+    data = json.dumps({"namespace": namespace, "payload": payload}, sort_keys=True, default=str)
+    return hashlib.sha256(data.encode("utf-8")).hexdigest()
+
+
+class AnalysisCache:
+    """Cache of analyzer results keyed by (content hash, analyzer, parameters, version)"""
+
+    def __init__(self, cache: TieredCache):
+        self.cache = cache
+
+    @staticmethod
+    def make_key(content_hash: str, analyzer: str, params: Optional[Dict[str, Any]], version: str) -> str:
+        payload = json.dumps(
+            {"content": content_hash, "analyzer": analyzer, "params": params or {}, "version": version},
+            sort_keys=True,
+            default=str
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _key(self, path: str, analyzer: str, params: Optional[Dict[str, Any]], version: str) -> Optional[str]:
+        try:
+            return self.make_key(file_content_hash(path), analyzer, params, version)
+        except OSError as e:
+            logger.warning(f"Cannot hash {path} for analysis cache: {e}")
+            return None
+
+    def get(self, path: str, analyzer: str, params: Optional[Dict[str, Any]] = None, version: str = "1") -> Optional[Any]:
+        """Return the cached result for this file and analyzer configuration, if any"""
+        key = self._key(path, analyzer, params, version)
+        if key is None:
+            return None
+
+        result = self.cache.get(key)
+        if result is not None:
+            logger.info(f"Analysis cache hit: {analyzer} for {os.path.basename(path)}")
+            # Shallow copy so callers can annotate the response without touching the cache
+            if isinstance(result, dict):
+                result = dict(result)
+        return result
+
+    def set(self, path: str, analyzer: str, result: Any, params: Optional[Dict[str, Any]] = None, version: str = "1"):
+        """Store an analyzer result for this file and analyzer configuration"""
+        key = self._key(path, analyzer, params, version)
+        if key is None:
+            return
+        try:
+            self.cache.set(key, result)
+        except Exception as e:
+            logger.error(f"Failed to cache {analyzer} result: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        return self.cache.stats()
+
+
+def has_errors(result: Dict[str, Any]) -> bool:
+    """True when any analysis step recorded an ``*_error``; such results are not cached"""
+    return any(key.endswith("_error") for key in result)
+
+
+# Create global analysis cache instance
+analysis_cache = AnalysisCache(
+    create_cache("analysis", settings.ANALYSIS_CACHE_MEMORY_MB, settings.ANALYSIS_CACHE_DISK_MB)
+)
@@ -0,0 +1,190 @@
+"""
+Decoded audio cache
+Each media file's audio is decoded once to mono float32 PCM at a canonical
+rate and kept as a memory-mapped raw sidecar; lower sample rates are
+resampled lazily from it and cached the same way, so every analyzer shares
+one decode. Decoding and resampling stream through disk, so a multi-hour
+recording never has to fit in memory
+"""
+import os
+import subprocess
+import tempfile
+import threading
+from math import ceil, gcd
+from pathlib import Path
+from typing import Callable, Dict, Optional, Tuple
+
+import numpy as np
+
+from ..core.config import settings
+from ..core.lazy_imports import lazy_import
+from ..core.logging_config import get_logger
+from .analysis_cache import file_content_hash
+
+logger = get_logger("audio_cache")
+
+librosa = lazy_import("librosa")
+scipy_signal = lazy_import("scipy.signal")
+
+
+# Input samples resampled per block; bounds resampling memory regardless of duration
+RESAMPLE_BLOCK_SAMPLES = 1 << 22
+
+
+def _decode_ffmpeg(path: str, sr: int, output):
+    """Decode the first audio stream of path to mono float32 at sr, streaming into the output file"""
+    cmd = [
+        "ffmpeg", "-v", "error", "-nostdin",
+        "-i", path,
+        "-map", "0:a:0", "-vn",
+        "-ac", "1", "-ar", str(sr),
+        "-f", "f32le", "-acodec", "pcm_f32le", "pipe:1"
+    ]
+    result = subprocess.run(cmd, stdout=output, stderr=subprocess.PIPE)
+    if result.returncode != 0:
+        raise RuntimeError(f"ffmpeg could not decode audio: {result.stderr.decode(errors='replace')}")
+
+
+def resample_into(y: np.ndarray, orig_sr: int, target_sr: int, output):
+    """
+    Polyphase resampling of y, written block-wise to the output file
+
+    Much cheaper than librosa's default band-limited resampler. Blocks start
+    on multiples of the decimation factor and carry enough context for the
+    polyphase filter, so the result matches resampling the whole signal at
+    once.
+    """
+    factor = gcd(orig_sr, target_sr)
+    up, down = target_sr // factor, orig_sr // factor
+    # resample_poly's filter spans 10 * max(up, down) upsampled samples each side
+    margin = down * ceil((10 * max(up, down) / up + 1) / down)
+    block = max(RESAMPLE_BLOCK_SAMPLES // down, 1) * down
+    total = ceil(len(y) * up / down)
+
+    for start in range(0, len(y), block):
+        context_start = max(start - margin, 0)
+        segment = np.asarray(y[context_start:min(start + block + margin, len(y))])
+        resampled = scipy_signal.resample_poly(segment, up, down)
+        offset = (start - context_start) * up // down
+        count = min((start + block) * up // down, total) - start * up // down
+        output.write(resampled[offset:offset + count].astype(np.float32).tobytes())
+
+
+class AudioCache:
+    """
+    Sidecars live at ``{root}/{content sha256}_{rate}.f32`` as raw samples
+
+    Keying by content means duplicate uploads share one decode, and a file
+    rewritten in place is decoded again. Files are written to a temporary
+    name and renamed, so concurrent workers never read a partial sidecar.
+    """
+
+    def __init__(self, root: str, canonical_rate: int, max_bytes: int):
+        self.root = Path(root)
+        self.canonical_rate = canonical_rate
+        self.max_bytes = max_bytes
+        self._locks: Dict[str, threading.Lock] = {}
+        self._locks_guard = threading.Lock()
+
+    def _lock(self, key: str) -> threading.Lock:
+        with self._locks_guard:
+            return self._locks.setdefault(key, threading.Lock())
+
+    def _sidecar(self, digest: str, sr: int) -> Path:
+        return self.root / f"{digest}_{sr}.f32"
+
+    def load(self, path: str, sr: Optional[int] = None) -> Tuple[np.ndarray, int]:
+        """
+        Mono float32 samples of path at sr (the canonical rate by default)
+
+        Drop-in for ``librosa.load(path, sr=sr)``. The array is a read-only
+        memory map; copy it before modifying in place.
+        """
+        sr = sr or self.canonical_rate
+        digest = file_content_hash(path)
+        sidecar = self._sidecar(digest, sr)
+
+        with self._lock(str(sidecar)):
+            if sidecar.exists():
+                return self._open(sidecar), sr
+
+            if sr < self.canonical_rate:
+                canonical, _ = self.load(path)
+                self._store(sidecar, lambda f: resample_into(canonical, self.canonical_rate, sr, f))
+            else:
+                # Resampling up from the canonical decode would drop everything above its Nyquist
+                self._decode(path, sidecar, sr)
+            return self._open(sidecar), sr
+
+    def _decode(self, path: str, sidecar: Path, sr: int):
+        def decode(f):
+            try:
+                _decode_ffmpeg(path, sr, f)
+            except (OSError, RuntimeError) as e:
+                logger.warning(f"ffmpeg decode failed for {path}, using librosa: {e}")
+                f.seek(0)
+                f.truncate()
+                y, _ = librosa.load(path, sr=sr, mono=True)
+                f.write(y.astype(np.float32).tobytes())
+
+        self._store(sidecar, decode)
+        logger.info(f"Decoded {path}: {sidecar.stat().st_size / 4 / sr:.1f}s at {sr} Hz")
+
+    @staticmethod
+    def _open(sidecar: Path) -> np.ndarray:
+        os.utime(sidecar)  # Recency for pruning
+        if sidecar.stat().st_size == 0:
+            # np.memmap cannot map an empty file
+            return np.zeros(0, dtype=np.float32)
+        return np.memmap(sidecar, dtype=np.float32, mode="r")
+
+    def _store(self, sidecar: Path, write: Callable):
+        """Run write(file) against a temporary file, then move it into place"""
+        os.makedirs(self.root, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.root, suffix=".f32.tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                write(f)
+            os.replace(tmp_path, sidecar)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        self._prune(keep=sidecar)
+
+    def _prune(self, keep: Path):
+        """Delete least recently used sidecars beyond max_bytes"""
+        entries = []
+        total = 0
+        for sidecar in self.root.glob("*.f32"):
+            try:
+                stat = sidecar.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, sidecar))
+            total += stat.st_size
+
+        for _, size, sidecar in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            if sidecar == keep:
+                continue
+            try:
+                # Open memory maps keep working after unlink
+                sidecar.unlink()
+                total -= size
+            except FileNotFoundError:
+                pass
+
+
+# Create global decoded audio cache
+audio_cache = AudioCache(
+    settings.AUDIO_CACHE_DIR,
+    settings.AUDIO_CANONICAL_RATE,
+    settings.AUDIO_CACHE_DISK_MB * 1024 * 1024
+)
+
+
+def load_audio(path: str, sr: Optional[int] = None) -> Tuple[np.ndarray, int]:
+    """Shared decoded audio for path; see AudioCache.load"""
+    return audio_cache.load(path, sr)
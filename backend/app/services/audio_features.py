@@ -0,0 +1,266 @@
+"""
+Shared spectral feature plane
+Computes the magnitude STFT and mel spectrogram of a signal once and derives
+every spectral descriptor from them instead of letting each librosa feature
+call redo its own transform. Long recordings are analyzed in blocks of frames
+whose statistics are merged, so memory stays flat however long the file is
+"""
+from functools import cached_property
+from typing import Dict, Iterator, Tuple
+
+import numpy as np
+
+from ..core.lazy_imports import lazy_import
+
+librosa = lazy_import("librosa")
+
+# librosa's defaults, so descriptors match the standalone feature calls
+N_FFT = 2048
+HOP_LENGTH = 512
+
+# Histogram of log10 STFT magnitudes used to estimate percentiles in one pass
+MAGNITUDE_BINS = np.linspace(-8.0, 4.0, 2401)
+
+
+def frame_count(n_samples: int, frame_length: int, hop_length: int, center: bool = True) -> int:
+    """Number of analysis frames librosa produces for n_samples"""
+    padded = n_samples + 2 * (frame_length // 2) if center else n_samples
+    return 1 + (padded - frame_length) // hop_length if padded >= frame_length else 0
+
+
+def iter_frame_blocks(
+    y: np.ndarray,
+    frame_length: int,
+    hop_length: int,
+    block_frames: int,
+    center: bool = True,
+    context: int = 0
+) -> Iterator[Tuple[int, int, np.ndarray]]:
+    """
+    Consecutive runs of analysis frames of y as (first frame, lead, samples)
+
+    samples holds exactly frames [first - lead, first + block_frames), where
+    lead is up to context frames of overlap with the previous block, zero-
+    padded where a centered frame reaches past either end of y. Analyzing it
+    with ``center=False`` therefore yields the same frames as analyzing the
+    whole signal, and only one block is ever copied out of a memory-mapped y.
+    """
+    n = len(y)
+    total = frame_count(n, frame_length, hop_length, center)
+    offset = frame_length // 2 if center else 0
+    for first in range(0, total, block_frames):
+        lead = min(context, first)
+        last = min(first + block_frames, total)
+        start = (first - lead) * hop_length - offset
+        stop = (last - 1) * hop_length - offset + frame_length
+        samples = np.asarray(y[max(start, 0):min(stop, n)], dtype=np.float32)
+        if start < 0 or stop > n:
+            samples = np.pad(samples, (max(-start, 0), max(stop - n, 0)))
+        yield first, lead, samples
+
+
+def compute_frame_energies(
+    y: np.ndarray,
+    frame_length: int,
+    hop_length: int,
+    block_frames: int,
+    center: bool = False
+) -> np.ndarray:
+    """Sum of squares of every frame of y, one block at a time"""
+    parts = []
+    for _, _, samples in iter_frame_blocks(y, frame_length, hop_length, block_frames, center):
+        frames = np.lib.stride_tricks.sliding_window_view(samples, frame_length)[::hop_length]
+        parts.append(np.einsum("ij,ij->i", frames, frames))
+    return np.concatenate(parts) if parts else np.zeros(0, dtype=np.float32)
+
+
+def magnitude_percentile(y: np.ndarray, q: float, block_frames: int) -> float:
+    """
+    q-th percentile of the STFT magnitude of y
+
+    Estimated from a histogram of log magnitudes accumulated block by block,
+    accurate to about 0.5%, instead of sorting the whole spectrogram.
+    """
+    counts = np.zeros(len(MAGNITUDE_BINS) - 1, dtype=np.int64)
+    for _, _, samples in iter_frame_blocks(y, N_FFT, HOP_LENGTH, block_frames):
+        magnitude = np.abs(librosa.stft(samples, n_fft=N_FFT, hop_length=HOP_LENGTH, center=False))
+        log_magnitude = np.clip(np.log10(np.maximum(magnitude, 1e-12)), MAGNITUDE_BINS[0], MAGNITUDE_BINS[-1])
+        counts += np.histogram(log_magnitude, bins=MAGNITUDE_BINS)[0]
+
+    total = counts.sum()
+    if total == 0:
+        return 0.0
+    index = int(np.searchsorted(np.cumsum(counts), q / 100 * total))
+    return float(10 ** MAGNITUDE_BINS[min(index, len(counts) - 1)])
+
+
+def track_beats(onset_envelope: np.ndarray, sr: int, hop_length: int = HOP_LENGTH) -> Tuple[float, np.ndarray]:
+    """(tempo in BPM, beat positions in samples) from an onset strength envelope"""
+    tempo, beats = librosa.beat.beat_track(
+        onset_envelope=onset_envelope, sr=sr, hop_length=hop_length, units="samples"
+    )
+    return float(np.atleast_1d(tempo)[0]), beats
+
+
+class RunningStats:
+    """
+    Mean, standard deviation, min and max accumulated block by block
+
+    Values are reduced along their last axis, so a (rows, frames) block keeps
+    per-row statistics. Blocks are merged with Chan's parallel variance
+    update, which stays accurate over millions of frames.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.min = np.inf
+        self.max = -np.inf
+        self._m2 = 0.0
+
+    def update(self, values: np.ndarray):
+        values = np.asarray(values, dtype=np.float64)
+        n = values.shape[-1]
+        if n == 0:
+            return
+        block_mean = values.mean(axis=-1)
+        block_m2 = ((values - block_mean[..., None]) ** 2).sum(axis=-1)
+        total = self.count + n
+        delta = block_mean - self.mean
+        self.mean = self.mean + delta * n / total
+        self._m2 = self._m2 + block_m2 + delta ** 2 * self.count * n / total
+        self.count = total
+        self.min = np.minimum(self.min, values.min(axis=-1))
+        self.max = np.maximum(self.max, values.max(axis=-1))
+
+    @property
+    def std(self):
+        return np.sqrt(self._m2 / self.count) if self.count else 0.0
+
+
+class AudioFeaturePlane:
+    """
+    Lazily computed spectral representations of one signal
+
+    Each representation is computed on first access and reused by every
+    descriptor that needs it: ``magnitude`` feeds centroid, rolloff and
+    bandwidth, ``power`` feeds chroma and the mel spectrogram, and ``mel_db``
+    feeds MFCCs and the onset envelope used for beat tracking.
+    """
+
+    def __init__(
+        self,
+        y: np.ndarray,
+        sr: int,
+        n_fft: int = N_FFT,
+        hop_length: int = HOP_LENGTH,
+        center: bool = True
+    ):
+        self.y = y
+        self.sr = sr
+        self.n_fft = n_fft
+        self.hop_length = hop_length
+        # False for blocks from iter_frame_blocks, which are already padded
+        self.center = center
+
+    @cached_property
+    def magnitude(self) -> np.ndarray:
+        return np.abs(librosa.stft(self.y, n_fft=self.n_fft, hop_length=self.hop_length, center=self.center))
+
+    @cached_property
+    def power(self) -> np.ndarray:
+        return self.magnitude ** 2
+
+    @cached_property
+    def mel(self) -> np.ndarray:
+        return librosa.feature.melspectrogram(S=self.power, sr=self.sr)
+
+    @cached_property
+    def mel_db(self) -> np.ndarray:
+        return librosa.power_to_db(self.mel)
+
+    @cached_property
+    def onset_envelope(self) -> np.ndarray:
+        return librosa.onset.onset_strength(S=self.mel_db, sr=self.sr, hop_length=self.hop_length)
+
+    def spectral_centroid(self) -> np.ndarray:
+        return librosa.feature.spectral_centroid(S=self.magnitude, sr=self.sr, n_fft=self.n_fft)[0]
+
+    def spectral_rolloff(self) -> np.ndarray:
+        return librosa.feature.spectral_rolloff(S=self.magnitude, sr=self.sr, n_fft=self.n_fft)[0]
+
+    def spectral_bandwidth(self) -> np.ndarray:
+        return librosa.feature.spectral_bandwidth(S=self.magnitude, sr=self.sr, n_fft=self.n_fft)[0]
+
+    def mfcc(self, n_mfcc: int = 13) -> np.ndarray:
+        return librosa.feature.mfcc(S=self.mel_db, sr=self.sr, n_mfcc=n_mfcc)
+
+    def chroma(self) -> np.ndarray:
+        return librosa.feature.chroma_stft(S=self.power, sr=self.sr, n_fft=self.n_fft)
+
+    def rms(self) -> np.ndarray:
+        # Time-domain RMS is a strided sum, cheaper than deriving it from the spectrum
+        return librosa.feature.rms(
+            y=self.y, frame_length=self.n_fft, hop_length=self.hop_length, center=self.center
+        )[0]
+
+    def zero_crossing_rate(self) -> np.ndarray:
+        return librosa.feature.zero_crossing_rate(
+            self.y, frame_length=self.n_fft, hop_length=self.hop_length, center=self.center
+        )[0]
+
+    def onset_differences(self) -> np.ndarray:
+        """Mean positive log-mel increase between consecutive frames; onset_strength before padding"""
+        return np.maximum(np.diff(self.mel_db, axis=1), 0.0).mean(axis=0)
+
+    def beat_track(self) -> Tuple[float, np.ndarray]:
+        """(tempo in BPM, beat positions in samples)"""
+        return track_beats(self.onset_envelope, self.sr, self.hop_length)
+
+    def onset_times(self) -> np.ndarray:
+        onset_frames = librosa.onset.onset_detect(
+            onset_envelope=self.onset_envelope, sr=self.sr, hop_length=self.hop_length
+        )
+        return librosa.frames_to_time(onset_frames, sr=self.sr, hop_length=self.hop_length)
+
+
+def stream_features(
+    y: np.ndarray,
+    sr: int,
+    block_seconds: float,
+    n_mfcc: int = 13
+) -> Tuple[Dict[str, RunningStats], np.ndarray]:
+    """
+    Frame statistics of every descriptor of y, plus its onset envelope
+
+    Each block carries one frame of context so the onset envelope, a first
+    difference of the log-mel spectrogram, is continuous across blocks. The
+    envelope (one value per frame) is kept whole for beat tracking; all other
+    descriptors are reduced to RunningStats as soon as a block is analyzed.
+    """
+    stats = {
+        name: RunningStats()
+        for name in (
+            "spectral_centroid", "spectral_rolloff", "spectral_bandwidth",
+            "zero_crossing_rate", "rms_energy", "mfccs", "chroma"
+        )
+    }
+    onset_parts = []
+    block_frames = max(int(block_seconds * sr) // HOP_LENGTH, 1)
+
+    for _, lead, samples in iter_frame_blocks(y, N_FFT, HOP_LENGTH, block_frames, context=1):
+        plane = AudioFeaturePlane(samples, sr, center=False)
+        stats["spectral_centroid"].update(plane.spectral_centroid()[lead:])
+        stats["spectral_rolloff"].update(plane.spectral_rolloff()[lead:])
+        stats["spectral_bandwidth"].update(plane.spectral_bandwidth()[lead:])
+        stats["zero_crossing_rate"].update(plane.zero_crossing_rate()[lead:])
+        stats["rms_energy"].update(plane.rms()[lead:])
+        stats["mfccs"].update(plane.mfcc(n_mfcc)[:, lead:])
+        stats["chroma"].update(plane.chroma()[:, lead:].ravel())
+        onset_parts.append(plane.onset_differences())
+
+    # Same alignment as librosa.onset.onset_strength(center=True): lag plus half a window of leading zeros
+    total = frame_count(len(y), N_FFT, HOP_LENGTH)
+    differences = np.concatenate(onset_parts) if onset_parts else np.zeros(0)
+    onset_envelope = np.pad(differences, (1 + N_FFT // (2 * HOP_LENGTH), 0))[:total]
+    return stats, onset_envelope
@@ -0,0 +1,171 @@
+"""
+Content-addressed upload store
+Upload bytes are kept once per SHA-256 digest; every uploaded filename is a
+hard link (alias) to its blob, so duplicate uploads share storage and the
+link count doubles as the reference count
+"""
+import os
+import shutil
+import tempfile
+from pathlib import Path
+from typing import Dict, Optional
+
+from ..core.config import settings
+from ..core.logging_config import get_logger
+
+logger = get_logger("blob_store")
+
+BLOBS_DIR = "blobs"
+ALIASES_DIR = "aliases"
+TMP_DIR = "tmp"
+
+
+class BlobStore:
+    """
+    Blobs live at ``{root}/blobs/ab/abcdef...``; aliases are hard links in the
+    upload directory, with ``{root}/aliases/{filename}`` recording each
+    alias's digest so it never has to be re-hashed
+    """
+
+    def __init__(self, root: str, alias_dir: str):
+        self.root = Path(root)
+        self.alias_dir = Path(alias_dir)
+
+    def _blob_path(self, digest: str) -> Path:
+        return self.root / BLOBS_DIR / digest[:2] / digest
+
+    def _alias_record(self, filename: str) -> Path:
+        return self.root / ALIASES_DIR / filename
+
+    def temp_file(self) -> str:
+        """Path for streaming new upload bytes; on the blob filesystem so commit() is a rename"""
+        tmp_dir = self.root / TMP_DIR
+        os.makedirs(tmp_dir, exist_ok=True)
+        fd, path = tempfile.mkstemp(dir=tmp_dir, suffix=".upload")
+        os.close(fd)
+        return path
+
+    def commit(self, source_path: str, digest: str, filename: str) -> Dict:
+        """
+        Store the file at source_path under digest and expose it as filename in the upload directory
+
+        source_path is consumed. When a blob with this digest already exists the
+        new bytes are discarded and filename becomes another alias of it.
+
+        Returns:
+            Dictionary with file_path, sha256, size and deduplicated
+        """
+        blob_path = self._blob_path(digest)
+        alias_path = self.alias_dir / filename
+        os.makedirs(blob_path.parent, exist_ok=True)
+        os.makedirs(self.alias_dir, exist_ok=True)
+
+        deduplicated = False
+        try:
+            # Link first: a concurrent release may delete the blob between an exists() check and the link
+            os.link(blob_path, alias_path)
+            deduplicated = True
+            os.remove(source_path)
+        except FileNotFoundError:
+            self._move(source_path, blob_path)
+            self._link_or_copy(blob_path, alias_path)
+        except OSError as e:
+            # Filesystem without hard links: keep a private copy, still recorded by digest
+            logger.warning(f"Hard link unavailable for {filename}, storing a copy: {e}")
+            self._move(source_path, alias_path)
+
+        self._write_record(filename, digest)
+        size = os.path.getsize(alias_path)
+        if deduplicated:
+            logger.info(f"Upload {filename} is a duplicate of blob {digest[:12]}; {size} bytes saved")
+        return {
+            "file_path": str(alias_path),
+            "sha256": digest,
+            "size": size,
+            "deduplicated": deduplicated,
+            "references": self.references(digest)
+        }
+
+    @staticmethod
+    def _move(source_path: str, destination: Path):
+        try:
+            os.replace(source_path, destination)
+        except OSError:
+            # Different filesystem (e.g. upload session directory)
+            shutil.move(source_path, destination)
+
+    @staticmethod
+    def _link_or_copy(blob_path: Path, alias_path: Path):
+        try:
+            os.link(blob_path, alias_path)
+        except OSError:
+            shutil.copyfile(blob_path, alias_path)
+
+    def _write_record(self, filename: str, digest: str):
+        record = self._alias_record(filename)
+        os.makedirs(record.parent, exist_ok=True)
+        tmp_record = record.with_suffix(record.suffix + ".tmp")
+        with open(tmp_record, "w") as f:
+            f.write(digest)
+        os.replace(tmp_record, record)
+
+    def digest_for(self, path: str) -> Optional[str]:
+        """Digest of an upload alias, or None when path is not a live alias of a stored blob"""
+        path = Path(path)
+        if path.parent.resolve() != self.alias_dir.resolve():
+            return None
+        try:
+            digest = self._alias_record(path.name).read_text().strip()
+            alias_stat = os.stat(path)
+            blob_stat = os.stat(self._blob_path(digest))
+        except (OSError, ValueError):
+            return None
+        # The alias may have been replaced by a different file since it was recorded
+        if (alias_stat.st_dev, alias_stat.st_ino) != (blob_stat.st_dev, blob_stat.st_ino):
+            return None
+        return digest
+
+    def references(self, digest: str) -> int:
+        """Number of upload aliases sharing the blob"""
+        try:
+            return os.stat(self._blob_path(digest)).st_nlink - 1
+        except OSError:
+            return 0
+
+    def release(self, path: str):
+        """Delete an upload alias, and its blob once no alias references it"""
+        path = Path(path)
+        digest = self.digest_for(path)
+        os.remove(path)
+        try:
+            os.remove(self._alias_record(path.name))
+        except FileNotFoundError:
+            pass
+        if digest and self.references(digest) == 0:
+            try:
+                os.remove(self._blob_path(digest))
+                logger.info(f"Removed unreferenced blob {digest[:12]}")
+            except FileNotFoundError:
+                pass
+
+    def stats(self) -> Dict:
+        blobs = 0
+        stored_bytes = 0
+        logical_bytes = 0
+        blobs_root = self.root / BLOBS_DIR
+        if blobs_root.exists():
+            for blob_path in blobs_root.glob("*/*"):
+                stat = blob_path.stat()
+                blobs += 1
+                stored_bytes += stat.st_size
+                logical_bytes += stat.st_size * max(stat.st_nlink - 1, 0)
+        return {
+            "blobs": blobs,
+            "stored_bytes": stored_bytes,
+            "logical_bytes": logical_bytes,
+            "saved_bytes": max(logical_bytes - stored_bytes, 0)
+        }
+
+
+# Create global blob store backing the upload directory
+blob_store = BlobStore(settings.BLOB_DIR, settings.UPLOAD_DIR)
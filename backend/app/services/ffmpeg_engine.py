@@ -0,0 +1,362 @@
+"""
+FFmpeg-native editing engine
+Builds ffmpeg filter graphs for the editing endpoints so frames never pass through Python
+"""
+import subprocess
+from typing import Dict, List, Optional, Tuple
+
+from ..core.logging_config import get_logger
+from .media_index import media_index
+from .media_metadata import media_metadata
+
+logger = get_logger("ffmpeg_engine")
+
+# Output encoding shared by every re-encoding operation
+VIDEO_ENCODE_ARGS = ["-c:v", "libx264", "-pix_fmt", "yuv420p"]
+AUDIO_ENCODE_ARGS = ["-c:a", "aac"]
+# Canonical audio format so streams from different sources can be joined or mixed
+AUDIO_NORMALIZE = "aresample=48000,aformat=sample_fmts=fltp:channel_layouts=stereo"
+
+
+def run_ffmpeg(args: List[str]):
+    """Run ffmpeg with args, raising RuntimeError with its stderr on failure"""
+    cmd = ["ffmpeg", "-hide_banner", "-loglevel", "error", "-y"] + args
+    logger.info(f"Running FFmpeg command: {' '.join(cmd)}")
+    result = subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    if result.returncode != 0:
+        error_msg = result.stderr.decode(errors="replace")
+        logger.error(f"FFmpeg command failed: {error_msg}")
+        raise RuntimeError(f"FFmpeg processing failed: {error_msg}")
+
+
+def probe_media(path: str) -> Dict:
+    """Duration, dimensions, frame rate and audio presence of a media file"""
+    info = media_metadata.get(path)
+    video = info["video"]
+    return {
+        "duration": info["duration"],
+        "width": video["width"] or 0,
+        "height": video["height"] or 0,
+        "fps": video["fps"],
+        "has_video": video["codec"] is not None,
+        "has_audio": info["audio"]["codec"] is not None
+    }
+
+
+def atempo_chain(speed: float) -> List[str]:
+    """atempo only accepts 0.5-2.0 per instance, so larger changes are chained"""
+    chain = []
+    while speed > 2.0:
+        chain.append("atempo=2.0")
+        speed /= 2.0
+    while speed < 0.5:
+        chain.append("atempo=0.5")
+        speed /= 0.5
+    chain.append(f"atempo={speed}")
+    return chain
+
+
+def _starts_on_keyframe(path: str, start_time: float, tolerance: float = 0.001) -> bool:
+    """True when a video keyframe sits at start_time, so a stream copy can begin there exactly"""
+    if start_time <= tolerance:
+        return True
+    try:
+        return media_index.get(path).is_keyframe_at(start_time, tolerance)
+    except RuntimeError:
+        return False
+
+
+def trim(input_path: str, output_path: str, start_time: float, end_time: float) -> Dict:
+    """Cut [start_time, end_time), stream-copying when the start is on a keyframe"""
+    info = probe_media(input_path)
+    end_time = min(end_time, info["duration"]) if info["duration"] else end_time
+    start_time = max(0.0, start_time)
+    if start_time >= end_time:
+        raise ValueError("Start time must be less than end time")
+
+    stream_copy = _starts_on_keyframe(input_path, start_time)
+    args = ["-ss", str(start_time), "-i", input_path, "-t", str(end_time - start_time)]
+    if stream_copy:
+        args += ["-c", "copy", "-avoid_negative_ts", "make_zero"]
+    else:
+        args += VIDEO_ENCODE_ARGS + AUDIO_ENCODE_ARGS
+    run_ffmpeg(args + [output_path])
+
+    return {
+        "original_duration": info["duration"],
+        "new_duration": end_time - start_time,
+        "start_time": start_time,
+        "end_time": end_time,
+        "stream_copy": stream_copy
+    }
+
+
+def merge(input_paths: List[str], output_path: str, transition_duration: float = 0.5) -> Dict:
+    """Join clips in order, cross-fading video (xfade) and audio (acrossfade) between them"""
+    infos = [probe_media(path) for path in input_paths]
+    width, height = infos[0]["width"], infos[0]["height"]
+    fps = infos[0]["fps"] or 30
+    # A transition cannot be longer than either clip it joins
+    shortest = min(info["duration"] for info in infos)
+    transition = max(0.0, min(transition_duration, shortest / 2))
+
+    args = []
+    for path in input_paths:
+        args += ["-i", path]
+
+    # Clips without audio get silence so every join has both streams
+    silent_inputs = {}
+    for index, info in enumerate(infos):
+        if not info["has_audio"]:
+            silent_inputs[index] = len(input_paths) + len(silent_inputs)
+            args += ["-f", "lavfi", "-t", str(info["duration"]), "-i", "anullsrc=r=48000:cl=stereo"]
+
+    graph = []
+    for index in range(len(input_paths)):
+        # xfade/concat need identical geometry, frame rate and timebase on every input
+        graph.append(
+            f"[{index}:v]scale={width}:{height}:force_original_aspect_ratio=decrease,"
+            f"pad={width}:{height}:(ow-iw)/2:(oh-ih)/2,setsar=1,fps={fps},format=yuv420p,settb=AVTB[v{index}]"
+        )
+        audio_input = silent_inputs.get(index, index)
+        graph.append(f"[{audio_input}:a]{AUDIO_NORMALIZE},asettb=AVTB[a{index}]")
+
+    count = len(input_paths)
+    if transition > 0 and count > 1:
+        video_label, audio_label = "v0", "a0"
+        offset = 0.0
+        for index in range(1, count):
+            offset += infos[index - 1]["duration"] - transition
+            graph.append(
+                f"[{video_label}][v{index}]xfade=transition=fade:duration={transition}:offset={offset}[vx{index}]"
+            )
+            graph.append(f"[{audio_label}][a{index}]acrossfade=d={transition}[ax{index}]")
+            video_label, audio_label = f"vx{index}", f"ax{index}"
+        graph.append(f"[{video_label}]null[outv]")
+        graph.append(f"[{audio_label}]anull[outa]")
+    else:
+        pairs = "".join(f"[v{i}][a{i}]" for i in range(count))
+        graph.append(f"{pairs}concat=n={count}:v=1:a=1[outv][outa]")
+
+    args += ["-filter_complex", ";".join(graph), "-map", "[outv]", "-map", "[outa]"]
+    run_ffmpeg(args + VIDEO_ENCODE_ARGS + AUDIO_ENCODE_ARGS + [output_path])
+
+    total_duration = sum(info["duration"] for info in infos) - transition * (count - 1)
+    return {
+        "merged_clips": count,
+        "total_duration": total_duration,
+        "transition_duration": transition
+    }
+
+
+def resize(input_path: str, output_path: str, width: int, height: int, method: str = "crop") -> Dict:
+    """Centre-crop, stretch or fit the video to the requested size"""
+    info = probe_media(input_path)
+    original_size = (info["width"], info["height"])
+
+    if method == "crop":
+        # Crop to maintain aspect ratio
+        new_size = (min(width, info["width"]), min(height, info["height"]))
+        video_filter = f"crop={new_size[0]}:{new_size[1]}"
+    elif method == "stretch":
+        # Stretch to exact dimensions
+        new_size = (width, height)
+        video_filter = f"scale={width}:{height},setsar=1"
+    elif info["height"] > info["width"]:
+        # Scale maintaining aspect ratio (portrait fits height)
+        scaled_width = round(info["width"] * height / info["height"] / 2) * 2
+        new_size = (scaled_width, height)
+        video_filter = f"scale=-2:{height}"
+    else:
+        scaled_height = round(info["height"] * width / info["width"] / 2) * 2 if info["width"] else height
+        new_size = (width, scaled_height)
+        video_filter = f"scale={width}:-2"
+
+    args = ["-i", input_path, "-vf", video_filter] + VIDEO_ENCODE_ARGS
+    if info["has_audio"]:
+        args += ["-c:a", "copy"]
+    run_ffmpeg(args + [output_path])
+
+    return {
+        "original_size": original_size,
+        "new_size": new_size,
+        "method": method
+    }
+
+
+def apply_filters(input_path: str, output_path: str, filters: Dict) -> Dict:
+    """Brightness, speed, fades and mirroring as one video/audio filter chain"""
+    info = probe_media(input_path)
+    video_filters = []
+    audio_filters = []
+    applied_filters = []
+    duration = info["duration"]
+
+    # Brightness adjustment
+    if "brightness" in filters:
+        brightness = filters["brightness"]  # -1.0 to 1.0
+        factor = brightness + 1.0
+        video_filters.append(f"colorchannelmixer=rr={factor}:gg={factor}:bb={factor}")
+        applied_filters.append(f"brightness: {brightness}")
+
+    # Speed adjustment
+    if "speed" in filters:
+        speed = filters["speed"]  # 0.5 = half speed, 2.0 = double speed
+        video_filters.append(f"setpts=PTS/{speed}")
+        audio_filters.extend(atempo_chain(speed))
+        duration = duration / speed
+        applied_filters.append(f"speed: {speed}x")
+
+    # Fade in/out
+    if "fade_in" in filters:
+        fade_in_duration = filters["fade_in"]
+        video_filters.append(f"fade=t=in:st=0:d={fade_in_duration}")
+        audio_filters.append(f"afade=t=in:st=0:d={fade_in_duration}")
+        applied_filters.append(f"fade_in: {fade_in_duration}s")
+
+    if "fade_out" in filters:
+        fade_out_duration = filters["fade_out"]
+        fade_start = max(0.0, duration - fade_out_duration)
+        video_filters.append(f"fade=t=out:st={fade_start}:d={fade_out_duration}")
+        audio_filters.append(f"afade=t=out:st={fade_start}:d={fade_out_duration}")
+        applied_filters.append(f"fade_out: {fade_out_duration}s")
+
+    # Mirror effect
+    if filters.get("mirror_x", False):
+        video_filters.append("hflip")
+        applied_filters.append("mirror_x")
+
+    if filters.get("mirror_y", False):
+        video_filters.append("vflip")
+        applied_filters.append("mirror_y")
+
+    args = ["-i", input_path]
+    if video_filters:
+        args += ["-vf", ",".join(video_filters)]
+    args += VIDEO_ENCODE_ARGS
+    if info["has_audio"]:
+        if audio_filters:
+            args += ["-af", ",".join(audio_filters)] + AUDIO_ENCODE_ARGS
+        else:
+            args += ["-c:a", "copy"]
+    run_ffmpeg(args + [output_path])
+
+    return {
+        "applied_filters": applied_filters,
+        "original_duration": info["duration"],
+        "new_duration": duration
+    }
+
+
+def extract_audio(input_path: str, output_path: str) -> Dict:
+    """Write the audio track to output_path; the encoder follows the output extension"""
+    info = probe_media(input_path)
+    if not info["has_audio"]:
+        raise ValueError("Video has no audio track")
+
+    run_ffmpeg(["-i", input_path, "-vn", "-map", "0:a:0", output_path])
+
+    return {
+        "duration": info["duration"],
+        "output_path": output_path
+    }
+
+
+def add_background_music(
+    input_path: str,
+    output_path: str,
+    music_path: str,
+    volume: float = 0.3,
+    loop: bool = True
+) -> Dict:
+    """Mix music under the video's own audio (amix), looping or cutting it to the video length"""
+    video_info = probe_media(input_path)
+    music_info = probe_media(music_path)
+    video_duration = video_info["duration"]
+
+    args = ["-i", input_path]
+    if loop and music_info["duration"] < video_duration:
+        args += ["-stream_loop", "-1"]
+    args += ["-i", music_path]
+
+    graph = [f"[1:a]{AUDIO_NORMALIZE},volume={volume}[music]"]
+    if video_info["has_audio"]:
+        # Sum without amix's default 1/n attenuation, matching a straight composite
+        graph.append(f"[0:a]{AUDIO_NORMALIZE}[speech]")
+        graph.append("[speech][music]amix=inputs=2:duration=first:dropout_transition=0:normalize=0[outa]")
+    else:
+        graph.append("[music]anull[outa]")
+
+    args += [
+        "-filter_complex", ";".join(graph),
+        "-map", "0:v:0", "-map", "[outa]",
+        "-c:v", "copy"
+    ] + AUDIO_ENCODE_ARGS + ["-t", str(video_duration), output_path]
+    run_ffmpeg(args)
+
+    return {
+        "music_duration": min(music_info["duration"], video_duration) if not loop else video_duration,
+        "video_duration": video_duration,
+        "volume": volume,
+        "looped": loop
+    }
+
+
+def collage(
+    input_paths: List[str],
+    output_path: str,
+    grid_size: Tuple[int, int],
+    output_resolution: Tuple[int, int] = (1920, 1080)
+) -> Dict:
+    """Tile the inputs in a rows x cols grid (xstack), black-filling empty cells"""
+    rows, cols = grid_size
+    if len(input_paths) > rows * cols:
+        raise ValueError("Too many videos for specified grid size")
+
+    infos = [probe_media(path) for path in input_paths]
+    min_duration = min(info["duration"] for info in infos)
+    cell_width = output_resolution[0] // cols
+    cell_height = output_resolution[1] // rows
+
+    args = []
+    for path in input_paths:
+        args += ["-i", path]
+
+    graph = []
+    labels = []
+    layout = []
+    for row in range(rows):
+        for col in range(cols):
+            index = row * cols + col
+            label = f"c{index}"
+            if index < len(input_paths):
+                graph.append(f"[{index}:v]scale={cell_width}:{cell_height},setsar=1,format=yuv420p[{label}]")
+            else:
+                # Create black clip for empty slots
+                graph.append(f"color=c=black:s={cell_width}x{cell_height}:d={min_duration},format=yuv420p[{label}]")
+            labels.append(f"[{label}]")
+            layout.append(f"{col * cell_width}_{row * cell_height}")
+
+    if len(labels) > 1:
+        graph.append(f"{''.join(labels)}xstack=inputs={len(labels)}:layout={'|'.join(layout)}[outv]")
+    else:
+        graph.append(f"{labels[0]}null[outv]")
+
+    audio_inputs = [f"[{i}:a]{AUDIO_NORMALIZE}[s{i}]" for i, info in enumerate(infos) if info["has_audio"]]
+    mixed = [f"[s{i}]" for i, info in enumerate(infos) if info["has_audio"]]
+    if mixed:
+        graph.extend(audio_inputs)
+        graph.append(f"{''.join(mixed)}amix=inputs={len(mixed)}:duration=shortest:normalize=0[outa]")
+
+    args += ["-filter_complex", ";".join(graph), "-map", "[outv]"]
+    if mixed:
+        args += ["-map", "[outa]"] + AUDIO_ENCODE_ARGS
+    args += VIDEO_ENCODE_ARGS + ["-t", str(min_duration), output_path]
+    run_ffmpeg(args)
+
+    return {
+        "input_videos": len(input_paths),
+        "grid_size": grid_size,
+        "duration": min_duration,
+        "output_resolution": output_resolution
+    }
@@ -0,0 +1,126 @@
+"""
+Shared frame bus for video analysis
+Decodes a video once and publishes sampled frames to every subscribed analyzer
+"""
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+import numpy as np
+
+from ..core.logging_config import get_logger
+from .frame_sampler import FrameSampler
+
+logger = get_logger("frame_bus")
+
+
+class FrameSubscriber:
+    """
+    Base class for analyzers fed by a FrameBus
+
+    Subclasses declare how often they want frames (``sample_rate``) and how far
+    into the video they look (``frame_limit``), then implement ``on_frame`` and
+    ``result``.
+    """
+
+    name: str = "subscriber"
+    sample_rate: int = 30
+    frame_limit: Optional[int] = None
+    # Set by the bus: frame index -> presentation time in seconds
+    clock: Optional[Callable[[int], float]] = None
+
+    def frame_indices(self, total_frames: int) -> Iterable[int]:
+        """Frame indices this subscriber wants to receive"""
+        limit = total_frames if self.frame_limit is None else min(self.frame_limit, total_frames)
+        return range(0, max(0, limit), max(1, self.sample_rate))
+
+    def timestamp(self, frame_index: int, fps: float) -> float:
+        """Presentation time of a frame in seconds"""
+        if self.clock is not None:
+            return self.clock(frame_index)
+        return frame_index / fps if fps > 0 else 0.0
+
+    def on_start(self, properties: Dict[str, Any]) -> None:
+        """Receive container properties (width, height, fps, total_frames) before decoding"""
+        pass
+
+    def on_frame(self, frame_index: int, frame: np.ndarray, fps: float) -> None:
+        """Handle one decoded BGR frame"""
+        raise NotImplementedError
+
+    def result(self) -> Any:
+        """Return the analyzer result once the bus has finished"""
+        raise NotImplementedError
+
+
+class FrameBus:
+    """Single-pass decoder that fans sampled frames out to subscribers"""
+
+    def __init__(self, video_path: str):
+        self.video_path = video_path
+        self.subscribers: List[FrameSubscriber] = []
+
+    def subscribe(self, subscriber: FrameSubscriber) -> FrameSubscriber:
+        """Register an analyzer on the bus"""
+        self.subscribers.append(subscriber)
+        return subscriber
+
+    def run(self) -> Dict[str, Any]:
+        """
+        Decode the video once and dispatch frames to all subscribers
+
+        Returns:
+            Mapping of subscriber name to its result, or to the exception it
+            raised (mirroring ``asyncio.gather(..., return_exceptions=True)``)
+        """
+        failures: Dict[str, Exception] = {}
+
+        with FrameSampler(self.video_path) as sampler:
+            fps = sampler.fps
+            total_frames = sampler.total_frames
+            properties = {
+                "width": sampler.width,
+                "height": sampler.height,
+                "fps": fps,
+                "total_frames": total_frames
+            }
+            for subscriber in self.subscribers:
+                subscriber.clock = sampler.timestamp
+                subscriber.on_start(properties)
+
+            # Frame count metadata can be missing; fall back to each subscriber's own limit
+            if total_frames <= 0:
+                total_frames = max((s.frame_limit or 0) for s in self.subscribers) if self.subscribers else 0
+
+            wanted: Dict[int, List[FrameSubscriber]] = {}
+            for subscriber in self.subscribers:
+                for index in set(subscriber.frame_indices(total_frames)):
+                    wanted.setdefault(index, []).append(subscriber)
+
+            delivered = 0
+            for frame_index, frame in sampler.iter_frames(wanted.keys()):
+                delivered += 1
+                for subscriber in wanted[frame_index]:
+                    if subscriber.name in failures:
+                        continue
+                    try:
+                        subscriber.on_frame(frame_index, frame, fps)
+                    except Exception as e:
+                        logger.error(f"{subscriber.name} analysis failed: {e}")
+                        failures[subscriber.name] = e
+
+            logger.info(
+                f"Frame bus delivered {delivered} frames to {len(self.subscribers)} analyzers "
+                f"({sampler.decoded_frames} decoded)"
+            )
+
+        results: Dict[str, Any] = {}
+        for subscriber in self.subscribers:
+            if subscriber.name in failures:
+                results[subscriber.name] = failures[subscriber.name]
+                continue
+            try:
+                results[subscriber.name] = subscriber.result()
+            except Exception as e:
+                logger.error(f"{subscriber.name} analysis failed: {e}")
+                results[subscriber.name] = e
+
+        return results
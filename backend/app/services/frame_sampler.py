@@ -0,0 +1,256 @@
+"""
+Sparse frame sampling engine
+Decodes only the frames analyzers actually need instead of reading every frame
+"""
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from ..core.config import settings
+from ..core.logging_config import get_logger
+from .media_index import MediaIndex, media_index
+from .media_metadata import media_metadata
+
+logger = get_logger("frame_sampler")
+
+
+def interval_indices(total_frames: int, interval: int, max_frames: Optional[int] = None) -> List[int]:
+    """Frame indices at a fixed interval, optionally capped at max_frames"""
+    interval = max(1, interval)
+    if total_frames <= 0 and max_frames is not None:
+        # Frame count is unknown for some streams; read the leading frames instead
+        total_frames = max_frames * interval
+    indices = list(range(0, max(0, total_frames), interval))
+    return indices[:max_frames] if max_frames is not None else indices
+
+
+def evenly_spaced_indices(total_frames: int, max_frames: int) -> List[int]:
+    """Approximately max_frames indices spread across the whole video"""
+    return interval_indices(total_frames, max(1, total_frames // max(1, max_frames)), max_frames)
+
+
+class FrameSampler:
+    """
+    Random-access frame reader built on cv2.VideoCapture
+
+    Small gaps between requested frames are skipped with ``grab()`` (demux and
+    decode without the colour conversion of ``retrieve()``); large gaps are
+    crossed by seeking, which lets the decoder jump to the nearest keyframe.
+
+    Seeks go through the file's packet index (see media_index): the reader
+    jumps to the keyframe that precedes the target and identifies every
+    grabbed frame by its PTS, so positions stay exact on VFR and long-GOP
+    files. Without an index it seeks by frame number, and containers that
+    report inaccurate positions after such a seek make the sampler fall back
+    to sequential grabbing for the rest of the file.
+    """
+
+    def __init__(self, video_path: str, seek_threshold: Optional[int] = None):
+        self.video_path = video_path
+        self.seek_threshold = seek_threshold if seek_threshold is not None else settings.FRAME_SEEK_THRESHOLD
+        self.seek_enabled = True
+        self.decoded_frames = 0
+        self.cap = None
+        self.position = 0
+        self._metadata: Optional[Dict] = None
+        self._index: Optional[MediaIndex] = None
+        self._index_loaded = False
+        self._open()
+
+    def _open(self):
+        if self.cap is not None:
+            self.cap.release()
+        self.cap = cv2.VideoCapture(self.video_path)
+        if not self.cap.isOpened():
+            raise ValueError(f"Could not open video file: {self.video_path}")
+        self.position = 0
+
+    @property
+    def metadata(self) -> Dict:
+        """Container metadata from the shared probe cache; cv2 properties only when ffprobe cannot read the file"""
+        if self._metadata is None:
+            try:
+                self._metadata = media_metadata.get(self.video_path)["video"]
+            except Exception as e:
+                logger.warning(f"Falling back to OpenCV properties for {self.video_path}: {e}")
+                self._metadata = {
+                    "fps": self.cap.get(cv2.CAP_PROP_FPS) or 0.0,
+                    "frame_count": int(self.cap.get(cv2.CAP_PROP_FRAME_COUNT)),
+                    "width": int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH)),
+                    "height": int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+                }
+        return self._metadata
+
+    @property
+    def fps(self) -> float:
+        return self.metadata["fps"] or 0.0
+
+    @property
+    def total_frames(self) -> int:
+        return self.metadata["frame_count"] or 0
+
+    @property
+    def width(self) -> int:
+        return self.metadata["width"] or 0
+
+    @property
+    def height(self) -> int:
+        return self.metadata["height"] or 0
+
+    @property
+    def index(self) -> Optional[MediaIndex]:
+        """Packet index of the file, built on first use; None when it cannot be read"""
+        if not self._index_loaded:
+            self._index_loaded = True
+            try:
+                self._index = media_index.get(self.video_path)
+                if not self._index.frame_count or not self._index.keyframes:
+                    self._index = None
+            except Exception as e:
+                logger.warning(f"No packet index for {self.video_path}, seeking by frame number: {e}")
+        return self._index
+
+    def timestamp(self, frame_index: int) -> float:
+        """Presentation time of a frame in seconds"""
+        if self.index is not None:
+            return self.index.timestamp(frame_index)
+        return frame_index / self.fps if self.fps > 0 else 0.0
+
+    def close(self):
+        if self.cap is not None:
+            self.cap.release()
+            self.cap = None
+
+    def __enter__(self) -> "FrameSampler":
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def _seek(self, target: int) -> bool:
+        """Seek to target frame, returning False if the container seeks inaccurately"""
+        if not self.cap.set(cv2.CAP_PROP_POS_FRAMES, target):
+            return False
+        return int(self.cap.get(cv2.CAP_PROP_POS_FRAMES)) == target
+
+    def _grab_indexed(self, target: int) -> bool:
+        """
+        Grab frames until frame ``target`` is the last one grabbed, seeking via the packet index
+
+        Returns False if the frame cannot be decoded or the reader overshot it.
+        """
+        index = self._index
+        keyframe = index.keyframe_before(target)
+        if target < self.position or keyframe > self.position:
+            # OpenCV converts the time with the nominal frame rate, so the landing frame is identified by PTS below
+            self.cap.set(cv2.CAP_PROP_POS_MSEC, index.timestamp(keyframe) * 1000)
+
+        while True:
+            if not self.cap.grab():
+                return False
+            self.decoded_frames += 1
+            current = index.frame_at(self.cap.get(cv2.CAP_PROP_POS_MSEC) / 1000)
+            self.position = current + 1
+            if current >= target:
+                return current == target
+
+    def _advance_to(self, target: int) -> bool:
+        """Position the reader so that the next read() returns frame ``target``"""
+        if target < self.position:
+            # Going backwards always needs a seek (or a reopen when seeking is broken)
+            if self.seek_enabled and self._seek(target):
+                self.position = target
+                return True
+            self._open()
+
+        gap = target - self.position
+        if self.seek_enabled and gap > self.seek_threshold:
+            if self._seek(target):
+                self.position = target
+                return True
+
+            logger.warning(
+                f"Inaccurate seeking in {self.video_path}, falling back to sequential decoding"
+            )
+            self.seek_enabled = False
+            self._open()
+
+        while self.position < target:
+            if not self.cap.grab():
+                return False
+            self.position += 1
+            self.decoded_frames += 1
+
+        return True
+
+    def iter_frames(self, indices: Iterable[int]) -> Iterator[Tuple[int, np.ndarray]]:
+        """Yield (frame_index, BGR frame) for each requested index in ascending order"""
+        for target in sorted(set(indices)):
+            gap = target - self.position
+            if self.seek_enabled and (gap < 0 or gap > self.seek_threshold) and self.index is not None:
+                if self._grab_indexed(target):
+                    ret, frame = self.cap.retrieve()
+                    if not ret:
+                        break
+                    yield target, frame
+                    continue
+
+                logger.warning(
+                    f"Packet index and decoder disagree in {self.video_path}, falling back to sequential decoding"
+                )
+                self.seek_enabled = False
+                self._open()
+
+            if not self._advance_to(target):
+                break
+
+            ret, frame = self.cap.read()
+            if not ret:
+                break
+
+            self.position += 1
+            self.decoded_frames += 1
+            yield target, frame
+
+    def read_frame(self, index: int) -> Optional[np.ndarray]:
+        """Read a single BGR frame, or None if it cannot be decoded"""
+        for _, frame in self.iter_frames([index]):
+            return frame
+        return None
+
+
+def sample_frames(
+    video_path: str,
+    max_frames: int = 30,
+    interval: Optional[int] = None,
+    rgb: bool = True
+) -> List[np.ndarray]:
+    """
+    Extract up to max_frames frames, spaced evenly or at a fixed interval
+
+    Args:
+        video_path: Path to video file
+        max_frames: Maximum number of frames to return
+        interval: Fixed frame interval; defaults to spreading frames over the video
+        rgb: Convert frames from OpenCV's BGR to RGB
+
+    Returns:
+        List of decoded frames
+    """
+    with FrameSampler(video_path) as sampler:
+        total_frames = sampler.total_frames
+        if interval:
+            indices = interval_indices(total_frames, interval, max_frames)
+        else:
+            indices = evenly_spaced_indices(total_frames, max_frames)
+
+        frames = []
+        for _, frame in sampler.iter_frames(indices):
+            frames.append(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB) if rgb else frame)
+
+        logger.info(
+            f"Sampled {len(frames)} frames from {total_frames} "
+            f"({sampler.decoded_frames} decoded)"
+        )
+        return frames
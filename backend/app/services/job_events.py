@@ -0,0 +1,122 @@
+"""
+Job progress events
+Workers push status/progress events through a multiprocessing queue to the
+API process, where a broker fans them out to SSE and WebSocket subscribers
+"""
+import asyncio
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from ..core.logging_config import get_logger
+
+logger = get_logger("job_events")
+
+# Minimum seconds between progress events for one job; status changes always go out
+EVENT_MIN_INTERVAL = 0.25
+
+
+class JobCancelled(Exception):
+    """Raised inside a task when its job has been cancelled"""
+
+
+def make_event(job_id: str, status: str, progress: float, **details) -> Dict[str, Any]:
+    return {
+        "job_id": job_id,
+        "status": status,
+        "progress": round(float(progress), 1),
+        "details": details,
+        "timestamp": datetime.utcnow().isoformat()
+    }
+
+
+class JobEventBroker:
+    """Fans job events out to asyncio subscribers, from any thread"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers: Dict[str, List[Tuple[asyncio.AbstractEventLoop, asyncio.Queue]]] = {}
+        self._listener: Optional[threading.Thread] = None
+
+    def publish(self, event: Dict[str, Any]):
+        with self._lock:
+            subscribers = list(self._subscribers.get(event["job_id"], ()))
+        for loop, queue in subscribers:
+            try:
+                loop.call_soon_threadsafe(queue.put_nowait, event)
+            except RuntimeError:
+                # Subscriber's loop has closed
+                pass
+
+    def subscribe(self, job_id: str) -> asyncio.Queue:
+        """Queue receiving every future event of job_id; call from the consuming event loop"""
+        queue: asyncio.Queue = asyncio.Queue()
+        with self._lock:
+            self._subscribers.setdefault(job_id, []).append((asyncio.get_running_loop(), queue))
+        return queue
+
+    def unsubscribe(self, job_id: str, queue: asyncio.Queue):
+        with self._lock:
+            remaining = [(loop, q) for loop, q in self._subscribers.get(job_id, []) if q is not queue]
+            if remaining:
+                self._subscribers[job_id] = remaining
+            else:
+                self._subscribers.pop(job_id, None)
+
+    def subscriber_count(self) -> int:
+        with self._lock:
+            return sum(len(subscribers) for subscribers in self._subscribers.values())
+
+    def listen(self, source_queue):
+        """Relay events from a multiprocessing queue on a daemon thread"""
+        def relay():
+            while True:
+                try:
+                    event = source_queue.get()
+                except (EOFError, OSError):
+                    break
+                if event is None:
+                    break
+                self.publish(event)
+
+        self._listener = threading.Thread(target=relay, name="job-event-relay", daemon=True)
+        self._listener.start()
+
+
+# Create global broker instance (API process side)
+job_event_broker = JobEventBroker()
+
+# Set in worker processes to the queue read by the API process
+_worker_queue = None
+
+
+def set_worker_queue(queue):
+    global _worker_queue
+    _worker_queue = queue
+
+
+def emit(event: Dict[str, Any]):
+    """Send an event to subscribers, crossing the process boundary when running in a worker"""
+    if _worker_queue is not None:
+        try:
+            _worker_queue.put_nowait(event)
+        except Exception as e:
+            logger.warning(f"Dropping job event for {event['job_id']}: {e}")
+    else:
+        job_event_broker.publish(event)
+
+
+class EventThrottle:
+    """Rate limit for progress events of one job"""
+
+    def __init__(self, interval: float = EVENT_MIN_INTERVAL):
+        self.interval = interval
+        self._last = 0.0
+
+    def ready(self, final: bool = False) -> bool:
+        now = time.monotonic()
+        if final or now - self._last >= self.interval:
+            self._last = now
+            return True
+        return False
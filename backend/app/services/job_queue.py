@@ -0,0 +1,403 @@
+"""
+Persistent job queue
+SQLite-backed jobs executed by a pool of worker processes, with priorities,
+retries, cooperative cancellation and progress reporting. Needs no broker:
+the jobs table is the queue, so jobs survive restarts on a single box.
+"""
+import importlib
+import multiprocessing
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional
+
+from ..core.config import settings
+from ..core.logging_config import get_logger
+from ..database import SessionLocal, engine
+from ..models.database import Job
+from .job_events import EventThrottle, JobCancelled, emit, job_event_broker, make_event, set_worker_queue
+
+logger = get_logger("job_queue")
+
+# Task name -> "module:function" relative to the app package. Workers are
+# separate processes, so tasks are resolved by import path rather than by
+# registering callables at runtime.
+TASKS: Dict[str, str] = {
+    "background_removal.video": "api.background_removal:process_video_background_removal",
+    "video.process": "services.video_processor:process_video_job",
+}
+
+_APP_PACKAGE = __name__.split(".")[0]
+
+JOB_STATUSES = ("queued", "running", "completed", "failed", "cancelled")
+FINISHED_STATUSES = ("completed", "failed", "cancelled")
+
+# Minimum seconds between progress writes, so tight loops do not hammer SQLite
+PROGRESS_WRITE_INTERVAL = 1.0
+
+
+def resolve_task(task: str) -> Callable:
+    """Import the function registered for task"""
+    if task not in TASKS:
+        raise ValueError(f"Unknown job task: {task}")
+    module_name, _, function_name = TASKS[task].partition(":")
+    module = importlib.import_module(f"{_APP_PACKAGE}.{module_name}")
+    return getattr(module, function_name)
+
+
+def job_to_dict(job: Job) -> Dict[str, Any]:
+    """Serializable view of a job row"""
+    return {
+        "job_id": job.job_id,
+        "task": job.task,
+        "payload": job.payload,
+        "priority": job.priority,
+        "status": job.status,
+        "progress": job.progress,
+        "result": job.result,
+        "error_message": job.error_message,
+        "attempts": job.attempts,
+        "max_attempts": job.max_attempts,
+        "cancel_requested": job.cancel_requested,
+        "worker_id": job.worker_id,
+        "created_at": job.created_at.isoformat() if job.created_at else None,
+        "started_at": job.started_at.isoformat() if job.started_at else None,
+        "completed_at": job.completed_at.isoformat() if job.completed_at else None
+    }
+
+
+def create_job_table():
+    """Create the jobs table if it does not exist"""
+    Job.__table__.create(bind=engine, checkfirst=True)
+
+
+def enqueue(task: str, payload: Dict[str, Any], priority: int = 0, max_attempts: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Add a job to the queue and make sure workers are running
+
+    Args:
+        task: Name registered in TASKS
+        payload: JSON-serializable keyword arguments for the task function
+        priority: Higher values are picked first
+        max_attempts: Total tries before the job fails; defaults to settings.JOB_MAX_ATTEMPTS
+
+    Returns:
+        The queued job
+    """
+    if task not in TASKS:
+        raise ValueError(f"Unknown job task: {task}")
+
+    job_manager.ensure_started()
+    db = SessionLocal()
+    try:
+        job = Job(
+            task=task,
+            payload=payload,
+            priority=priority,
+            max_attempts=max_attempts or settings.JOB_MAX_ATTEMPTS
+        )
+        db.add(job)
+        db.commit()
+        db.refresh(job)
+        logger.info(f"Queued job {job.job_id} ({task}, priority {priority})")
+        return job_to_dict(job)
+    finally:
+        db.close()
+
+
+def get_job(job_id: str) -> Optional[Dict[str, Any]]:
+    db = SessionLocal()
+    try:
+        job = db.query(Job).filter(Job.job_id == job_id).first()
+        return job_to_dict(job) if job else None
+    finally:
+        db.close()
+
+
+def list_jobs(status: Optional[str] = None, task: Optional[str] = None, limit: int = 50) -> List[Dict[str, Any]]:
+    db = SessionLocal()
+    try:
+        query = db.query(Job)
+        if status:
+            query = query.filter(Job.status == status)
+        if task:
+            query = query.filter(Job.task == task)
+        jobs = query.order_by(Job.created_at.desc()).limit(limit).all()
+        return [job_to_dict(job) for job in jobs]
+    finally:
+        db.close()
+
+
+def cancel_job(job_id: str) -> Optional[Dict[str, Any]]:
+    """
+    Cancel a job: queued jobs stop immediately, running jobs stop at their next progress report
+    """
+    db = SessionLocal()
+    try:
+        job = db.query(Job).filter(Job.job_id == job_id).first()
+        if job is None:
+            return None
+        if job.status == "queued":
+            job.status = "cancelled"
+            job.completed_at = datetime.utcnow()
+        elif job.status == "running":
+            job.cancel_requested = True
+        db.commit()
+        db.refresh(job)
+        if job.status == "cancelled":
+            emit(make_event(job_id, "cancelled", job.progress or 0))
+        logger.info(f"Cancellation requested for job {job_id} (status: {job.status})")
+        return job_to_dict(job)
+    finally:
+        db.close()
+
+
+def claim_next_job(worker_id: str) -> Optional[Dict[str, Any]]:
+    """Atomically move the highest-priority runnable job to running for this worker"""
+    db = SessionLocal()
+    try:
+        now = datetime.utcnow()
+        candidates = (
+            db.query(Job.id)
+            .filter(Job.status == "queued", Job.run_after <= now)
+            .order_by(Job.priority.desc(), Job.created_at)
+            .limit(5)
+            .all()
+        )
+        for (candidate_id,) in candidates:
+            # The status guard makes this a compare-and-swap against other workers
+            claimed = (
+                db.query(Job)
+                .filter(Job.id == candidate_id, Job.status == "queued")
+                .update({
+                    Job.status: "running",
+                    Job.worker_id: worker_id,
+                    Job.attempts: Job.attempts + 1,
+                    Job.progress: 0,
+                    Job.started_at: now,
+                    Job.heartbeat_at: now
+                }, synchronize_session=False)
+            )
+            db.commit()
+            if claimed:
+                return job_to_dict(db.query(Job).filter(Job.id == candidate_id).first())
+        return None
+    finally:
+        db.close()
+
+
+def requeue_stale_jobs() -> int:
+    """Return running jobs whose worker stopped heartbeating to the queue (or fail them when out of attempts)"""
+    db = SessionLocal()
+    try:
+        cutoff = datetime.utcnow() - timedelta(seconds=settings.JOB_STALE_SECONDS)
+        stale = db.query(Job).filter(Job.status == "running", Job.heartbeat_at < cutoff).all()
+        for job in stale:
+            if job.cancel_requested:
+                job.status = "cancelled"
+                job.completed_at = datetime.utcnow()
+            elif job.attempts < job.max_attempts:
+                job.status = "queued"
+                job.run_after = datetime.utcnow()
+            else:
+                job.status = "failed"
+                job.error_message = "Worker stopped responding"
+                job.completed_at = datetime.utcnow()
+            logger.warning(f"Recovered stale job {job.job_id} from {job.worker_id}: now {job.status}")
+        db.commit()
+        return len(stale)
+    finally:
+        db.close()
+
+
+def _update_job(job_id: str, **fields) -> Optional[Job]:
+    db = SessionLocal()
+    try:
+        job = db.query(Job).filter(Job.job_id == job_id).first()
+        if job is None:
+            return None
+        for name, value in fields.items():
+            setattr(job, name, value)
+        db.commit()
+        db.refresh(job)
+        db.expunge(job)
+        return job
+    finally:
+        db.close()
+
+
+class ProgressReporter:
+    """
+    Progress callback handed to tasks as ``progress_callback``
+
+    Calling it with a percentage (plus optional counters such as ``frame``
+    or ``fps``) streams a progress event, records progress and refreshes
+    the heartbeat; it raises JobCancelled once cancellation has been requested.
+    """
+
+    def __init__(self, job_id: str):
+        self.job_id = job_id
+        self._events = EventThrottle()
+        self._writes = EventThrottle(PROGRESS_WRITE_INTERVAL)
+
+    def __call__(self, percent: float, **details):
+        percent = max(0.0, min(100.0, percent))
+        final = percent >= 100
+        if self._events.ready(final):
+            emit(make_event(self.job_id, "running", percent, **details))
+        if not self._writes.ready(final):
+            return
+        job = _update_job(self.job_id, progress=int(percent), heartbeat_at=datetime.utcnow())
+        if job is not None and job.cancel_requested:
+            raise JobCancelled(f"Job {self.job_id} cancelled")
+
+
+def _heartbeat(job_id: str, stop: threading.Event):
+    # Keeps long tasks that rarely report progress from looking stale
+    interval = max(1.0, settings.JOB_STALE_SECONDS / 3)
+    while not stop.wait(interval):
+        try:
+            _update_job(job_id, heartbeat_at=datetime.utcnow())
+        except Exception as e:
+            logger.warning(f"Heartbeat for job {job_id} failed: {e}")
+
+
+def execute_job(job: Dict[str, Any]):
+    """Run a claimed job and record its outcome"""
+    job_id = job["job_id"]
+    stop_heartbeat = threading.Event()
+    heartbeat = threading.Thread(target=_heartbeat, args=(job_id, stop_heartbeat), daemon=True)
+    heartbeat.start()
+
+    start_time = time.time()
+    logger.info(f"Running job {job_id} ({job['task']}), attempt {job['attempts']}/{job['max_attempts']}")
+    emit(make_event(job_id, "running", 0, attempt=job["attempts"]))
+    try:
+        task = resolve_task(job["task"])
+        result = task(**job["payload"], progress_callback=ProgressReporter(job_id))
+        _update_job(
+            job_id,
+            status="completed",
+            progress=100,
+            result=result,
+            error_message=None,
+            completed_at=datetime.utcnow()
+        )
+        logger.info(f"Job {job_id} completed in {time.time() - start_time:.2f}s")
+        emit(make_event(job_id, "completed", 100, result=result))
+
+    except JobCancelled:
+        job_row = _update_job(job_id, status="cancelled", completed_at=datetime.utcnow())
+        logger.info(f"Job {job_id} cancelled")
+        emit(make_event(job_id, "cancelled", job_row.progress if job_row else 0))
+
+    except Exception as e:
+        logger.error(f"Job {job_id} failed: {str(e)}")
+        if job["attempts"] < job["max_attempts"]:
+            backoff = settings.JOB_RETRY_BACKOFF * (2 ** (job["attempts"] - 1))
+            _update_job(
+                job_id,
+                status="queued",
+                error_message=str(e),
+                run_after=datetime.utcnow() + timedelta(seconds=backoff)
+            )
+            logger.info(f"Job {job_id} will retry in {backoff:.0f}s")
+            emit(make_event(job_id, "queued", 0, error_message=str(e), retry_in=backoff))
+        else:
+            _update_job(job_id, status="failed", error_message=str(e), completed_at=datetime.utcnow())
+            emit(make_event(job_id, "failed", 0, error_message=str(e)))
+
+    finally:
+        stop_heartbeat.set()
+
+
+def worker_loop(worker_id: str, stop_event, poll_interval: float, event_queue=None):
+    """Claim and execute jobs until stop_event is set"""
+    set_worker_queue(event_queue)
+    logger.info(f"Job worker {worker_id} started (pid {os.getpid()})")
+    last_recovery = 0.0
+    while not stop_event.is_set():
+        try:
+            job = claim_next_job(worker_id)
+            if job is not None:
+                execute_job(job)
+                continue
+
+            if time.monotonic() - last_recovery > settings.JOB_STALE_SECONDS / 3:
+                requeue_stale_jobs()
+                last_recovery = time.monotonic()
+        except Exception as e:
+            logger.error(f"Job worker {worker_id} error: {str(e)}")
+        stop_event.wait(poll_interval)
+    logger.info(f"Job worker {worker_id} stopped")
+
+
+class JobManager:
+    """Owns the worker processes of this server"""
+
+    def __init__(self, num_workers: int):
+        self.num_workers = max(1, num_workers)
+        self._context = multiprocessing.get_context("spawn")
+        self._stop_event = None
+        self._event_queue = None
+        self._workers: List[multiprocessing.Process] = []
+        self._lock = threading.Lock()
+
+    @property
+    def running(self) -> bool:
+        return any(worker.is_alive() for worker in self._workers)
+
+    def ensure_started(self):
+        if not self.running:
+            self.start()
+
+    def start(self):
+        with self._lock:
+            if self.running:
+                return
+            create_job_table()
+            self._stop_event = self._context.Event()
+            if self._event_queue is None:
+                # Worker progress events are relayed to SSE/WebSocket subscribers in this process
+                self._event_queue = self._context.Queue()
+                job_event_broker.listen(self._event_queue)
+            self._workers = []
+            for index in range(self.num_workers):
+                worker_id = f"{os.getpid()}-{index}"
+                process = self._context.Process(
+                    target=worker_loop,
+                    args=(worker_id, self._stop_event, settings.JOB_POLL_INTERVAL, self._event_queue),
+                    name=f"job-worker-{index}",
+                    daemon=True
+                )
+                process.start()
+                self._workers.append(process)
+            logger.info(f"Started {self.num_workers} job workers")
+
+    def stop(self, timeout: float = 10.0):
+        with self._lock:
+            if self._stop_event is not None:
+                self._stop_event.set()
+            for process in self._workers:
+                process.join(timeout)
+                if process.is_alive():
+                    process.terminate()
+            self._workers = []
+
+    def stats(self) -> Dict[str, Any]:
+        db = SessionLocal()
+        try:
+            counts = {status: db.query(Job).filter(Job.status == status).count() for status in JOB_STATUSES}
+        finally:
+            db.close()
+        return {
+            "workers": self.num_workers,
+            "workers_alive": sum(1 for worker in self._workers if worker.is_alive()),
+            "event_subscribers": job_event_broker.subscriber_count(),
+            "jobs": counts
+        }
+
+
+# Create global job manager instance; workers start on first enqueue or at startup
+job_manager = JobManager(settings.JOB_WORKERS)
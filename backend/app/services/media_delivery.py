@@ -0,0 +1,182 @@
+"""
+Media delivery
+File responses for the editor player and downloads: single byte ranges
+(206), strong ETags from the content hash with If-None-Match/If-Range,
+Cache-Control for immutable files and zero-copy sends where the server
+supports them
+"""
+import mimetypes
+import os
+from email.utils import formatdate
+from typing import Dict, Optional, Tuple
+
+import aiofiles
+from starlette.requests import Request
+from starlette.responses import Response
+from starlette.types import Receive, Scope, Send
+
+from ..core.executors import thread_executor
+from ..core.logging_config import get_logger
+from .analysis_cache import file_content_hash
+
+logger = get_logger("media_delivery")
+
+SEND_CHUNK_SIZE = 256 * 1024
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+REVALIDATE_CACHE_CONTROL = "no-cache"
+
+# Container types the platform mimetypes database often lacks
+for _type, _extension in [
+    ("video/mp4", ".mp4"),
+    ("video/quicktime", ".mov"),
+    ("video/x-matroska", ".mkv"),
+    ("video/webm", ".webm"),
+    ("video/x-msvideo", ".avi"),
+    ("video/mp2t", ".ts"),
+    ("audio/mp4", ".m4a"),
+    ("audio/flac", ".flac"),
+    ("audio/ogg", ".ogg"),
+    ("audio/wav", ".wav")
+]:
+    mimetypes.add_type(_type, _extension)
+
+
+def guess_media_type(path: str) -> str:
+    media_type, _ = mimetypes.guess_type(path)
+    return media_type or "application/octet-stream"
+
+
+def parse_range(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """
+    Parse a Range header into one [start, end) byte range
+
+    Returns None when the header is absent, malformed or asks for several
+    ranges (the full file is served instead). Raises ValueError when the
+    range cannot be satisfied.
+    """
+    if not header or not header.startswith("bytes="):
+        return None
+    spec = header[len("bytes="):].strip()
+    if "," in spec:
+        return None
+
+    first, sep, last = spec.partition("-")
+    if not sep or not (first or last) or not all(part.isdigit() for part in (first, last) if part):
+        return None
+
+    if first:
+        start = int(first)
+        end = min(int(last) + 1, size) if last else size
+    else:
+        # Suffix range: the final N bytes
+        start = max(size - int(last), 0)
+        end = size
+    if start >= end:
+        raise ValueError(f"Range {spec} not satisfiable for {size} bytes")
+    return start, end
+
+
+def _etag_matches(header: Optional[str], etag: str) -> bool:
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    # Weak comparison for If-None-Match: W/"x" matches "x"
+    return any(tag.strip().removeprefix("W/") == etag for tag in header.split(","))
+
+
+class MediaFileResponse(Response):
+    """Sends [start, end) of a file, with zero-copy extensions when the ASGI server offers them"""
+
+    def __init__(self, path: str, start: int, end: int, status_code: int, headers: Dict[str, str], media_type: str):
+        super().__init__(status_code=status_code, headers=headers, media_type=media_type)
+        self.path = path
+        self.start = start
+        self.end = end
+        self.headers["content-length"] = str(end - start)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+        if scope.get("method") == "HEAD":
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+            return
+
+        extensions = scope.get("extensions") or {}
+        if "http.response.zerocopysend" in extensions:
+            # Kernel copies straight from the page cache to the socket
+            with open(self.path, "rb") as f:
+                await send({
+                    "type": "http.response.zerocopysend",
+                    "file": f,
+                    "offset": self.start,
+                    "count": self.end - self.start,
+                    "more_body": False
+                })
+            return
+        if "http.response.pathsend" in extensions and self.start == 0 and self.end == os.path.getsize(self.path):
+            await send({"type": "http.response.pathsend", "path": os.path.abspath(self.path)})
+            return
+
+        remaining = self.end - self.start
+        async with aiofiles.open(self.path, "rb") as f:
+            await f.seek(self.start)
+            while remaining > 0:
+                chunk = await f.read(min(SEND_CHUNK_SIZE, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                await send({"type": "http.response.body", "body": chunk, "more_body": remaining > 0})
+        if remaining > 0:
+            # File shrank underneath us; end the response rather than hang
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+
+async def media_response(
+    request: Request,
+    path: str,
+    download_name: Optional[str] = None,
+    immutable: bool = False
+) -> Response:
+    """
+    Serve path honouring Range, If-Range and If-None-Match
+
+    immutable marks content that can never change under this URL (content-
+    addressed or versioned by ``?v=<sha256>``); everything else is cached
+    with ``no-cache`` and revalidated by ETag, which costs a 304.
+    """
+    stat = os.stat(path)
+    size = stat.st_size
+    # Stored by uploads and renders, otherwise hashed once per path/size/mtime
+    digest = await thread_executor.run(file_content_hash, path)
+    etag = f'"{digest}"'
+    if request.query_params.get("v") == digest:
+        immutable = True
+
+    headers = {
+        "etag": etag,
+        "accept-ranges": "bytes",
+        "cache-control": IMMUTABLE_CACHE_CONTROL if immutable else REVALIDATE_CACHE_CONTROL,
+        "last-modified": formatdate(stat.st_mtime, usegmt=True)
+    }
+    if download_name:
+        headers["content-disposition"] = f'attachment; filename="{download_name}"'
+
+    if _etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+
+    byte_range = None
+    if_range = request.headers.get("if-range")
+    # A stale If-Range validator means the client's partial copy is outdated: send everything
+    if not if_range or if_range.strip() == etag:
+        try:
+            byte_range = parse_range(request.headers.get("range"), size)
+        except ValueError:
+            return Response(status_code=416, headers={**headers, "content-range": f"bytes */{size}"})
+
+    media_type = guess_media_type(download_name or path)
+    if byte_range is None:
+        return MediaFileResponse(path, 0, size, 200, headers, media_type)
+
+    start, end = byte_range
+    headers["content-range"] = f"bytes {start}-{end - 1}/{size}"
+    return MediaFileResponse(path, start, end, 206, headers, media_type)
@@ -0,0 +1,147 @@
+"""
+Per-file packet index
+Presentation timestamps, keyframe positions and byte offsets of every video
+frame, read from the container once with ffprobe (no decoding) and persisted
+so seeks and timestamp lookups are binary searches
+"""
+import asyncio
+import subprocess
+from array import array
+from bisect import bisect_left, bisect_right
+from typing import Iterable, List, Optional, Tuple
+
+from ..core.cache import create_cache
+from ..core.config import settings
+from ..core.logging_config import get_logger
+from .analysis_cache import file_stat_key
+from .media_metadata import MediaProbeError
+
+logger = get_logger("media_index")
+
+# Indexes are a few bytes per frame; the disk tier keeps them across restarts
+index_cache = create_cache("media_index", settings.MEDIA_INDEX_CACHE_MEMORY_MB, settings.MEDIA_INDEX_CACHE_DISK_MB)
+
+INDEX_ARGS = [
+    "ffprobe", "-v", "error",
+    "-select_streams", "v:0",
+    "-show_entries", "packet=pts_time,dts_time,pos,flags",
+    "-of", "compact=p=0"
+]
+
+
+def _field(value: Optional[str]) -> Optional[str]:
+    return value if value not in (None, "", "N/A") else None
+
+
+def parse_packet_line(line: str) -> Optional[Tuple[float, int, bool]]:
+    """(presentation time, byte offset, is keyframe) from one ``-of compact`` packet line"""
+    fields = dict(item.partition("=")[::2] for item in line.strip().split("|") if "=" in item)
+    pts_time = _field(fields.get("pts_time")) or _field(fields.get("dts_time"))
+    if pts_time is None:
+        return None
+    pos = _field(fields.get("pos"))
+    return float(pts_time), int(pos) if pos is not None else -1, "K" in fields.get("flags", "")
+
+
+class MediaIndex:
+    """
+    Frame n of the video is the n-th packet in presentation order
+
+    Packets arrive in decode order, so B-frame streams are re-sorted by PTS;
+    timestamps are reported relative to the first frame, matching the
+    timeline ffmpeg and the editor use.
+    """
+
+    def __init__(self, packets: Iterable[Tuple[float, int, bool]]):
+        ordered = sorted(packets)
+        start = ordered[0][0] if ordered else 0.0
+        self.start_time = start
+        self.pts = array("d", (pts - start for pts, _, _ in ordered))
+        self.pos = array("q", (pos for _, pos, _ in ordered))
+        self.keyframes = array("l", (n for n, (_, _, key) in enumerate(ordered) if key))
+        self.keyframe_pts = array("d", (self.pts[n] for n in self.keyframes))
+
+    @property
+    def frame_count(self) -> int:
+        return len(self.pts)
+
+    def timestamp(self, frame_index: int) -> float:
+        """Presentation time of a frame in seconds"""
+        if not self.pts:
+            return 0.0
+        return self.pts[min(max(frame_index, 0), len(self.pts) - 1)]
+
+    def frame_at(self, seconds: float) -> int:
+        """Index of the frame on screen at seconds"""
+        return max(bisect_right(self.pts, seconds + 1e-6) - 1, 0)
+
+    def keyframe_before(self, frame_index: int) -> int:
+        """Nearest keyframe at or before frame_index; decoding must start there"""
+        i = bisect_right(self.keyframes, frame_index) - 1
+        return self.keyframes[i] if i >= 0 else 0
+
+    def keyframe_times(self) -> List[float]:
+        return self.keyframe_pts.tolist()
+
+    def is_keyframe_at(self, seconds: float, tolerance: float = 0.001) -> bool:
+        i = bisect_left(self.keyframe_pts, seconds - tolerance)
+        return i < len(self.keyframe_pts) and self.keyframe_pts[i] <= seconds + tolerance
+
+    def byte_offset(self, frame_index: int) -> int:
+        """File offset of the packet holding frame_index, or -1 when the container does not report it"""
+        return self.pos[frame_index] if 0 <= frame_index < len(self.pos) else -1
+
+
+class MediaIndexStore:
+    """Builds, caches and persists MediaIndex objects keyed by path, size and mtime"""
+
+    def __init__(self, cache=index_cache):
+        self.cache = cache
+
+    def get(self, path: str) -> MediaIndex:
+        cache_key = file_stat_key(path, "media_index")
+        cached = self.cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+        result = subprocess.run(INDEX_ARGS + [path], stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        if result.returncode != 0:
+            raise MediaProbeError(f"ffprobe failed: {result.stderr.decode(errors='replace')}")
+        return self._store(cache_key, result.stdout.decode().splitlines())
+
+    async def aget(self, path: str) -> MediaIndex:
+        cache_key = file_stat_key(path, "media_index")
+        cached = self.cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+        process = await asyncio.create_subprocess_exec(
+            *INDEX_ARGS, path,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE
+        )
+        stdout, stderr = await process.communicate()
+        if process.returncode != 0:
+            raise MediaProbeError(f"ffprobe failed: {stderr.decode(errors='replace')}")
+        return self._store(cache_key, stdout.decode().splitlines())
+
+    def _store(self, cache_key: str, lines: List[str]) -> MediaIndex:
+        index = MediaIndex(packet for packet in map(parse_packet_line, lines) if packet is not None)
+        self.cache.set(cache_key, index)
+        logger.info(f"Indexed {index.frame_count} frames, {len(index.keyframes)} keyframes")
+        return index
+
+    def remember(self, path: str, index: MediaIndex):
+        """Store an index built elsewhere (e.g. from packets seen while uploading)"""
+        self.cache.set(file_stat_key(path, "media_index"), index)
+
+    def peek(self, path: str) -> Optional[MediaIndex]:
+        """The index if it has already been built, without probing"""
+        try:
+            return self.cache.get(file_stat_key(path, "media_index"))
+        except OSError:
+            return None
+
+
+# Create global media index store
+media_index = MediaIndexStore()
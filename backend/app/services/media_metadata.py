@@ -0,0 +1,163 @@
+"""
+Media metadata service
+Probes each file with ffprobe once and serves duration, streams and exact
+frame rate to every caller from a cache keyed by path, size and
+modification time
+"""
+import asyncio
+import json
+import subprocess
+from fractions import Fraction
+from typing import Dict
+
+from ..core.cache import create_cache
+from ..core.config import settings
+from ..core.logging_config import get_logger
+from .analysis_cache import file_stat_key
+
+logger = get_logger("media_metadata")
+
+# ffprobe results, shared across workers when CACHE_BACKEND is redis
+metadata_cache = create_cache("metadata", settings.METADATA_CACHE_MEMORY_MB, settings.METADATA_CACHE_DISK_MB)
+
+PROBE_ARGS = ["ffprobe", "-v", "error", "-print_format", "json", "-show_format", "-show_streams"]
+# Cache namespace; bump when summarize_probe output changes
+PROBE_NAMESPACE = "ffprobe:2"
+
+
+class MediaProbeError(RuntimeError):
+    """ffprobe could not read the file"""
+
+
+def parse_rate(value) -> Fraction:
+    """
+    Parse an ffprobe rational such as ``30000/1001`` or ``25``
+
+    Returns Fraction(0) for missing or undefined rates (``0/0``, ``N/A``).
+    """
+    if value in (None, "", "N/A"):
+        return Fraction(0)
+    num, _, den = str(value).partition("/")
+    try:
+        denominator = int(den) if den else 1
+        if denominator == 0:
+            return Fraction(0)
+        return Fraction(int(num), denominator)
+    except ValueError:
+        try:
+            return Fraction(value).limit_denominator(1001000)
+        except (ValueError, ZeroDivisionError):
+            return Fraction(0)
+
+
+def _number(value, cast=float, default=0):
+    try:
+        return cast(value) if value not in (None, "", "N/A") else default
+    except (TypeError, ValueError):
+        return default
+
+
+def summarize_probe(info: Dict) -> Dict:
+    """
+    Normalize ffprobe ``-show_format -show_streams`` output
+
+    ``fps`` is a float for arithmetic; ``frame_rate`` keeps the exact rational
+    as an ffmpeg-compatible ``num/den`` string.
+    """
+    media_format = info.get("format", {})
+    streams = info.get("streams", [])
+    video_stream = next((s for s in streams if s.get("codec_type") == "video"), {})
+    audio_stream = next((s for s in streams if s.get("codec_type") == "audio"), {})
+
+    # avg_frame_rate is the real rate; r_frame_rate is the timebase guess and overstates VFR/interlaced input
+    rate = parse_rate(video_stream.get("avg_frame_rate")) or parse_rate(video_stream.get("r_frame_rate"))
+    duration = _number(media_format.get("duration")) or _number(video_stream.get("duration"))
+    frame_count = _number(video_stream.get("nb_frames"), int)
+    if not frame_count and rate and duration:
+        frame_count = int(round(duration * rate))
+
+    return {
+        "container": media_format.get("format_name"),
+        "duration": duration,
+        "size": _number(media_format.get("size"), int),
+        "bitrate": _number(media_format.get("bit_rate"), int),
+        "video": {
+            "codec": video_stream.get("codec_name"),
+            "width": _number(video_stream.get("width"), int, None),
+            "height": _number(video_stream.get("height"), int, None),
+            "fps": float(rate),
+            "frame_rate": f"{rate.numerator}/{rate.denominator}",
+            "frame_count": frame_count,
+            "pix_fmt": video_stream.get("pix_fmt"),
+            "profile": video_stream.get("profile"),
+            "level": _number(video_stream.get("level"), int, None),
+            "refs": _number(video_stream.get("refs"), int, None)
+        },
+        "audio": {
+            "codec": audio_stream.get("codec_name"),
+            "sample_rate": audio_stream.get("sample_rate"),
+            "channels": audio_stream.get("channels")
+        },
+        "streams": [
+            {
+                "index": s.get("index"),
+                "codec_type": s.get("codec_type"),
+                "codec_name": s.get("codec_name")
+            }
+            for s in streams
+        ]
+    }
+
+
+class MediaMetadataService:
+    """
+    Single source of container metadata for the editing and analysis code
+
+    Entries are keyed by ``file_stat_key`` so a file rewritten in place is
+    probed again. ``get`` is for worker threads and processes; ``aget`` runs
+    ffprobe without blocking the event loop. Per-frame timing lives in
+    media_index.
+    """
+
+    def __init__(self, cache=metadata_cache):
+        self.cache = cache
+
+    def get(self, path: str) -> Dict:
+        """Summarized metadata for path (see summarize_probe)"""
+        cache_key = file_stat_key(path, PROBE_NAMESPACE)
+        cached = self.cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+        result = subprocess.run(PROBE_ARGS + [path], stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        if result.returncode != 0:
+            raise MediaProbeError(f"ffprobe failed: {result.stderr.decode(errors='replace')}")
+        metadata = summarize_probe(json.loads(result.stdout.decode()))
+        self.cache.set(cache_key, metadata)
+        return metadata
+
+    async def aget(self, path: str) -> Dict:
+        cache_key = file_stat_key(path, PROBE_NAMESPACE)
+        cached = self.cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+        process = await asyncio.create_subprocess_exec(
+            *PROBE_ARGS, path,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE
+        )
+        stdout, stderr = await process.communicate()
+        if process.returncode != 0:
+            raise MediaProbeError(f"ffprobe failed: {stderr.decode(errors='replace')}")
+        metadata = summarize_probe(json.loads(stdout.decode()))
+        self.cache.set(cache_key, metadata)
+        return metadata
+
+    def remember(self, path: str, info: Dict):
+        """Seed the cache for a file probed elsewhere (e.g. while uploading)"""
+        self.cache.set(file_stat_key(path, PROBE_NAMESPACE), summarize_probe(info))
+
+
+# Create global media metadata service
+media_metadata = MediaMetadataService()
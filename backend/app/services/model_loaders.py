@@ -0,0 +1,58 @@
+"""
+Shared model loaders for the model registry
+Each loader builds one model; the registry decides when it is loaded and evicted
+"""
+from typing import Any, Dict, Optional
+
+from ..core.config import settings
+
+DETR_MODEL_ID = "facebook/detr-resnet-50"
+RESNET_MODEL_ID = "microsoft/resnet-50"
+VIT_MODEL_ID = "google/vit-base-patch16-224"
+
+
+def _load_processor_and_model(model_id: str, model_class: Any) -> Dict[str, Any]:
+    from transformers import AutoImageProcessor
+
+    model = model_class.from_pretrained(model_id)
+    return {
+        "processor": AutoImageProcessor.from_pretrained(model_id),
+        "model": model.to(settings.DEVICE).eval()
+    }
+
+
+def load_detr() -> Dict[str, Any]:
+    """DETR object detector as {"processor", "model"}"""
+    from transformers import AutoModelForObjectDetection
+
+    return _load_processor_and_model(DETR_MODEL_ID, AutoModelForObjectDetection)
+
+
+def load_image_classifier(model_id: str) -> Dict[str, Any]:
+    """Any HuggingFace image classifier as {"processor", "model"}"""
+    from transformers import AutoModelForImageClassification
+
+    return _load_processor_and_model(model_id, AutoModelForImageClassification)
+
+
+def load_resnet() -> Dict[str, Any]:
+    """ResNet-50 ImageNet classifier as {"processor", "model"}"""
+    return load_image_classifier(RESNET_MODEL_ID)
+
+
+def load_vit() -> Dict[str, Any]:
+    """ViT-Base ImageNet classifier as {"processor", "model"}"""
+    return load_image_classifier(VIT_MODEL_ID)
+
+
+def load_pipeline(task: str, model_id: Optional[str] = None) -> Any:
+    """HuggingFace pipeline for task on the configured device; model_id None uses the task default"""
+    from transformers import pipeline
+
+    kwargs = {"model": model_id} if model_id else {}
+    return pipeline(task, device=0 if settings.DEVICE == "cuda" else -1, **kwargs)
+
+
+def pipeline_id(task: str, model_id: Optional[str] = None) -> str:
+    """Registry key for a pipeline, distinct from the bare model so task heads do not collide"""
+    return f"{task}:{model_id or 'default'}"
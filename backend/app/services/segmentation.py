@@ -0,0 +1,65 @@
+"""
+Frame segmentation
+Turns per-frame measurements (RMS, energy, scores) into time segments with
+NumPy run-length encoding, so hour-long signals are segmented without a
+Python loop over frames
+"""
+from typing import Optional
+
+import numpy as np
+
+
+def mask_runs(mask: np.ndarray) -> np.ndarray:
+    """[start, stop) frame indices of every run of True in mask, as an (n, 2) array"""
+    edges = np.flatnonzero(np.diff(np.concatenate(([0], np.asarray(mask, dtype=np.int8), [0]))))
+    return edges.reshape(-1, 2)
+
+
+def hysteresis_mask(values: np.ndarray, enter: float, exit: float, below: bool = True) -> np.ndarray:
+    """
+    True from the frame values cross enter until they cross back over exit
+
+    With below=True a run starts where values < enter and lasts until
+    values > exit (exit >= enter), so values dithering around a single
+    threshold do not split one segment into many. Frames between the two
+    thresholds keep the state of the last frame that crossed either one.
+    """
+    values = np.asarray(values)
+    if below:
+        on, off = values < enter, values > exit
+    else:
+        on, off = values > enter, values < exit
+    decided = on | off
+    # Index of the most recent deciding frame, or -1 before the first one
+    last = np.maximum.accumulate(np.where(decided, np.arange(len(values)), -1))
+    return np.where(last >= 0, on[np.maximum(last, 0)], False)
+
+
+def threshold_segments(
+    values: np.ndarray,
+    frame_seconds: float,
+    enter: float,
+    exit: Optional[float] = None,
+    below: bool = True,
+    min_duration: float = 0.0,
+    end_time: Optional[float] = None
+) -> np.ndarray:
+    """
+    (start, end) times in seconds of the runs where values pass a threshold
+
+    Frame i starts at i * frame_seconds and a segment ends where the first
+    frame outside it starts; a segment still open at the last frame ends at
+    end_time when given. exit enables hysteresis (see hysteresis_mask), and
+    segments not longer than min_duration are dropped.
+    """
+    values = np.asarray(values)
+    if exit is None:
+        mask = values < enter if below else values > enter
+    else:
+        mask = hysteresis_mask(values, enter, exit, below)
+
+    runs = mask_runs(mask)
+    times = runs * frame_seconds
+    if end_time is not None and len(runs) and runs[-1, 1] == len(values):
+        times[-1, 1] = end_time
+    return times[times[:, 1] - times[:, 0] > min_duration]
@@ -0,0 +1,229 @@
+"""
+Chunked Whisper transcription
+Splits long audio at pauses found by the energy VAD, transcribes the chunks
+on a pool of worker processes and stitches their segments back onto one
+timeline, streaming each chunk's segments as soon as it finishes
+"""
+import asyncio
+import os
+from collections import Counter
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from ..core.config import settings
+from ..core.executors import BoundedExecutor, thread_executor
+from ..core.lazy_imports import lazy_import
+from ..core.logging_config import get_logger
+from ..core.model_registry import model_registry
+from .audio_cache import load_audio
+from .audio_features import compute_frame_energies
+from .segmentation import threshold_segments
+
+logger = get_logger("transcription")
+
+torch = lazy_import("torch")
+whisper = lazy_import("whisper")
+
+# Energy VAD frames, as in speech quality analysis
+VAD_FRAME_SECONDS = 0.025
+VAD_HOP_SECONDS = 0.010
+# Pauses shorter than this are not used as cut points
+MIN_PAUSE_SECONDS = 0.3
+
+
+def find_pauses(y: np.ndarray, sr: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Pause segments of y in seconds, plus the per-frame energies they came from
+
+    A frame is a pause when its energy is at or below the 30th percentile, the
+    same adaptive threshold the speech quality VAD uses.
+    """
+    frame_length = int(VAD_FRAME_SECONDS * sr)
+    hop_length = int(VAD_HOP_SECONDS * sr)
+    block_frames = max(settings.AUDIO_STREAM_BLOCK_SECONDS * sr // hop_length, 1)
+    energies = compute_frame_energies(y, frame_length, hop_length, block_frames)
+    if not len(energies):
+        return np.zeros((0, 2)), energies
+
+    threshold = np.percentile(energies, 30)
+    # Frames at the threshold count as pauses, hence the nudge
+    pauses = threshold_segments(
+        energies, hop_length / sr, np.nextafter(threshold, np.inf), min_duration=MIN_PAUSE_SECONDS
+    )
+    return pauses, energies
+
+
+def plan_chunks(y: np.ndarray, sr: int, target_seconds: float, max_seconds: float) -> List[Tuple[int, int]]:
+    """
+    [start, stop) sample ranges of roughly target_seconds, cut inside pauses
+
+    Each cut goes at the middle of the pause closest to target_seconds into
+    the chunk; without a pause in reach, at the quietest frame before
+    max_seconds, so no chunk is ever longer than that.
+    """
+    total = len(y)
+    if total <= max_seconds * sr:
+        return [(0, total)] if total else []
+
+    pauses, energies = find_pauses(y, sr)
+    cut_points = (pauses.mean(axis=1) * sr).astype(np.int64) if len(pauses) else np.zeros(0, dtype=np.int64)
+    hop_length = int(VAD_HOP_SECONDS * sr)
+
+    chunks = []
+    start = 0
+    while total - start > max_seconds * sr:
+        earliest = start + int(target_seconds * sr / 2)
+        latest = start + int(max_seconds * sr)
+        candidates = cut_points[(cut_points > earliest) & (cut_points <= latest)]
+        if len(candidates):
+            target = start + target_seconds * sr
+            cut = int(candidates[np.argmin(np.abs(candidates - target))])
+        else:
+            first_frame = int(start + target_seconds * sr) // hop_length
+            last_frame = min(latest // hop_length, len(energies))
+            window = energies[first_frame:last_frame]
+            cut = (first_frame + int(np.argmin(window))) * hop_length if len(window) else latest
+        chunks.append((start, cut))
+        start = cut
+    chunks.append((start, total))
+    return chunks
+
+
+def load_whisper_model(model_size: str = "base"):
+    """Load Whisper model for speech recognition, shared through the model registry"""
+    try:
+        return model_registry.get(f"whisper-{model_size}", lambda: whisper.load_model(model_size))
+    except Exception as e:
+        logger.error(f"Error loading Whisper model: {str(e)}")
+        raise
+
+
+def transcribe_chunk(model_size: str, samples: np.ndarray, language: Optional[str], threads: int) -> Dict:
+    """Whisper over one chunk; runs in a worker process, which keeps its own copy of the model"""
+    if settings.DEVICE == "cpu":
+        # Workers split the cores between them instead of each claiming all of them
+        torch.set_num_threads(threads)
+    model = load_whisper_model(model_size)
+    options = {"language": language} if language else {}
+    result = model.transcribe(np.ascontiguousarray(samples, dtype=np.float32), **options)
+    return {
+        "language": result.get("language"),
+        "segments": [
+            {
+                "start": float(segment["start"]),
+                "end": float(segment["end"]),
+                "text": segment["text"].strip(),
+                "confidence": segment.get("no_speech_prob", 0.0)
+            }
+            for segment in result.get("segments", [])
+        ]
+    }
+
+
+def chunk_event(index: int, count: int, start: int, stop: int, sr: int, result: Dict) -> Dict:
+    """A chunk's transcription moved from chunk-relative to global timestamps"""
+    offset, end = start / sr, stop / sr
+    return {
+        "chunk": index,
+        "chunks": count,
+        "start": offset,
+        "end": end,
+        "language": result["language"],
+        "segments": [
+            {
+                **segment,
+                "start": offset + segment["start"],
+                # Whisper's last timestamp can overshoot the audio it was given
+                "end": min(offset + segment["end"], end)
+            }
+            for segment in result["segments"]
+        ]
+    }
+
+
+def stitch(events: List[Dict]) -> Dict:
+    """Merge chunk events into one transcription ordered by time"""
+    segments = sorted(
+        (segment for event in events for segment in event["segments"]),
+        key=lambda segment: segment["start"]
+    )
+    text = " ".join(segment["text"] for segment in segments if segment["text"])
+
+    # Chunks detect their language independently; report the one covering the most audio
+    languages = Counter()
+    for event in events:
+        if event["language"]:
+            languages[event["language"]] += event["end"] - event["start"]
+
+    return {
+        "text": text,
+        "language": languages.most_common(1)[0][0] if languages else "unknown",
+        "segments": segments,
+        "word_count": len(text.split()),
+        "duration": segments[-1]["end"] if segments else 0
+    }
+
+
+def transcribe_serial(audio_path: str, model_size: str = "base", language: Optional[str] = None) -> Dict:
+    """The same chunked transcription, one chunk after another in the calling thread"""
+    sr = settings.AUDIO_SAMPLE_RATE
+    y, _ = load_audio(audio_path, sr)
+    chunks = plan_chunks(y, sr, settings.AUDIO_CHUNK_DURATION, settings.AUDIO_CHUNK_DURATION * 2)
+    threads = os.cpu_count() or 1
+    return stitch([
+        chunk_event(index, len(chunks), start, stop, sr, transcribe_chunk(model_size, y[start:stop], language, threads))
+        for index, (start, stop) in enumerate(chunks)
+    ])
+
+
+class TranscriptionEngine:
+    """Runs chunked transcriptions on a dedicated process pool"""
+
+    def __init__(self, executor: BoundedExecutor):
+        self.executor = executor
+
+    async def stream(
+        self,
+        audio_path: str,
+        model_size: str = "base",
+        language: Optional[str] = None
+    ) -> AsyncIterator[Dict]:
+        """
+        Yield each chunk's segments, on the global timeline, as it finishes
+
+        Chunks complete out of order; every event carries its chunk index
+        and time range so clients can place it.
+        """
+        sr = settings.AUDIO_SAMPLE_RATE
+        # Whisper wants 16 kHz mono float32; the shared decode spares it another ffmpeg run
+        y, _ = await thread_executor.run(load_audio, audio_path, sr)
+        chunks = await thread_executor.run(
+            plan_chunks, y, sr, settings.AUDIO_CHUNK_DURATION, settings.AUDIO_CHUNK_DURATION * 2
+        )
+        threads = max(1, (os.cpu_count() or 1) // self.executor.max_workers)
+        logger.info(f"Transcribing {audio_path} in {len(chunks)} chunks with Whisper {model_size}")
+
+        async def run(index: int, start: int, stop: int) -> Tuple[int, int, int, Dict]:
+            # A memory-mapped slice is only copied when pickled for the worker
+            result = await self.executor.run(transcribe_chunk, model_size, y[start:stop], language, threads)
+            return index, start, stop, result
+
+        tasks = [asyncio.ensure_future(run(index, start, stop)) for index, (start, stop) in enumerate(chunks)]
+        try:
+            for finished in asyncio.as_completed(tasks):
+                index, start, stop, result = await finished
+                yield chunk_event(index, len(chunks), start, stop, sr, result)
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def transcribe(self, audio_path: str, model_size: str = "base", language: Optional[str] = None) -> Dict:
+        """Whole transcription, in the shape ``model.transcribe`` results are reported in"""
+        events = [event async for event in self.stream(audio_path, model_size, language)]
+        return stitch(events)
+
+
+# Create global transcription engine; each worker process holds one Whisper model
+transcription_executor = BoundedExecutor("whisper", "process", settings.TRANSCRIPTION_WORKERS)
+transcription_engine = TranscriptionEngine(transcription_executor)
@@ -0,0 +1,260 @@
+"""
+Probe-while-uploading
+Tees the incoming upload stream into ffprobe (container, streams, packet
+index) and ffmpeg (first-frame thumbnail) so media info is ready when the
+last byte lands, with a file-based fallback for inputs that cannot be
+probed from a pipe (e.g. MP4 with the moov atom at the end)
+"""
+import asyncio
+import json
+import os
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from ..core.config import settings
+from ..core.logging_config import get_logger
+from .media_index import MediaIndex, media_index
+from .media_metadata import media_metadata
+
+logger = get_logger("upload_probe")
+
+# A probe that cannot keep up with the upload for this long is dropped instead of throttling it
+FEED_TIMEOUT = 5.0
+# How long to wait for the probes to finish after the last byte
+FINISH_TIMEOUT = 30.0
+
+# ffprobe JSON reports these as numbers; compact output has them as text
+INT_FIELDS = ("index", "width", "height", "channels")
+
+
+def _parse_compact_line(line: str) -> Optional[tuple]:
+    """Split an ``-of compact`` line into (section, fields)"""
+    section, _, rest = line.partition("|")
+    if not rest:
+        return None
+    fields = {}
+    for item in rest.split("|"):
+        key, _, value = item.partition("=")
+        if value != "N/A":
+            fields[key] = value
+    return section, fields
+
+
+def summarize_media(info: Dict, index: Optional[MediaIndex], thumbnail: Optional[str], source: str) -> Dict:
+    """Media info returned to the uploader"""
+    media_format = info.get("format", {})
+    streams = []
+    for stream in info.get("streams", []):
+        summary = {
+            "index": stream.get("index"),
+            "codec_type": stream.get("codec_type"),
+            "codec_name": stream.get("codec_name")
+        }
+        if stream.get("codec_type") == "video":
+            summary.update({
+                "width": stream.get("width"),
+                "height": stream.get("height"),
+                "frame_rate": stream.get("avg_frame_rate") or stream.get("r_frame_rate"),
+                "pix_fmt": stream.get("pix_fmt")
+            })
+        elif stream.get("codec_type") == "audio":
+            summary.update({
+                "sample_rate": stream.get("sample_rate"),
+                "channels": stream.get("channels")
+            })
+        streams.append(summary)
+
+    return {
+        "container": media_format.get("format_name"),
+        "duration": float(media_format.get("duration") or 0),
+        "bit_rate": int(media_format.get("bit_rate") or 0),
+        "streams": streams,
+        "frame_count": index.frame_count if index is not None else None,
+        "keyframe_count": len(index.keyframes) if index is not None else None,
+        "thumbnail_path": thumbnail,
+        "probe_source": source
+    }
+
+
+class UploadProbe:
+    """
+    Runs ffprobe and a thumbnail ffmpeg on the upload bytes as they are written
+
+    A thumbnail_path of None skips the thumbnail (audio uploads have no frame to take).
+    """
+
+    def __init__(self, thumbnail_path: Optional[str]):
+        self.thumbnail_path = thumbnail_path
+        self._ffprobe: Optional[asyncio.subprocess.Process] = None
+        self._thumbnailer: Optional[asyncio.subprocess.Process] = None
+        self._reader: Optional[asyncio.Task] = None
+        self._info: Dict = {"format": {}, "streams": []}
+        self._packets: List[Tuple[int, Tuple[float, int, bool]]] = []
+
+    async def start(self):
+        try:
+            self._ffprobe = await asyncio.create_subprocess_exec(
+                "ffprobe", "-v", "error",
+                "-show_entries", "format:stream:packet=stream_index,pts_time,dts_time,pos,flags",
+                "-of", "compact",
+                "-i", "pipe:0",
+                stdin=asyncio.subprocess.PIPE,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.DEVNULL
+            )
+            # stdout must be drained while we feed stdin or both pipes stall
+            self._reader = asyncio.create_task(self._read_probe(self._ffprobe.stdout))
+
+            if self.thumbnail_path:
+                os.makedirs(os.path.dirname(self.thumbnail_path) or ".", exist_ok=True)
+                self._thumbnailer = await asyncio.create_subprocess_exec(
+                    "ffmpeg", "-v", "error", "-y", "-i", "pipe:0",
+                    "-frames:v", "1", "-q:v", "2", self.thumbnail_path,
+                    stdin=asyncio.subprocess.PIPE,
+                    stdout=asyncio.subprocess.DEVNULL,
+                    stderr=asyncio.subprocess.DEVNULL
+                )
+        except OSError as e:
+            logger.warning(f"Cannot start upload probe: {e}")
+            await self.abort()
+
+    async def _read_probe(self, stream: asyncio.StreamReader):
+        async for raw_line in stream:
+            parsed = _parse_compact_line(raw_line.decode(errors="replace").strip())
+            if parsed is None:
+                continue
+            section, fields = parsed
+            if section == "packet":
+                pts_time = fields.get("pts_time") or fields.get("dts_time")
+                if pts_time:
+                    self._packets.append((
+                        int(fields.get("stream_index", -1)),
+                        (float(pts_time), int(fields.get("pos", -1)), "K" in fields.get("flags", ""))
+                    ))
+            elif section == "stream":
+                for key in INT_FIELDS:
+                    if fields.get(key, "").isdigit():
+                        fields[key] = int(fields[key])
+                self._info["streams"].append(fields)
+            elif section == "format":
+                self._info["format"] = fields
+
+    async def _feed_one(self, process: Optional[asyncio.subprocess.Process], chunk: bytes) -> Optional[asyncio.subprocess.Process]:
+        if process is None or process.stdin.is_closing():
+            return None
+        try:
+            process.stdin.write(chunk)
+            await asyncio.wait_for(process.stdin.drain(), timeout=FEED_TIMEOUT)
+            return process
+        except (BrokenPipeError, ConnectionResetError):
+            # The thumbnailer exits after its first frame; that is success, not failure
+            return None
+        except asyncio.TimeoutError:
+            logger.warning("Upload probe fell behind the upload; falling back to probing the file")
+            process.kill()
+            return None
+
+    async def feed(self, chunk: bytes):
+        self._ffprobe = await self._feed_one(self._ffprobe, chunk) if self._ffprobe else None
+        self._thumbnailer = await self._feed_one(self._thumbnailer, chunk) if self._thumbnailer else None
+
+    async def _close(self, process: Optional[asyncio.subprocess.Process]) -> Optional[int]:
+        if process is None:
+            return None
+        try:
+            if not process.stdin.is_closing():
+                process.stdin.close()
+            return await asyncio.wait_for(process.wait(), timeout=FINISH_TIMEOUT)
+        except (BrokenPipeError, ConnectionResetError):
+            return await process.wait()
+        except asyncio.TimeoutError:
+            process.kill()
+            return None
+
+    async def abort(self):
+        """Stop the probes of an upload that failed"""
+        for process in (self._ffprobe, self._thumbnailer):
+            if process is not None and process.returncode is None:
+                process.kill()
+        self._ffprobe = None
+        self._thumbnailer = None
+
+    async def finish(self, file_path: str) -> Dict:
+        """
+        Collect the probe results for the stored file
+
+        Inputs that could not be probed from the pipe are probed from the file
+        (container headers only; the keyframe index is then built on first use).
+        """
+        ffprobe_code = await self._close(self._ffprobe)
+        await self._close(self._thumbnailer)
+        if self._reader is not None:
+            try:
+                await asyncio.wait_for(self._reader, timeout=FINISH_TIMEOUT)
+            except asyncio.TimeoutError:
+                self._reader.cancel()
+
+        streamed = ffprobe_code == 0 and bool(self._info["streams"]) and bool(self._info["format"])
+        info = self._info if streamed else await self._probe_file(file_path)
+        if streamed:
+            # A pipe has no size (nor overall bit rate); derive them from the stored file
+            media_format = info["format"]
+            media_format["size"] = str(os.path.getsize(file_path))
+            duration = float(media_format.get("duration") or 0)
+            if "bit_rate" not in media_format and duration > 0:
+                media_format["bit_rate"] = str(int(int(media_format["size"]) * 8 / duration))
+
+        index = None
+        if streamed:
+            video_index = next(
+                (s["index"] for s in info["streams"] if s.get("codec_type") == "video"), None
+            )
+            if video_index is not None:
+                index = MediaIndex(packet for stream, packet in self._packets if stream == video_index)
+
+        thumbnail = None
+        # Only a video stream has a frame to take; retrying on anything else just runs ffmpeg for nothing
+        if self.thumbnail_path and any(s.get("codec_type") == "video" for s in info.get("streams", [])):
+            if os.path.exists(self.thumbnail_path):
+                thumbnail = self.thumbnail_path
+            else:
+                thumbnail = await self._thumbnail_from_file(file_path)
+
+        if info.get("streams"):
+            try:
+                # Later ffprobe/index lookups on this file become cache hits
+                media_metadata.remember(file_path, info)
+                if index is not None:
+                    media_index.remember(file_path, index)
+            except Exception as e:
+                logger.warning(f"Could not cache probe results for {file_path}: {e}")
+
+        return summarize_media(info, index, thumbnail, "stream" if streamed else "file")
+
+    async def _probe_file(self, file_path: str) -> Dict:
+        process = await asyncio.create_subprocess_exec(
+            "ffprobe", "-v", "quiet", "-print_format", "json",
+            "-show_format", "-show_streams", file_path,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.DEVNULL
+        )
+        stdout, _ = await process.communicate()
+        if process.returncode != 0:
+            logger.warning(f"ffprobe could not read {file_path}")
+            return {"format": {}, "streams": []}
+        return json.loads(stdout.decode())
+
+    async def _thumbnail_from_file(self, file_path: str) -> Optional[str]:
+        process = await asyncio.create_subprocess_exec(
+            "ffmpeg", "-v", "error", "-y", "-i", file_path,
+            "-frames:v", "1", "-q:v", "2", self.thumbnail_path,
+            stdout=asyncio.subprocess.DEVNULL,
+            stderr=asyncio.subprocess.DEVNULL
+        )
+        await process.wait()
+        return self.thumbnail_path if process.returncode == 0 and os.path.exists(self.thumbnail_path) else None
+
+
+def thumbnail_path_for(filename: str) -> str:
+    """Where the first-frame thumbnail of an uploaded file is written"""
+    return os.path.join(settings.PROCESSED_DIR, f"thumbnail_{Path(filename).stem}.jpg")
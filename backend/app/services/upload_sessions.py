@@ -0,0 +1,341 @@
+"""
+Resumable upload sessions
+tus-style chunked uploads: a session reserves the final size, clients write
+byte ranges in any order (and in parallel), query what has arrived, and
+finalize with server-side assembly and checksum verification
+"""
+import hashlib
+import json
+import os
+import re
+import shutil
+import time
+import uuid
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import aiofiles
+
+from ..core.config import settings
+from ..core.logging_config import get_logger
+from .blob_store import blob_store
+
+logger = get_logger("upload_sessions")
+
+DATA_FILE = "data.part"
+META_FILE = "meta.json"
+RANGES_DIR = "ranges"
+PENDING_SUFFIX = ".pending"
+HASH_CHUNK_SIZE = 1024 * 1024  # 1MB
+
+_CONTENT_RANGE = re.compile(r"^bytes (\d+)-(\d+)/(\d+|\*)$")
+_SESSION_ID = re.compile(r"^[0-9a-f]{32}$")
+
+
+class UploadSessionError(Exception):
+    """Invalid request against an upload session; status_code maps to the HTTP response"""
+
+    def __init__(self, message: str, status_code: int = 400):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+def parse_content_range(header: Optional[str]) -> Tuple[int, int, Optional[int]]:
+    """Parse ``bytes start-end/total`` into (start, end exclusive, total)"""
+    match = _CONTENT_RANGE.match((header or "").strip())
+    if not match:
+        raise UploadSessionError("Content-Range must look like 'bytes start-end/total'")
+    start, last = int(match.group(1)), int(match.group(2))
+    total = None if match.group(3) == "*" else int(match.group(3))
+    if last < start:
+        raise UploadSessionError("Content-Range end precedes start")
+    return start, last + 1, total
+
+
+def merge_ranges(ranges: List[Tuple[int, int]]) -> List[Tuple[int, int]]:
+    """Merge overlapping or adjacent [start, end) ranges"""
+    merged: List[Tuple[int, int]] = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def missing_ranges(received: List[Tuple[int, int]], size: int) -> List[Tuple[int, int]]:
+    gaps = []
+    position = 0
+    for start, end in received:
+        if start > position:
+            gaps.append((position, start))
+        position = max(position, end)
+    if position < size:
+        gaps.append((position, size))
+    return gaps
+
+
+class UploadSessionStore:
+    """
+    Upload sessions kept on disk under one directory per session
+
+    Every received range is recorded as an empty marker file named
+    ``start-end`` once its bytes are on disk, so concurrent part uploads
+    (and several server processes) never contend on shared metadata. A part
+    in flight holds a ``start-end.<token>.pending`` reservation, created
+    before its first byte is written, renewed while it streams and renamed
+    to the final marker once the last byte is written.
+    """
+
+    def __init__(self, root: str):
+        self.root = Path(root)
+
+    def _session_dir(self, session_id: str) -> Path:
+        if not _SESSION_ID.match(session_id or ""):
+            raise UploadSessionError("Upload session not found", status_code=404)
+        path = self.root / session_id
+        if not (path / META_FILE).exists():
+            raise UploadSessionError("Upload session not found", status_code=404)
+        return path
+
+    def _load_meta(self, session_dir: Path) -> Dict:
+        with open(session_dir / META_FILE) as f:
+            return json.load(f)
+
+    def _received(self, session_dir: Path) -> List[Tuple[int, int]]:
+        ranges = []
+        for marker in os.listdir(session_dir / RANGES_DIR):
+            if marker.endswith(PENDING_SUFFIX):
+                continue
+            start, _, end = marker.partition("-")
+            ranges.append((int(start), int(end)))
+        return merge_ranges(ranges)
+
+    def _pending(self, session_dir: Path) -> List[Tuple[int, int, Path]]:
+        """
+        In-flight reservations as (start, end, marker)
+
+        A reservation whose lease lapsed belongs to a writer that died without
+        cleaning up (killed worker, restart); it is removed so the range can be
+        sent again.
+        """
+        cutoff = time.time() - settings.UPLOAD_PART_LEASE_SECONDS
+        pending = []
+        for marker in (session_dir / RANGES_DIR).glob(f"*{PENDING_SUFFIX}"):
+            try:
+                if marker.stat().st_mtime < cutoff:
+                    marker.unlink(missing_ok=True)
+                    logger.info(f"Reclaimed abandoned part reservation {session_dir.name}/{marker.name}")
+                    continue
+            except FileNotFoundError:
+                continue
+            start, _, end = marker.name.partition(".")[0].partition("-")
+            pending.append((int(start), int(end), marker))
+        return pending
+
+    def _reserve(self, session_dir: Path, start: int, end: int) -> Path:
+        """
+        Claim [start, end) for one writer, or raise 409 if any of it is taken
+
+        The reservation is created before the overlap check, so of two
+        concurrent overlapping parts at least one sees the other and backs off.
+        Each writer gets its own marker name, so reclaiming an abandoned one
+        can never remove a live writer's reservation.
+        """
+        reservation = session_dir / RANGES_DIR / f"{start}-{end}.{uuid.uuid4().hex}{PENDING_SUFFIX}"
+        os.close(os.open(reservation, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+
+        taken = [("received", r) for r in self._received(session_dir)] + [
+            ("in-flight", (s, e)) for s, e, marker in self._pending(session_dir) if marker != reservation
+        ]
+        conflict = next(((kind, (s, e)) for kind, (s, e) in taken if s < end and start < e), None)
+        if conflict:
+            reservation.unlink(missing_ok=True)
+            kind, (s, e) = conflict
+            raise UploadSessionError(
+                f"Range {start}-{end - 1} overlaps {kind} bytes {s}-{e - 1}", status_code=409
+            )
+        return reservation
+
+    def _touch(self, session_dir: Path, reservation: Optional[Path] = None):
+        """
+        Mark the session active, and renew the lease on reservation
+
+        expire_stale measures session idleness from this. A reservation that
+        is gone was reclaimed after its lease lapsed; the part must be resent.
+        """
+        os.utime(session_dir / META_FILE)
+        if reservation is not None:
+            try:
+                os.utime(reservation)
+            except FileNotFoundError:
+                raise UploadSessionError("Part upload stalled and its reservation lapsed; resend the part", status_code=409)
+
+    def create(self, filename: str, size: int, file_type: str, checksum: Optional[str] = None,
+               metadata: Optional[Dict] = None) -> Dict:
+        """Reserve a session for a file of size bytes; checksum is an optional hex SHA-256"""
+        if size <= 0:
+            raise UploadSessionError("Upload size must be positive")
+        if size > settings.MAX_UPLOAD_SIZE:
+            raise UploadSessionError(
+                f"File too large. Maximum size: {settings.MAX_UPLOAD_SIZE / (1024*1024*1024):.1f}GB",
+                status_code=413
+            )
+        if checksum and not re.match(r"^[0-9a-fA-F]{64}$", checksum):
+            raise UploadSessionError("checksum must be a hex SHA-256 digest")
+
+        self.expire_stale()
+
+        session_id = uuid.uuid4().hex
+        session_dir = self.root / session_id
+        os.makedirs(session_dir / RANGES_DIR)
+
+        # Sparse file of the final size: parts land at their offsets with no assembly copy
+        with open(session_dir / DATA_FILE, "wb") as f:
+            f.truncate(size)
+
+        meta = {
+            "session_id": session_id,
+            "filename": filename,
+            "size": size,
+            "file_type": file_type,
+            "checksum": checksum.lower() if checksum else None,
+            "metadata": metadata or {},
+            "created_at": datetime.now().isoformat()
+        }
+        with open(session_dir / META_FILE, "w") as f:
+            json.dump(meta, f)
+
+        logger.info(f"Created upload session {session_id} for {filename} ({size} bytes)")
+        return self.status(session_id)
+
+    async def write_part(self, session_id: str, start: int, end: int, total: Optional[int], chunks) -> Dict:
+        """
+        Write the bytes of [start, end) from the async iterable chunks
+
+        The range is only recorded once every byte has been written, so an
+        interrupted request leaves nothing half-acknowledged and can be retried.
+        Ranges overlapping received or in-flight bytes are rejected.
+        """
+        session_dir = self._session_dir(session_id)
+        meta = self._load_meta(session_dir)
+        size = meta["size"]
+        if total is not None and total != size:
+            raise UploadSessionError(f"Content-Range total {total} does not match upload size {size}")
+        if end > size:
+            raise UploadSessionError(f"Range {start}-{end - 1} exceeds upload size {size}", status_code=416)
+        if end - start > settings.UPLOAD_PART_MAX_SIZE:
+            raise UploadSessionError(
+                f"Part too large. Maximum part size: {settings.UPLOAD_PART_MAX_SIZE} bytes", status_code=413
+            )
+
+        # Acknowledged bytes are never rewritten, so a broken retry cannot corrupt them
+        reservation = self._reserve(session_dir, start, end)
+
+        try:
+            self._touch(session_dir, reservation)
+            renewed = time.monotonic()
+            written = 0
+            expected = end - start
+            async with aiofiles.open(session_dir / DATA_FILE, "r+b") as f:
+                await f.seek(start)
+                async for chunk in chunks:
+                    if not chunk:
+                        continue
+                    if written + len(chunk) > expected:
+                        raise UploadSessionError("Request body is longer than its Content-Range")
+                    await f.write(chunk)
+                    written += len(chunk)
+                    # Renew well inside the lease so a slow but live part is never reclaimed
+                    if time.monotonic() - renewed > settings.UPLOAD_PART_LEASE_SECONDS / 4:
+                        self._touch(session_dir, reservation)
+                        renewed = time.monotonic()
+                await f.flush()
+
+            if written != expected:
+                raise UploadSessionError(f"Received {written} bytes for a {expected}-byte range; resend the part")
+            self._touch(session_dir, reservation)
+        except BaseException:
+            # Release the range so the part can be retried
+            reservation.unlink(missing_ok=True)
+            raise
+
+        os.replace(reservation, session_dir / RANGES_DIR / f"{start}-{end}")
+        return self.status(session_id)
+
+    def status(self, session_id: str) -> Dict:
+        """Received ranges, the contiguous offset from zero and what is still missing"""
+        session_dir = self._session_dir(session_id)
+        meta = self._load_meta(session_dir)
+        received = self._received(session_dir)
+        missing = missing_ranges(received, meta["size"])
+        offset = received[0][1] if received and received[0][0] == 0 else 0
+        return {
+            "session_id": session_id,
+            "filename": meta["filename"],
+            "file_type": meta["file_type"],
+            "size": meta["size"],
+            "offset": offset,
+            "received_bytes": sum(end - start for start, end in received),
+            "received_ranges": [[start, end - 1] for start, end in received],
+            "missing_ranges": [[start, end - 1] for start, end in missing],
+            "complete": not missing,
+            "part_max_size": settings.UPLOAD_PART_MAX_SIZE,
+            "created_at": meta["created_at"]
+        }
+
+    def finalize(self, session_id: str, filename: str, checksum: Optional[str] = None) -> Dict:
+        """
+        Verify the assembled file and publish it in the blob store as filename
+
+        Blocking (hashes the whole file); run it off the event loop.
+        """
+        session_dir = self._session_dir(session_id)
+        meta = self._load_meta(session_dir)
+        missing = missing_ranges(self._received(session_dir), meta["size"])
+        if missing:
+            raise UploadSessionError(
+                f"Upload incomplete: {len(missing)} missing ranges, first at byte {missing[0][0]}",
+                status_code=409
+            )
+
+        sha256 = hashlib.sha256()
+        with open(session_dir / DATA_FILE, "rb") as f:
+            for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+                sha256.update(chunk)
+        digest = sha256.hexdigest()
+
+        expected = (checksum or meta["checksum"] or "").lower()
+        if expected and expected != digest:
+            raise UploadSessionError(
+                f"Checksum mismatch: expected {expected}, assembled file is {digest}", status_code=422
+            )
+
+        stored = blob_store.commit(str(session_dir / DATA_FILE), digest, filename)
+        shutil.rmtree(session_dir, ignore_errors=True)
+
+        logger.info(f"Upload session {session_id} finalized -> {stored['file_path']}")
+        return {**meta, **stored}
+
+    def abort(self, session_id: str):
+        session_dir = self._session_dir(session_id)
+        shutil.rmtree(session_dir, ignore_errors=True)
+        logger.info(f"Upload session {session_id} aborted")
+
+    def expire_stale(self):
+        """Delete sessions with no activity for settings.UPLOAD_SESSION_TTL_HOURS"""
+        if not self.root.exists():
+            return
+        cutoff = time.time() - settings.UPLOAD_SESSION_TTL_HOURS * 3600
+        for session_dir in self.root.iterdir():
+            try:
+                if (session_dir / META_FILE).stat().st_mtime < cutoff:
+                    shutil.rmtree(session_dir, ignore_errors=True)
+                    logger.info(f"Expired upload session {session_dir.name}")
+            except OSError:
+                continue
+
+
+# Create global upload session store
+upload_sessions = UploadSessionStore(settings.UPLOAD_SESSION_DIR)
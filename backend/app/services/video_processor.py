@@ -5,17 +5,79 @@ Handles actual video trimming, cutting, and filter application
 import os
 import subprocess
 import tempfile
-import json
-from typing import Dict, List, Optional, Tuple
+from typing import Callable, Dict, List, Optional, Tuple
 from pathlib import Path
 import asyncio
+from bisect import bisect_left, bisect_right
 from datetime import datetime
 
 from ..core.config import settings
+from ..core.executors import thread_executor
 from ..core.logging_config import get_logger
+from .analysis_cache import file_content_hash
+from .ffmpeg_engine import atempo_chain
+from .job_events import JobCancelled
+from .media_index import media_index
+from .media_metadata import media_metadata
 
 logger = get_logger("video_processor")
 
+# Kept ranges shorter than this (seconds) are dropped instead of producing empty segments
+MIN_SEGMENT_DURATION = 0.01
+
+# Smart cut: keyframe times within this many seconds of a cut count as on the cut
+KEYFRAME_TOLERANCE = 0.001
+# Copied GOP runs shorter than this are not worth the extra concat piece
+MIN_COPY_DURATION = 0.5
+# Source codec -> encoder used for the re-encoded boundary pieces
+SMART_CUT_VIDEO_ENCODERS = {"h264": "libx264", "hevc": "libx265"}
+SMART_CUT_AUDIO_ENCODERS = {"aac": "aac", "mp3": "libmp3lame", "opus": "libopus"}
+# ffprobe profile name -> encoder -profile:v, so re-encoded pieces decode with the source's capabilities
+SMART_CUT_PROFILES = {
+    "h264": {
+        "Constrained Baseline": "baseline", "Baseline": "baseline", "Main": "main", "High": "high",
+        "High 10": "high10", "High 4:2:2": "high422", "High 4:4:4 Predictive": "high444"
+    },
+    "hevc": {"Main": "main", "Main 10": "main10"}
+}
+# Sample entries that allow parameter sets to change in-band, as they do at every re-encoded piece
+SMART_CUT_INBAND_TAGS = {"h264": "avc3", "hevc": "hev1"}
+
+
+class FFmpegProgress:
+    """
+    Folds ``ffmpeg -progress`` reports from one or more commands into a single percentage
+
+    Each command is registered with the output seconds it is expected to
+    produce; the callback receives the overall percentage plus the latest
+    frame/fps/speed counters.
+    """
+    
+    def __init__(self, callback: Callable[..., None]):
+        self.callback = callback
+        self.expected: Dict[int, float] = {}
+        self.done: Dict[int, float] = {}
+    
+    def track(self, key: int, seconds: float) -> Callable[[Dict[str, str]], None]:
+        self.expected[key] = max(seconds, MIN_SEGMENT_DURATION)
+        self.done[key] = 0.0
+        return lambda block: self.report(key, block)
+    
+    def report(self, key: int, block: Dict[str, str]):
+        out_time_us = block.get("out_time_us", "N/A")
+        if out_time_us not in ("N/A", ""):
+            self.done[key] = min(max(int(out_time_us), 0) / 1_000_000, self.expected[key])
+        if block.get("progress") == "end":
+            self.done[key] = self.expected[key]
+        
+        percent = 100.0 * sum(self.done.values()) / sum(self.expected.values())
+        details = {
+            name: block[name] for name in ("frame", "fps", "speed", "out_time")
+            if block.get(name) not in (None, "", "N/A")
+        }
+        # Leave 100% for the caller, which still has to finalize the output
+        self.callback(min(percent, 99.0), **details)
+
 
 class VideoProcessor:
     """Real video processing using FFmpeg"""
@@ -30,7 +92,8 @@ class VideoProcessor:
         self, 
         input_path: str, 
         editing_data: Dict,
-        output_filename: Optional[str] = None
+        output_filename: Optional[str] = None,
+        progress_callback: Optional[Callable[..., None]] = None
     ) -> Dict:
         """
         Process video with real trimming, cutting, and filters
@@ -39,6 +102,8 @@ class VideoProcessor:
             input_path: Path to input video file
             editing_data: Dictionary containing trim points, cuts, and filters
             output_filename: Optional output filename
+            progress_callback: Called as (percent, frame=..., fps=..., speed=...)
+                from ffmpeg's progress reports
             
         Returns:
             Dictionary with processing results
@@ -59,26 +124,50 @@ class VideoProcessor:
             
             output_path = self.output_dir / output_filename
             
-            # Step 1: Apply trimming
-            trimmed_path = await self._apply_trim(input_path, trim_start, trim_end)
+            source_info = await self._get_video_info(input_path)
+            has_audio = source_info["audio"]["codec"] is not None
+            
+            segments = self._keep_segments(trim_start, trim_end, cuts)
+            speed = editing_data.get('speed') or 1
+            # speed filters multiply into the overall speed; progress totals need the combined value
+            video_filters, audio_filters, speed = self._compile_filters(filters, speed)
+            progress = FFmpegProgress(progress_callback) if progress_callback else None
             
-            # Step 2: Apply cuts (remove segments)
-            cut_path = await self._apply_cuts(trimmed_path, cuts)
+            # Pure trims/cuts can reuse the source's compressed GOPs; anything else is one filter graph
+            smart_cut = editing_data.get('smartCut', settings.SMART_CUT_ENABLED)
+            is_full_copy = segments == [(0.0, None)]
+            render_mode = "filter_graph"
             
-            # Step 3: Apply filters
-            filtered_path = await self._apply_filters(cut_path, filters)
+            if smart_cut and not video_filters and not audio_filters and not is_full_copy:
+                if await self._smart_cut(input_path, str(output_path), segments, source_info, progress):
+                    render_mode = "smart_cut"
             
-            # Step 4: Move to final output location
-            if filtered_path != output_path:
-                os.rename(filtered_path, output_path)
+            if render_mode == "filter_graph" and self._use_parallel_encode(
+                editing_data, segments, video_filters, audio_filters, float(source_info.get("duration", 0))
+            ):
+                await self._parallel_encode(
+                    input_path, str(output_path), segments, video_filters, audio_filters, source_info,
+                    progress, speed
+                )
+                render_mode = "parallel"
+            
+            if render_mode == "filter_graph":
+                # Compile trim, cuts, filters and speed into one ffmpeg invocation
+                cmd = self._build_ffmpeg_command(
+                    input_path, str(output_path), segments, video_filters, audio_filters, has_audio
+                )
+                timeline = self._timeline_seconds(segments, float(source_info.get("duration", 0))) / speed
+                await self._run_ffmpeg_command(cmd, progress.track(0, timeline) if progress else None)
+            
+            # Record the digest now so the player's first range request gets its ETag without a full read
+            await thread_executor.run(file_content_hash, str(output_path))
             
             # Get output video info
             video_info = await self._get_video_info(str(output_path))
             
-            # Cleanup temporary files
-            await self._cleanup_temp_files([trimmed_path, cut_path, filtered_path])
-            
             logger.info(f"Video processing completed: {output_path}")
+            if progress_callback:
+                progress_callback(100.0)
             
             return {
                 "success": True,
@@ -86,6 +175,7 @@ class VideoProcessor:
                 "output_filename": output_filename,
                 "video_info": video_info,
                 "processing_time": "Processing completed",
+                "render_mode": render_mode,
                 "applied_operations": {
                     "trim": {"start": trim_start, "end": trim_end},
                     "cuts": cuts,
@@ -93,6 +183,8 @@ class VideoProcessor:
                 }
             }
             
+        except JobCancelled:
+            raise
         except Exception as e:
             logger.error(f"Video processing failed: {str(e)}")
             return {
@@ -100,100 +192,72 @@ class VideoProcessor:
                 "error": str(e)
             }
     
-    async def _apply_trim(self, input_path: str, start_time: float, end_time: Optional[float]) -> str:
-        """Apply trimming to video"""
-        if start_time == 0 and end_time is None:
-            return input_path
-        
-        output_path = self.temp_dir / f"trimmed_{os.path.basename(input_path)}"
-        
-        cmd = [
-            "ffmpeg", "-i", input_path,
-            "-ss", str(start_time)
-        ]
-        
-        if end_time is not None:
-            duration = end_time - start_time
-            cmd.extend(["-t", str(duration)])
-        
-        cmd.extend([
-            "-c", "copy",  # Copy without re-encoding for speed
-            "-avoid_negative_ts", "make_zero",
-            str(output_path), "-y"
-        ])
-        
-        await self._run_ffmpeg_command(cmd)
-        return str(output_path)
+    def _keep_segments(
+        self,
+        trim_start: float,
+        trim_end: Optional[float],
+        cuts: List[Dict]
+    ) -> List[Tuple[float, Optional[float]]]:
+        """
+        Source-time (start, end) ranges that survive the trim and cuts
+
+        Cuts are given on the source timeline, like the trim points. An end
+        of None means "until the end of the video".
+        """
+        start = max(0.0, float(trim_start or 0))
+        end = float(trim_end) if trim_end is not None else None
+        
+        segments = []
+        current = start
+        for cut in sorted(cuts, key=lambda x: x['start']):
+            cut_start = max(float(cut['start']), current)
+            cut_end = float(cut['end'])
+            if end is not None:
+                cut_start = min(cut_start, end)
+                cut_end = min(cut_end, end)
+            if cut_end <= current:
+                continue
+            if cut_start - current > MIN_SEGMENT_DURATION:
+                segments.append((current, cut_start))
+            current = cut_end
+        
+        if end is None:
+            segments.append((current, None))
+        elif end - current > MIN_SEGMENT_DURATION:
+            segments.append((current, end))
+        
+        if not segments:
+            raise ValueError("Trim and cuts remove the entire video")
+        return segments
     
-    async def _apply_cuts(self, input_path: str, cuts: List[Dict]) -> str:
-        """Apply cuts (remove segments) from video"""
-        if not cuts:
-            return input_path
-        
-        # Sort cuts by start time
-        sorted_cuts = sorted(cuts, key=lambda x: x['start'])
-        
-        output_path = self.temp_dir / f"cut_{os.path.basename(input_path)}"
-        
-        # Create filter complex for removing segments
-        filter_parts = []
-        input_index = 0
-        
-        video_info = await self._get_video_info(input_path)
-        total_duration = float(video_info.get('duration', 0))
-        
-        current_time = 0
-        segment_index = 0
-        
-        for cut in sorted_cuts:
-            cut_start = cut['start']
-            cut_end = cut['end']
-            
-            # Add segment before cut
-            if current_time < cut_start:
-                filter_parts.append(
-                    f"[0:v]trim=start={current_time}:end={cut_start},setpts=PTS-STARTPTS[v{segment_index}];"
-                    f"[0:a]atrim=start={current_time}:end={cut_start},asetpts=PTS-STARTPTS[a{segment_index}]"
-                )
-                segment_index += 1
-            
-            current_time = cut_end
-        
-        # Add final segment
-        if current_time < total_duration:
-            filter_parts.append(
-                f"[0:v]trim=start={current_time},setpts=PTS-STARTPTS[v{segment_index}];"
-                f"[0:a]atrim=start={current_time},asetpts=PTS-STARTPTS[a{segment_index}]"
-            )
-            segment_index += 1
-        
-        if segment_index == 0:
-            return input_path
-        
-        # Concatenate segments
-        video_inputs = "".join([f"[v{i}]" for i in range(segment_index)])
-        audio_inputs = "".join([f"[a{i}]" for i in range(segment_index)])
-        
-        filter_complex = ";".join(filter_parts) + f";{video_inputs}concat=n={segment_index}:v=1:a=0[outv];{audio_inputs}concat=n={segment_index}:v=0:a=1[outa]"
-        
-        cmd = [
-            "ffmpeg", "-i", input_path,
-            "-filter_complex", filter_complex,
-            "-map", "[outv]", "-map", "[outa]",
-            str(output_path), "-y"
-        ]
-        
-        await self._run_ffmpeg_command(cmd)
-        return str(output_path)
+    @staticmethod
+    def _timeline_seconds(segments: List[Tuple[float, Optional[float]]], duration: float) -> float:
+        """Length of the kept timeline, before speed changes"""
+        return sum((duration if end is None else min(end, duration)) - start for start, end in segments)
     
-    async def _apply_filters(self, input_path: str, filters: List[Dict]) -> str:
-        """Apply video filters"""
-        if not filters:
-            return input_path
-        
-        output_path = self.temp_dir / f"filtered_{os.path.basename(input_path)}"
+    def _use_parallel_encode(
+        self,
+        editing_data: Dict,
+        segments: List[Tuple[float, Optional[float]]],
+        video_filters: List[str],
+        audio_filters: List[str],
+        duration: float
+    ) -> bool:
+        """Chunked encoding pays off only for long timelines on multi-worker setups"""
+        if not editing_data.get('parallelEncode', settings.PARALLEL_ENCODE_ENABLED) or settings.MAX_WORKERS < 2:
+            return False
+        # A single segment with no filters is a stream copy; never re-encode it
+        if not video_filters and not audio_filters and len(segments) == 1:
+            return False
+        kept = sum((duration if end is None else min(end, duration)) - start for start, end in segments)
+        return kept >= settings.PARALLEL_ENCODE_MIN_DURATION
+    
+    def _compile_filters(self, filters: List[Dict], speed: float = 1) -> Tuple[List[str], List[str], float]:
+        """
+        Translate editor filters (and an overall speed) into ffmpeg video and audio filter chains
         
-        # Build filter chain
+        Also returns the effective speed: the overall speed times every speed filter.
+        """
         video_filters = []
         audio_filters = []
         
@@ -228,73 +292,375 @@ class VideoProcessor:
                 audio_filters.append(f"volume={value}")
             
             elif filter_type == 'speed':
-                speed = filter_params.get('speed', 1)
-                video_filters.append(f"setpts={1/speed}*PTS")
-                audio_filters.append(f"atempo={speed}")
+                speed *= float(filter_params.get('speed', 1))
+        
+        if speed and speed != 1:
+            video_filters.append(f"setpts={1/speed}*PTS")
+            audio_filters.extend(atempo_chain(speed))
         
-        cmd = ["ffmpeg", "-i", input_path]
+        return video_filters, audio_filters, speed or 1
+    
+    def _build_ffmpeg_command(
+        self,
+        input_path: str,
+        output_path: str,
+        segments: List[Tuple[float, Optional[float]]],
+        video_filters: List[str],
+        audio_filters: List[str],
+        has_audio: bool
+    ) -> List[str]:
+        """Build a single ffmpeg command that applies every edit in one decode/encode pass"""
+        # Seek the input to the first kept frame and stop after the last one,
+        # so the graph never decodes trimmed-away footage
+        window_start = segments[0][0]
+        window_end = segments[-1][1]
+        
+        cmd = ["ffmpeg"]
+        if window_start > 0:
+            cmd.extend(["-ss", str(window_start)])
+        if window_end is not None:
+            cmd.extend(["-t", str(window_end - window_start)])
+        cmd.extend(["-i", input_path])
+        
+        # A plain trim with no filters needs no re-encode at all
+        if len(segments) == 1 and not video_filters and not audio_filters:
+            cmd.extend(["-c", "copy", "-avoid_negative_ts", "make_zero", output_path, "-y"])
+            return cmd
+        
+        filter_complex = self._build_filter_graph(
+            [(s - window_start, e - window_start if e is not None else None) for s, e in segments],
+            video_filters, audio_filters, has_audio
+        )
         
-        if video_filters and audio_filters:
-            vf = ",".join(video_filters)
-            af = ",".join(audio_filters)
-            cmd.extend(["-vf", vf, "-af", af])
-        elif video_filters:
-            vf = ",".join(video_filters)
-            cmd.extend(["-vf", vf])
-        elif audio_filters:
-            af = ",".join(audio_filters)
-            cmd.extend(["-af", af])
+        cmd.extend(["-filter_complex", filter_complex, "-map", "[outv]"])
+        if has_audio:
+            cmd.extend(["-map", "[outa]"])
+        cmd.extend([output_path, "-y"])
+        return cmd
+    
+    def _build_filter_graph(
+        self,
+        segments: List[Tuple[float, Optional[float]]],
+        video_filters: List[str],
+        audio_filters: List[str],
+        has_audio: bool,
+        has_video: bool = True
+    ) -> str:
+        """Compile kept segments and filter chains into one filter_complex graph ending in [outv]/[outa]"""
+        graph = []
+        
+        if len(segments) == 1:
+            video_label, audio_label = "0:v", "0:a"
+        else:
+            for index, (seg_start, seg_end) in enumerate(segments):
+                bounds = f"start={seg_start}" + (f":end={seg_end}" if seg_end is not None else "")
+                if has_video:
+                    graph.append(f"[0:v]trim={bounds},setpts=PTS-STARTPTS[v{index}]")
+                if has_audio:
+                    graph.append(f"[0:a]atrim={bounds},asetpts=PTS-STARTPTS[a{index}]")
+            
+            count = len(segments)
+            inputs = "".join(
+                (f"[v{i}]" if has_video else "") + (f"[a{i}]" if has_audio else "")
+                for i in range(count)
+            )
+            outputs = ("[cv]" if has_video else "") + ("[ca]" if has_audio else "")
+            graph.append(f"{inputs}concat=n={count}:v={int(has_video)}:a={int(has_audio)}{outputs}")
+            video_label, audio_label = "cv", "ca"
         
-        cmd.extend([str(output_path), "-y"])
+        if has_video:
+            graph.append(f"[{video_label}]{','.join(video_filters) or 'null'}[outv]")
+        if has_audio:
+            graph.append(f"[{audio_label}]{','.join(audio_filters) or 'anull'}[outa]")
         
-        await self._run_ffmpeg_command(cmd)
-        return str(output_path)
+        return ";".join(graph)
     
-    async def _get_video_info(self, video_path: str) -> Dict:
-        """Get video information using ffprobe"""
+    def _plan_chunks(
+        self,
+        segments: List[Tuple[float, Optional[float]]],
+        keyframes: List[float],
+        duration: float,
+        chunk_seconds: float
+    ) -> List[Tuple[float, float]]:
+        """Split kept segments into roughly chunk_seconds-long (start, end) ranges that begin on keyframes"""
+        chunks = []
+        for seg_start, seg_end in segments:
+            seg_end = duration if seg_end is None else min(seg_end, duration)
+            position = seg_start
+            while seg_end - position > chunk_seconds * 1.5:
+                # Split at the first keyframe past the target so each chunk's seek lands on a GOP start
+                index = bisect_left(keyframes, position + chunk_seconds)
+                if index >= len(keyframes) or keyframes[index] >= seg_end - chunk_seconds / 2:
+                    break
+                chunks.append((position, keyframes[index]))
+                position = keyframes[index]
+            if seg_end - position > MIN_SEGMENT_DURATION:
+                chunks.append((position, seg_end))
+        return chunks
+    
+    async def _parallel_encode(
+        self,
+        input_path: str,
+        output_path: str,
+        segments: List[Tuple[float, Optional[float]]],
+        video_filters: List[str],
+        audio_filters: List[str],
+        source_info: Dict,
+        progress: Optional[FFmpegProgress] = None,
+        speed: float = 1
+    ):
+        """
+        Encode the kept timeline as keyframe-aligned video chunks on several ffmpeg processes
+
+        Video chunks are encoded concurrently (settings.MAX_WORKERS at a time)
+        and joined with the concat demuxer without re-encoding. Audio is
+        encoded once over the whole timeline alongside them, so chunk joins
+        never introduce encoder priming gaps.
+        """
+        has_audio = source_info["audio"]["codec"] is not None
+        duration = float(source_info.get("duration", 0))
+        keyframes = await self._get_keyframes(input_path)
+        chunks = self._plan_chunks(segments, keyframes, duration, settings.PARALLEL_ENCODE_CHUNK_SECONDS)
+        
+        threads = max(1, (os.cpu_count() or 1) // max(1, settings.MAX_WORKERS))
+        work_dir = Path(tempfile.mkdtemp(prefix="parallel_", dir=self.temp_dir))
+        chunk_paths = [str(work_dir / f"chunk_{index:04d}.ts") for index in range(len(chunks))]
+        audio_path = str(work_dir / "audio.m4a")
+        concat_list = work_dir / "concat.txt"
+        
+        commands = []
+        for (chunk_start, chunk_end), chunk_path in zip(chunks, chunk_paths):
+            cmd = [
+                "ffmpeg", "-ss", str(chunk_start), "-i", input_path,
+                "-t", str(chunk_end - chunk_start), "-map", "0:v:0", "-an"
+            ]
+            if video_filters:
+                cmd.extend(["-vf", ",".join(video_filters)])
+            cmd.extend(["-c:v", "libx264", "-threads", str(threads), "-f", "mpegts", chunk_path, "-y"])
+            commands.append(cmd)
+        expected = [(chunk_end - chunk_start) / speed for chunk_start, chunk_end in chunks]
+        
+        if has_audio:
+            window_start = segments[0][0]
+            window_end = segments[-1][1]
+            cmd = ["ffmpeg"]
+            if window_start > 0:
+                cmd.extend(["-ss", str(window_start)])
+            if window_end is not None:
+                cmd.extend(["-t", str(window_end - window_start)])
+            filter_complex = self._build_filter_graph(
+                [(s - window_start, e - window_start if e is not None else None) for s, e in segments],
+                [], audio_filters, has_audio=True, has_video=False
+            )
+            cmd.extend([
+                "-i", input_path, "-filter_complex", filter_complex,
+                "-map", "[outa]", "-c:a", "aac", audio_path, "-y"
+            ])
+            commands.append(cmd)
+            expected.append(self._timeline_seconds(segments, duration) / speed)
+        
+        try:
+            logger.info(f"Encoding {len(chunks)} chunks with up to {settings.MAX_WORKERS} ffmpeg processes")
+            await self._run_ffmpeg_commands(commands, progress, expected)
+            
+            with open(concat_list, "w") as f:
+                for chunk_path in chunk_paths:
+                    f.write(f"file '{os.path.abspath(chunk_path)}'\n")
+            
+            cmd = ["ffmpeg", "-f", "concat", "-safe", "0", "-i", str(concat_list)]
+            if has_audio:
+                cmd.extend(["-i", audio_path, "-map", "0:v:0", "-map", "1:a:0"])
+            cmd.extend(["-c", "copy", "-movflags", "+faststart", output_path, "-y"])
+            await self._run_ffmpeg_command(cmd)
+        
+        finally:
+            await self._cleanup_temp_files(chunk_paths + [audio_path, str(concat_list)])
+            try:
+                work_dir.rmdir()
+            except OSError:
+                pass
+    
+    async def _get_keyframes(self, video_path: str) -> List[float]:
+        """Presentation times of the video keyframes, from the file's persisted packet index"""
+        return (await media_index.aget(video_path)).keyframe_times()
+    
+    def _plan_smart_cut(
+        self,
+        segments: List[Tuple[float, Optional[float]]],
+        keyframes: List[float],
+        duration: float
+    ) -> List[Dict]:
+        """
+        Split kept segments into stream-copied GOP runs and re-encoded boundary pieces
+
+        Within each segment everything from the first keyframe at or after its
+        start up to the last keyframe at or before its end is copied; only the
+        partial GOPs before and after that run are re-encoded.
+        """
+        pieces = []
+        for seg_start, seg_end in segments:
+            seg_end = duration if seg_end is None else min(seg_end, duration)
+            if seg_end - seg_start <= MIN_SEGMENT_DURATION:
+                continue
+            
+            index = bisect_left(keyframes, seg_start - KEYFRAME_TOLERANCE)
+            copy_start = keyframes[index] if index < len(keyframes) else None
+            # A segment running to the end of the file can be copied through its final GOP
+            if seg_end >= duration - KEYFRAME_TOLERANCE:
+                copy_end = seg_end
+            else:
+                index = bisect_right(keyframes, seg_end + KEYFRAME_TOLERANCE) - 1
+                copy_end = keyframes[index] if index >= 0 else None
+            
+            if copy_start is None or copy_end is None or copy_end - copy_start < MIN_COPY_DURATION:
+                pieces.append({"start": seg_start, "end": seg_end, "mode": "encode"})
+                continue
+            
+            if copy_start - seg_start > KEYFRAME_TOLERANCE:
+                pieces.append({"start": seg_start, "end": copy_start, "mode": "encode"})
+            pieces.append({"start": copy_start, "end": copy_end, "mode": "copy"})
+            if seg_end - copy_end > KEYFRAME_TOLERANCE:
+                pieces.append({"start": copy_end, "end": seg_end, "mode": "encode"})
+        
+        return pieces
+    
+    @staticmethod
+    def _smart_cut_video_params(video: Dict) -> Optional[List[str]]:
+        """
+        Encoder options reproducing the source's profile, level and reference count
+
+        Returns None when the source profile or level is unknown or has no
+        encoder equivalent, in which case the pieces cannot match the copied GOPs.
+        """
+        profile = SMART_CUT_PROFILES.get(video.get("codec"), {}).get(video.get("profile"))
+        level = video.get("level")
+        if profile is None or not level or level < 0:
+            return None
+        
+        if video["codec"] == "hevc":
+            # ffprobe reports general_level_idc, which is 30x the level number
+            return ["-profile:v", profile, "-x265-params", f"level-idc={level / 30:.1f}"]
+        
+        params = ["-profile:v", profile, "-level:v", f"{level / 10:.1f}"]
+        if video.get("refs"):
+            params.extend(["-refs", str(video["refs"])])
+        return params
+    
+    def _smart_cut_piece_command(self, input_path: str, piece: Dict, piece_path: str, source_info: Dict) -> List[str]:
+        """ffmpeg command for one smart-cut piece, written as MPEG-TS so pieces concatenate cleanly"""
         cmd = [
-            "ffprobe", "-v", "quiet",
-            "-print_format", "json",
-            "-show_format", "-show_streams",
-            video_path
+            "ffmpeg", "-ss", str(piece["start"]), "-i", input_path,
+            "-t", str(piece["end"] - piece["start"]),
+            "-map", "0:v:0", "-map", "0:a:0?"
         ]
         
-        process = await asyncio.create_subprocess_exec(
-            *cmd,
-            stdout=asyncio.subprocess.PIPE,
-            stderr=asyncio.subprocess.PIPE
-        )
+        if piece["mode"] == "copy":
+            cmd.extend(["-c", "copy", "-avoid_negative_ts", "make_zero"])
+        else:
+            # Match the source stream parameters so the copied GOPs and these frames share one decoder config
+            video = source_info["video"]
+            cmd.extend(["-c:v", SMART_CUT_VIDEO_ENCODERS[video["codec"]], "-preset", "veryfast", "-crf", "18"])
+            cmd.extend(self._smart_cut_video_params(video))
+            if video.get("pix_fmt"):
+                cmd.extend(["-pix_fmt", video["pix_fmt"]])
+            if video.get("fps"):
+                cmd.extend(["-r", video["frame_rate"]])
+            
+            audio = source_info["audio"]
+            if audio["codec"] is not None:
+                cmd.extend(["-c:a", SMART_CUT_AUDIO_ENCODERS[audio["codec"]]])
+                if audio.get("sample_rate"):
+                    cmd.extend(["-ar", str(audio["sample_rate"])])
+                if audio.get("channels"):
+                    cmd.extend(["-ac", str(audio["channels"])])
+        
+        cmd.extend(["-f", "mpegts", piece_path, "-y"])
+        return cmd
+    
+    async def _smart_cut(
+        self,
+        input_path: str,
+        output_path: str,
+        segments: List[Tuple[float, Optional[float]]],
+        source_info: Dict,
+        progress: Optional[FFmpegProgress] = None
+    ) -> bool:
+        """
+        Render trims/cuts by copying whole GOPs and re-encoding only cut boundaries
+
+        Returns:
+            False when the source codecs cannot be smart-cut, so the caller should
+            fall back to a full render
+        """
+        video_codec = source_info["video"]["codec"]
+        audio_codec = source_info["audio"]["codec"]
+        if video_codec not in SMART_CUT_VIDEO_ENCODERS or (
+            audio_codec is not None and audio_codec not in SMART_CUT_AUDIO_ENCODERS
+        ):
+            logger.info(f"Smart cut not supported for {video_codec}/{audio_codec}, rendering fully")
+            return False
+        if self._smart_cut_video_params(source_info["video"]) is None:
+            logger.info(
+                f"Smart cut cannot match {video_codec} profile {source_info['video'].get('profile')} "
+                f"level {source_info['video'].get('level')}, rendering fully"
+            )
+            return False
         
-        stdout, stderr = await process.communicate()
+        keyframes = await self._get_keyframes(input_path)
+        pieces = self._plan_smart_cut(segments, keyframes, float(source_info.get("duration", 0)))
+        if not pieces:
+            return False
         
-        if process.returncode != 0:
-            raise Exception(f"ffprobe failed: {stderr.decode()}")
-        
-        info = json.loads(stdout.decode())
-        
-        # Extract relevant information
-        video_stream = next((s for s in info['streams'] if s['codec_type'] == 'video'), {})
-        audio_stream = next((s for s in info['streams'] if s['codec_type'] == 'audio'), {})
-        
-        return {
-            "duration": float(info['format'].get('duration', 0)),
-            "size": int(info['format'].get('size', 0)),
-            "bitrate": int(info['format'].get('bit_rate', 0)),
-            "video": {
-                "codec": video_stream.get('codec_name'),
-                "width": video_stream.get('width'),
-                "height": video_stream.get('height'),
-                "fps": eval(video_stream.get('r_frame_rate', '0/1')) if video_stream.get('r_frame_rate') else 0
-            },
-            "audio": {
-                "codec": audio_stream.get('codec_name'),
-                "sample_rate": audio_stream.get('sample_rate'),
-                "channels": audio_stream.get('channels')
-            }
-        }
+        work_dir = Path(tempfile.mkdtemp(prefix="smartcut_", dir=self.temp_dir))
+        piece_paths = [str(work_dir / f"piece_{index:04d}.ts") for index in range(len(pieces))]
+        try:
+            # Pieces are independent, so boundary re-encodes run side by side
+            await self._run_ffmpeg_commands(
+                [
+                    self._smart_cut_piece_command(input_path, piece, piece_path, source_info)
+                    for piece, piece_path in zip(pieces, piece_paths)
+                ],
+                progress,
+                [piece["end"] - piece["start"] for piece in pieces]
+            )
+            
+            concat_list = work_dir / "concat.txt"
+            with open(concat_list, "w") as f:
+                for piece_path in piece_paths:
+                    f.write(f"file '{os.path.abspath(piece_path)}'\n")
+            
+            cmd = ["ffmpeg", "-f", "concat", "-safe", "0", "-i", str(concat_list), "-c", "copy"]
+            # Encoded pieces carry their own SPS/PPS; declare that instead of the first piece's avcC/hvcC
+            if any(piece["mode"] == "encode" for piece in pieces):
+                cmd.extend(["-tag:v", SMART_CUT_INBAND_TAGS[video_codec]])
+            cmd.extend(["-movflags", "+faststart", output_path, "-y"])
+            await self._run_ffmpeg_command(cmd)
+            
+            copied = sum(p["end"] - p["start"] for p in pieces if p["mode"] == "copy")
+            total = sum(p["end"] - p["start"] for p in pieces)
+            logger.info(f"Smart cut copied {copied:.1f}s of {total:.1f}s without re-encoding")
+            return True
+        
+        finally:
+            await self._cleanup_temp_files(piece_paths + [str(work_dir / "concat.txt")])
+            try:
+                work_dir.rmdir()
+            except OSError:
+                pass
     
-    async def _run_ffmpeg_command(self, cmd: List[str]):
-        """Run FFmpeg command asynchronously"""
+    async def _get_video_info(self, video_path: str) -> Dict:
+        """Get video information using ffprobe (probed once per file version)"""
+        return await media_metadata.aget(video_path)
+    
+    async def _run_ffmpeg_command(self, cmd: List[str], on_progress: Optional[Callable[[Dict[str, str]], None]] = None):
+        """
+        Run FFmpeg command asynchronously
+        
+        With on_progress, ffmpeg writes ``-progress`` key=value blocks to stdout
+        and each completed block is passed to on_progress while it runs.
+        """
+        if on_progress:
+            cmd = [cmd[0], "-progress", "pipe:1", "-nostats"] + cmd[1:]
         logger.info(f"Running FFmpeg command: {' '.join(cmd)}")
         
         process = await asyncio.create_subprocess_exec(
@@ -303,7 +669,21 @@ class VideoProcessor:
             stderr=asyncio.subprocess.PIPE
         )
         
-        stdout, stderr = await process.communicate()
+        if on_progress:
+            try:
+                stderr, _ = await asyncio.gather(
+                    process.stderr.read(),
+                    self._read_progress(process.stdout, on_progress)
+                )
+            except BaseException:
+                # Cancelled from the progress callback: stop encoding
+                if process.returncode is None:
+                    process.kill()
+                await process.wait()
+                raise
+            await process.wait()
+        else:
+            stdout, stderr = await process.communicate()
         
         if process.returncode != 0:
             error_msg = stderr.decode()
@@ -312,6 +692,39 @@ class VideoProcessor:
         
         logger.info("FFmpeg command completed successfully")
     
+    @staticmethod
+    async def _read_progress(stream: asyncio.StreamReader, on_progress: Callable[[Dict[str, str]], None]):
+        """Parse ``-progress`` output; every block ends with a progress=continue|end line"""
+        block: Dict[str, str] = {}
+        async for raw_line in stream:
+            key, _, value = raw_line.decode(errors="replace").strip().partition("=")
+            if not key:
+                continue
+            block[key] = value
+            if key == "progress":
+                on_progress(block)
+                block = {}
+    
+    async def _run_ffmpeg_commands(
+        self,
+        commands: List[List[str]],
+        progress: Optional[FFmpegProgress] = None,
+        expected_seconds: Optional[List[float]] = None
+    ):
+        """Run independent FFmpeg commands concurrently, at most settings.MAX_WORKERS at a time"""
+        semaphore = asyncio.Semaphore(max(1, settings.MAX_WORKERS))
+        # Register every command up front so early reports are measured against the whole job
+        trackers = [
+            progress.track(index, expected_seconds[index]) if progress else None
+            for index in range(len(commands))
+        ]
+        
+        async def run(cmd: List[str], on_progress: Optional[Callable[[Dict[str, str]], None]]):
+            async with semaphore:
+                await self._run_ffmpeg_command(cmd, on_progress)
+        
+        await asyncio.gather(*(run(cmd, on_progress) for cmd, on_progress in zip(commands, trackers)))
+    
     async def _cleanup_temp_files(self, file_paths: List[str]):
         """Clean up temporary files"""
         for file_path in file_paths:
@@ -336,3 +749,18 @@ class VideoProcessor:
         
         await self._run_ffmpeg_command(cmd)
         return str(thumbnail_path)
+
+
+def process_video_job(
+    input_path: str,
+    editing_data: Dict,
+    output_filename: Optional[str] = None,
+    progress_callback: Optional[Callable[..., None]] = None
+) -> Dict:
+    """Job queue entry point: render in the worker process and fail the job on error"""
+    result = asyncio.run(
+        VideoProcessor().process_video(input_path, editing_data, output_filename, progress_callback)
+    )
+    if not result.get("success"):
+        raise RuntimeError(result.get("error", "Video processing failed"))
+    return result
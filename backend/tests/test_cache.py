@@ -0,0 +1,214 @@
+"""
+Redis and tiered cache behaviour against the in-memory Redis fake
+"""
+import pickle
+
+import pytest
+
+from app.core import cache as cache_module
+from app.core.cache import InMemoryRedis, MemoryCache, RedisCache, TieredCache
+
+
+class FakeClock:
+    """Stands in for time.monotonic so TTLs can expire without sleeping"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(cache_module.time, "monotonic", fake)
+    return fake
+
+
+@pytest.fixture
+def client():
+    return InMemoryRedis()
+
+
+class FailingRedis:
+    """Client whose every call raises, as during a Redis outage"""
+
+    def __getattr__(self, name):
+        def fail(*args, **kwargs):
+            raise ConnectionError("redis down")
+        return fail
+
+
+def sized(value) -> int:
+    return len(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+
+
+# RedisCache
+
+def test_redis_cache_round_trip(client):
+    cache = RedisCache(client, "analysis")
+    cache.set("video", {"objects": ["person"], "score": 0.9})
+
+    assert cache.get("video") == {"objects": ["person"], "score": 0.9}
+    assert client.exists("videocraft:analysis:video") == 1
+    assert cache.stats()["hits"] == 1
+
+
+def test_redis_cache_miss(client):
+    cache = RedisCache(client, "analysis")
+
+    assert cache.get("missing") is None
+    assert cache.stats()["misses"] == 1
+
+
+def test_redis_cache_namespaces_are_isolated(client):
+    analysis = RedisCache(client, "analysis")
+    metadata = RedisCache(client, "metadata")
+    analysis.set("key", "analysis value")
+    metadata.set("key", "metadata value")
+
+    assert analysis.get("key") == "analysis value"
+    assert metadata.get("key") == "metadata value"
+
+    analysis.clear()
+    assert analysis.get("key") is None
+    assert metadata.get("key") == "metadata value"
+
+
+def test_redis_cache_delete(client):
+    cache = RedisCache(client, "analysis")
+    cache.set("key", 1)
+    cache.delete("key")
+
+    assert cache.get("key") is None
+
+
+def test_redis_cache_ttl_expires(client, clock):
+    cache = RedisCache(client, "analysis", ttl_seconds=60)
+    cache.set("key", "value")
+
+    clock.now += 59
+    assert cache.get("key") == "value"
+
+    clock.now += 2
+    assert cache.get("key") is None
+    assert client.exists("videocraft:analysis:key") == 0
+
+
+def test_redis_cache_without_ttl_never_expires(client, clock):
+    cache = RedisCache(client, "analysis")
+    cache.set("key", "value")
+
+    clock.now += 10 ** 9
+    assert cache.get("key") == "value"
+
+
+def test_redis_cache_discards_unreadable_entries(client):
+    cache = RedisCache(client, "analysis")
+    client.set("videocraft:analysis:key", b"not a pickle")
+
+    assert cache.get("key") is None
+    assert client.exists("videocraft:analysis:key") == 0
+
+
+def test_redis_cache_outage_degrades_to_misses():
+    cache = RedisCache(FailingRedis(), "analysis")
+    cache.set("key", "value")
+
+    assert cache.get("key") is None
+    cache.delete("key")
+    cache.clear()
+    assert cache.stats()["errors"] == 4
+
+
+def test_in_memory_redis_set_nx(client):
+    assert client.set("lock", "a", nx=True) is True
+    assert client.set("lock", "b", nx=True) is None
+    assert client.get("lock") == b"a"
+
+
+# TieredCache
+
+def test_tiered_cache_shares_hits_between_instances(client):
+    first = TieredCache(MemoryCache(1024 * 1024), RedisCache(client, "analysis"))
+    second = TieredCache(MemoryCache(1024 * 1024), RedisCache(client, "analysis"))
+
+    first.set("video", {"duration": 12.5})
+
+    # Computed by one worker, served to the other from Redis
+    assert second.get("video") == {"duration": 12.5}
+    assert second.backing.stats()["hits"] == 1
+
+    # ...and promoted into the second worker's memory tier
+    assert second.get("video") == {"duration": 12.5}
+    assert second.backing.stats()["hits"] == 1
+    assert second.memory.stats()["entries"] == 1
+
+
+def test_tiered_cache_delete_reaches_shared_tier(client):
+    first = TieredCache(MemoryCache(1024 * 1024), RedisCache(client, "analysis"))
+    second = TieredCache(MemoryCache(1024 * 1024), RedisCache(client, "analysis"))
+    first.set("video", "value")
+
+    first.delete("video")
+
+    assert first.get("video") is None
+    assert second.get("video") is None
+
+
+def test_tiered_cache_memory_eviction_falls_back_to_redis(client):
+    value_size = sized("x" * 100)
+    tiered = TieredCache(MemoryCache(value_size * 2), RedisCache(client, "analysis"))
+
+    for key in ("a", "b", "c"):
+        tiered.set(key, key * 100)
+
+    # "a" was the least recently used and left the memory tier...
+    assert tiered.memory.stats()["entries"] == 2
+    assert tiered.memory.get("a") is None
+    # ...but is still served from Redis
+    assert tiered.get("a") == "a" * 100
+
+
+def test_memory_cache_evicts_least_recently_used():
+    value_size = sized("x" * 100)
+    memory = MemoryCache(value_size * 2)
+    memory.set("a", "a" * 100)
+    memory.set("b", "b" * 100)
+
+    memory.get("a")  # "b" becomes the least recently used
+    memory.set("c", "c" * 100)
+
+    assert memory.get("a") == "a" * 100
+    assert memory.get("b") is None
+    assert memory.get("c") == "c" * 100
+
+
+def test_memory_cache_skips_values_larger_than_budget():
+    memory = MemoryCache(16)
+    memory.set("big", "x" * 1000)
+
+    assert memory.get("big") is None
+
+
+def test_tiered_cache_ttl_expiry_in_shared_tier(client, clock):
+    writer = TieredCache(MemoryCache(1024 * 1024), RedisCache(client, "analysis", ttl_seconds=30))
+    reader = TieredCache(MemoryCache(1024 * 1024), RedisCache(client, "analysis", ttl_seconds=30))
+    writer.set("video", "value")
+
+    clock.now += 31
+
+    assert reader.get("video") is None
+
+
+def test_tiered_cache_clear(client):
+    tiered = TieredCache(MemoryCache(1024 * 1024), RedisCache(client, "analysis"))
+    tiered.set("a", 1)
+    tiered.set("b", 2)
+
+    tiered.clear()
+
+    assert tiered.get("a") is None
+    assert tiered.get("b") is None
+    assert list(client.scan_iter(match="videocraft:analysis:*")) == []
@@ -0,0 +1,196 @@
+"""
+Resumable upload sessions: Content-Range parsing, range bookkeeping and part reservations
+"""
+import asyncio
+import hashlib
+import os
+import time
+
+import pytest
+
+from app.core.config import settings
+from app.services.upload_sessions import (
+    META_FILE,
+    PENDING_SUFFIX,
+    RANGES_DIR,
+    UploadSessionError,
+    UploadSessionStore,
+    merge_ranges,
+    missing_ranges,
+    parse_content_range
+)
+
+
+@pytest.fixture
+def store(tmp_path):
+    return UploadSessionStore(str(tmp_path / "sessions"))
+
+
+async def body(data: bytes, chunk_size: int = 4):
+    for offset in range(0, len(data), chunk_size):
+        yield data[offset:offset + chunk_size]
+
+
+def write(store, session_id, start, data, total=None):
+    return asyncio.run(store.write_part(session_id, start, start + len(data), total, body(data)))
+
+
+def ranges_dir(store, session_id):
+    return store.root / session_id / RANGES_DIR
+
+
+# Content-Range and range helpers
+
+def test_parse_content_range():
+    assert parse_content_range("bytes 0-99/1000") == (0, 100, 1000)
+    assert parse_content_range(" bytes 100-199/* ") == (100, 200, None)
+
+
+@pytest.mark.parametrize("header", [None, "", "bytes=0-99", "bytes 0-99", "items 0-9/10"])
+def test_parse_content_range_rejects_malformed(header):
+    with pytest.raises(UploadSessionError) as error:
+        parse_content_range(header)
+    assert error.value.status_code == 400
+
+
+def test_parse_content_range_rejects_backwards_range():
+    with pytest.raises(UploadSessionError):
+        parse_content_range("bytes 50-10/100")
+
+
+def test_merge_ranges_joins_overlapping_and_adjacent():
+    assert merge_ranges([(20, 30), (0, 10), (10, 15), (25, 40), (50, 60)]) == [(0, 15), (20, 40), (50, 60)]
+    assert merge_ranges([]) == []
+
+
+def test_missing_ranges():
+    assert missing_ranges([(10, 20), (30, 40)], 50) == [(0, 10), (20, 30), (40, 50)]
+    assert missing_ranges([(0, 50)], 50) == []
+    assert missing_ranges([], 50) == [(0, 50)]
+
+
+# Parts
+
+def test_parts_in_any_order_complete_the_upload(store):
+    session_id = store.create("clip.mp4", 12, "video")["session_id"]
+
+    status = write(store, session_id, 8, b"ijkl", total=12)
+    assert status["received_ranges"] == [[8, 11]]
+    assert status["missing_ranges"] == [[0, 7]]
+    assert status["offset"] == 0
+
+    status = write(store, session_id, 0, b"abcdefgh")
+    assert status["received_ranges"] == [[0, 11]]
+    assert status["offset"] == 12
+    assert status["complete"]
+    assert sorted(os.listdir(ranges_dir(store, session_id))) == ["0-8", "8-12"]
+
+
+def test_part_overlapping_received_bytes_is_rejected(store):
+    session_id = store.create("clip.mp4", 12, "video")["session_id"]
+    write(store, session_id, 0, b"abcdefgh")
+
+    with pytest.raises(UploadSessionError) as error:
+        write(store, session_id, 6, b"XXXX")
+    assert error.value.status_code == 409
+    assert "received" in str(error.value)
+    with open(store.root / session_id / "data.part", "rb") as f:
+        assert f.read(8) == b"abcdefgh"
+
+
+def test_part_overlapping_in_flight_part_is_rejected(store):
+    session_id = store.create("clip.mp4", 12, "video")["session_id"]
+    (ranges_dir(store, session_id) / f"0-8.other{PENDING_SUFFIX}").touch()
+
+    with pytest.raises(UploadSessionError) as error:
+        write(store, session_id, 4, b"efgh")
+    assert error.value.status_code == 409
+    assert "in-flight" in str(error.value)
+
+
+def test_concurrent_overlapping_parts_do_not_both_succeed(store):
+    session_id = store.create("clip.mp4", 12, "video")["session_id"]
+
+    async def slow_body(data: bytes):
+        for byte in data:
+            await asyncio.sleep(0.001)
+            yield bytes([byte])
+
+    async def both():
+        return await asyncio.gather(
+            store.write_part(session_id, 0, 8, None, slow_body(b"abcdefgh")),
+            store.write_part(session_id, 4, 12, None, slow_body(b"EFGHijkl")),
+            return_exceptions=True
+        )
+
+    results = asyncio.run(both())
+    assert any(isinstance(result, UploadSessionError) for result in results)
+    assert not any(name.endswith(PENDING_SUFFIX) for name in os.listdir(ranges_dir(store, session_id)))
+
+
+def test_abandoned_reservation_is_reclaimed(store):
+    session_id = store.create("clip.mp4", 12, "video")["session_id"]
+    abandoned = ranges_dir(store, session_id) / f"0-8.dead{PENDING_SUFFIX}"
+    abandoned.touch()
+    stale = time.time() - settings.UPLOAD_PART_LEASE_SECONDS - 1
+    os.utime(abandoned, (stale, stale))
+
+    status = write(store, session_id, 0, b"abcdefgh")
+    assert status["received_ranges"] == [[0, 7]]
+    assert not abandoned.exists()
+
+
+def test_short_part_releases_its_reservation(store):
+    session_id = store.create("clip.mp4", 12, "video")["session_id"]
+
+    with pytest.raises(UploadSessionError):
+        asyncio.run(store.write_part(session_id, 0, 8, None, body(b"abc")))
+    assert os.listdir(ranges_dir(store, session_id)) == []
+
+    assert write(store, session_id, 0, b"abcdefgh")["received_ranges"] == [[0, 7]]
+
+
+def test_part_beyond_upload_size_is_rejected(store):
+    session_id = store.create("clip.mp4", 12, "video")["session_id"]
+
+    with pytest.raises(UploadSessionError) as error:
+        write(store, session_id, 8, b"ijklm")
+    assert error.value.status_code == 416
+
+
+# Finalize and expiry
+
+def test_finalize_rejects_checksum_mismatch(store):
+    data = b"abcdefghijkl"
+    session_id = store.create("clip.mp4", len(data), "video", checksum="0" * 64)["session_id"]
+    write(store, session_id, 0, data)
+
+    with pytest.raises(UploadSessionError) as error:
+        store.finalize(session_id, "clip.mp4")
+    assert error.value.status_code == 422
+    assert hashlib.sha256(data).hexdigest() in str(error.value)
+    # The session survives so the client can inspect or abort it
+    assert store.status(session_id)["complete"]
+
+
+def test_finalize_rejects_incomplete_upload(store):
+    session_id = store.create("clip.mp4", 12, "video")["session_id"]
+    write(store, session_id, 0, b"abcd")
+
+    with pytest.raises(UploadSessionError) as error:
+        store.finalize(session_id, "clip.mp4")
+    assert error.value.status_code == 409
+
+
+def test_expiry_follows_last_activity(store):
+    idle = store.create("idle.mp4", 12, "video")["session_id"]
+    active = store.create("active.mp4", 12, "video")["session_id"]
+    long_ago = time.time() - settings.UPLOAD_SESSION_TTL_HOURS * 3600 - 1
+    for session_id in (idle, active):
+        os.utime(store.root / session_id / META_FILE, (long_ago, long_ago))
+
+    write(store, active, 0, b"abcd")
+    store.expire_stale()
+
+    assert not (store.root / idle).exists()
+    assert store.status(active)["received_ranges"] == [[0, 3]]